@@ -0,0 +1 @@
+"""Benchmarks for the CoreAlpha adapter (not part of the default test run)."""
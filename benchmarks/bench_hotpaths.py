@@ -0,0 +1,107 @@
+"""Microbenchmarks for agents, voting, schemas and the provider cache."""
+
+import json
+import time
+
+import pytest
+
+from corealpha_adapter.providers.fingpt import FinGPTProvider
+from corealpha_adapter.providers.stub import _simple_sentiment, _tokenize
+from corealpha_adapter.schemas import MAX_ITEMS, MAX_TEXT_LEN, SentimentRequest, VoteRequest
+from corealpha_adapter.services.agents.base import deterministic_rng
+from corealpha_adapter.services.voting.wsum_engine import WSUMEngine, wsum_probability
+
+from .validation import vote_body
+
+HEADLINE = "Record growth and strong margins, but guidance cut on weak China demand and risk"
+
+
+def run_sync(coro):
+    """Run a coroutine that never suspends without an event loop (no loop overhead)."""
+
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("coroutine suspended; benchmark it on an event loop instead")
+
+
+def _vote_request(size: int) -> VoteRequest:
+    return VoteRequest.model_validate_json(vote_body(size))
+
+
+def test_tokenize(bench):
+    bench(lambda: sum(1 for _ in _tokenize(HEADLINE)))
+
+
+@pytest.mark.parametrize("size", [1, 200])
+def test_simple_sentiment(bench, size):
+    texts = [HEADLINE] * size
+    bench(_simple_sentiment, texts)
+
+
+@pytest.mark.parametrize("size", [5, 50, 200])
+def test_wsum_probability(bench, size):
+    weights = [0.1 + (i % 9) / 10 for i in range(size)]
+    signals = [(1.0, 0.5, 0.0)[i % 3] for i in range(size)]
+    bench(wsum_probability, weights, signals)
+
+
+@pytest.mark.parametrize("size", [5, 50, 200])
+def test_wsum_engine_vote(bench, size):
+    engine = WSUMEngine()
+    req = _vote_request(size)
+    bench(engine.vote, req)
+
+
+def test_deterministic_rng(bench):
+    bench(deterministic_rng, "NVDA", "Fundamental")
+
+
+def test_validate_max_sentiment_request(bench):
+    body = json.dumps(
+        {
+            "ticker": "NVDA",
+            "texts": [("x" * (MAX_TEXT_LEN - 4)) + f"{i:04d}" for i in range(MAX_ITEMS)],
+        }
+    ).encode()
+    bench(SentimentRequest.model_validate_json, body)
+
+
+def test_validate_max_vote_request(bench):
+    body = vote_body(MAX_ITEMS)
+    bench(VoteRequest.model_validate_json, body)
+
+
+@pytest.fixture
+def fingpt(monkeypatch):
+    monkeypatch.setenv("FINGPT_BASE_URL", "https://api.fingpt.test")
+    monkeypatch.setenv("FINGPT_API_KEY", "bench")
+    return FinGPTProvider()
+
+
+SENTIMENT_RESULT = {
+    "score": 0.42,
+    "rationale": "bench",
+    "sources": [{"title": f"Doc {i}", "url": f"http://example.com/{i}"} for i in range(5)],
+}
+
+
+def test_fingpt_cache_get_hit(bench, fingpt):
+    key = ("/sentiment", '{"texts":["a"]}')
+    now = time.monotonic()
+    run_sync(fingpt._store_cache(key, SENTIMENT_RESULT, now))
+    bench(lambda: run_sync(fingpt._get_cached(key, now)))
+
+
+def test_fingpt_cache_store(bench, fingpt):
+    now = time.monotonic()
+    keys = [("/sentiment", str(i)) for i in range(1000)]
+    state = {"i": 0}
+
+    def store():
+        state["i"] += 1
+        run_sync(fingpt._store_cache(keys[state["i"] % 1000], SENTIMENT_RESULT, now))
+
+    bench(store)
@@ -0,0 +1,87 @@
+"""Each ASGI middleware layer in isolation, wrapped around a no-op app.
+
+One benchmark is one complete request through a single layer: ``scope``,
+``receive`` and ``send`` are plain coroutines that never suspend, so the
+time is the layer's own overhead.
+"""
+
+import pytest
+from secure import Secure
+
+from corealpha_adapter.middleware import (
+    AdmissionControlMiddleware,
+    BodySizeLimitMiddleware,
+    RateLimitMiddleware,
+    RequestIDMiddleware,
+    SecurityHeadersMiddleware,
+    build_security_headers,
+)
+from corealpha_adapter.observability.log_pipeline import AccessLogSampler
+from corealpha_adapter.observability.profiler import ProfilerTagMiddleware
+from corealpha_adapter.ratelimit import Limiter, MemoryBackend
+
+from .bench_hotpaths import run_sync
+
+_START = {"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]}
+_BODY = {"type": "http.response.body", "body": b"ok", "more_body": False}
+_REQUEST = {"type": "http.request", "body": b"{}", "more_body": False}
+
+
+async def _app(scope, receive, send):
+    await receive()
+    await send(dict(_START))
+    await send(_BODY)
+
+
+async def _receive():
+    return _REQUEST
+
+
+async def _send(message):
+    return None
+
+
+def _scope(chunked: bool = False):
+    headers = [(b"host", b"testserver"), (b"x-api-key", b"bench")]
+    if not chunked:
+        headers.append((b"content-length", b"2"))
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/vote",
+        "headers": headers,
+        "client": ("127.0.0.1", 5000),
+        "app": None,
+    }
+
+
+class _Monitor:
+    overloaded = False
+
+
+def _limiter():
+    return Limiter(
+        key_func=lambda request: "bench",
+        backend=MemoryBackend(),
+        default_limits=["1000000000/second"],
+    )
+
+
+LAYERS = {
+    "baseline": lambda app: app,
+    "security_headers": lambda app: SecurityHeadersMiddleware(
+        app, *build_security_headers(Secure(), "default-src 'self'")
+    ),
+    "body_limit": lambda app: BodySizeLimitMiddleware(app, max_bytes=1024),
+    "rate_limit": lambda app: RateLimitMiddleware(app, limiter=_limiter()),
+    "admission": lambda app: AdmissionControlMiddleware(app, monitor=_Monitor()),
+    "profiler_tag": lambda app: ProfilerTagMiddleware(app),
+    "request_id": lambda app: RequestIDMiddleware(app, sampler=AccessLogSampler(sample_rate=0)),
+}
+
+
+@pytest.mark.parametrize("layer", list(LAYERS))
+def test_middleware_layer(bench, layer):
+    asgi = LAYERS[layer](_app)
+    chunked = layer == "body_limit"  # räknar chunkar i stället för att lita på Content-Length
+    bench(lambda: run_sync(asgi(_scope(chunked), _receive, _send)))
@@ -0,0 +1,143 @@
+"""pytest harness for the microbenchmarks in ``benchmarks/bench_*.py``.
+
+The files are only collected when ``benchmarks`` is passed explicitly, so a
+plain ``pytest`` run stays fast::
+
+    pytest benchmarks                                # compare with baseline.json
+    BENCH_SAVE_BASELINE=1 pytest benchmarks          # store a new baseline
+    BENCH_THRESHOLD=0.5 pytest benchmarks -k wsum    # looser threshold
+
+Each benchmark is timed in ``BENCH_REPEAT`` rounds that alternate with a fixed
+pure-Python calibration workload. The score is the median over rounds of
+benchmark time divided by calibration time, so clock speed, turbo and noisy
+neighbours affect both halves of a round alike and cancel out; a baseline
+taken on one machine stays comparable on another. A benchmark fails when its
+score exceeds the baseline score by more than ``BENCH_THRESHOLD`` (default
+``0.25`` = 25 %). The best per-call time in nanoseconds and the calibration
+time are recorded too, for reading, not for the gate. Results of every run
+are written to ``BENCH_RESULTS``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import timeit
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+BASELINE = Path(os.getenv("BENCH_BASELINE", HERE / "baseline.json"))
+RESULTS = Path(os.getenv("BENCH_RESULTS", HERE / "results.json"))
+THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.25"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "15"))
+SAVE_BASELINE = os.getenv("BENCH_SAVE_BASELINE") == "1"
+
+
+def _explicitly_requested(config) -> bool:
+    for arg in config.args:
+        path = Path(str(arg).split("::", 1)[0]).resolve()
+        if path == HERE or HERE in path.parents:
+            return True
+    return False
+
+
+def pytest_collect_file(file_path, parent):
+    if (
+        file_path.suffix == ".py"
+        and file_path.name.startswith("bench_")
+        and _explicitly_requested(parent.config)
+    ):
+        return pytest.Module.from_parent(parent, path=file_path)
+    return None
+
+
+def _calibration_loop() -> int:
+    # Blandad last (dict, heltal, strängar, sortering, json) som liknar de mätta vägarna.
+    total = 0
+    table = {}
+    items = []
+    for i in range(300):
+        table[i & 63] = i
+        total += table[i & 63] * 3 // 7
+        items.append(f"k{i % 17}:{i}")
+    items.sort()
+    return total + len(json.dumps(items[:50])) + len(str(sorted(table.items())))
+
+
+def _block(timer: timeit.Timer) -> int:
+    number, _ = timer.autorange()  # ~0.2 s
+    return max(1, number // 8)
+
+
+def _measure(func) -> Tuple[float, float, float]:
+    """``(best_ns, calibration_ns, score)`` from rounds alternating calibration and ``func``."""
+
+    calibration = timeit.Timer(_calibration_loop)
+    timer = timeit.Timer(func)
+    cal_number, number = _block(calibration), _block(timer)
+    cal_times, times, ratios = [], [], []
+    for _ in range(REPEAT):
+        cal = calibration.timeit(cal_number) / cal_number
+        per_call = timer.timeit(number) / number
+        cal_times.append(cal)
+        times.append(per_call)
+        ratios.append(per_call / cal)
+    return min(times) * 1e9, min(cal_times) * 1e9, statistics.median(ratios)
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.results: Dict[str, float] = {}
+        self.calibration: Dict[str, float] = {}
+        self.scores: Dict[str, float] = {}
+        self.baseline: Optional[dict] = None
+        if BASELINE.exists() and not SAVE_BASELINE:
+            self.baseline = json.loads(BASELINE.read_text())
+
+    def document(self) -> dict:
+        calibration = statistics.median(self.calibration.values()) if self.calibration else 0.0
+        return {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration_ns": round(calibration, 1),
+            "results": {name: round(ns, 1) for name, ns in sorted(self.results.items())},
+            "scores": {name: round(score, 5) for name, score in sorted(self.scores.items())},
+        }
+
+
+@pytest.fixture(scope="session")
+def _bench_session():
+    session = _Session()
+    yield session
+    doc = session.document()
+    RESULTS.write_text(json.dumps(doc, indent=2) + "\n")
+    if SAVE_BASELINE:
+        BASELINE.write_text(json.dumps(doc, indent=2) + "\n")
+
+
+@pytest.fixture
+def bench(request, _bench_session):
+    """``bench(func, *args)``: time ``func(*args)`` and check it against the baseline."""
+
+    def run(func, *args, **kwargs) -> float:
+        name = request.node.name
+        ns, calibration, score = _measure(lambda: func(*args, **kwargs))
+        _bench_session.results[name] = ns
+        _bench_session.calibration[name] = calibration
+        _bench_session.scores[name] = score
+        baseline = _bench_session.baseline
+        if baseline and name in baseline.get("scores", {}):
+            ratio = score / baseline["scores"][name]
+            if ratio > 1 + THRESHOLD:
+                pytest.fail(
+                    f"{name}: {ns:,.0f} ns/call, {score:.4g}x calibration is {ratio:.2f}x "
+                    f"the baseline (threshold {1 + THRESHOLD:.2f}x)"
+                )
+        return ns
+
+    return run
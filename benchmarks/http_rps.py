@@ -0,0 +1,93 @@
+"""In-process requests-per-second benchmark for the adapter's HTTP stack.
+
+Drives the ASGI app directly through ``httpx.ASGITransport`` (no sockets), so
+the numbers isolate middleware, routing, validation and serialization cost::
+
+    python -m benchmarks.http_rps --requests 2000 --concurrency 16
+    python -m benchmarks.http_rps --endpoints summarize,sentiment200,propose,vote200
+
+Every request carries its own ``x-api-key`` so the per-key rate limits do
+not turn the run into a 429 benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+VOTE_BODY = {
+    "proposals": [
+        {"agent": f"A{i}", "vote": ("BUY", "HOLD", "SELL")[i % 3], "weight": 0.2, "confidence": 0.6}
+        for i in range(5)
+    ]
+}
+
+VOTE_BATCH_BODY = {
+    "proposals": [
+        {"agent": f"A{i}", "vote": ("BUY", "HOLD", "SELL")[i % 3], "weight": 0.2, "confidence": 0.6}
+        for i in range(200)
+    ]
+}
+
+SENTIMENT_BATCH_BODY = {
+    "ticker": "NVDA",
+    "texts": [f"Record growth and strong margins, guidance raise #{i}" for i in range(200)],
+}
+
+ENDPOINTS: Dict[str, Tuple[str, str, Optional[Dict[str, Any]]]] = {
+    "health": ("GET", "/health", None),
+    "summarize": ("POST", "/summarize", {"ticker": "NVDA", "text": "strong growth and margins"}),
+    "sentiment200": ("POST", "/sentiment", SENTIMENT_BATCH_BODY),
+    "propose": ("POST", "/agent/propose", {"ticker": "NVDA", "agent": "Fundamental"}),
+    "vote": ("POST", "/vote", VOTE_BODY),
+    "vote200": ("POST", "/vote", VOTE_BATCH_BODY),
+}
+
+
+async def _run(app, method: str, path: str, body, total: int, concurrency: int) -> float:
+    import httpx
+
+    keys = itertools.count()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+
+        async def worker(n: int) -> None:
+            for _ in range(n):
+                headers = {"x-api-key": f"bench-{next(keys)}"}
+                resp = await client.request(method, path, json=body, headers=headers)
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{path} returned {resp.status_code}: {resp.text[:200]}")
+
+        per_worker = max(1, total // concurrency)
+        # Värm upp routing, validering och lazy imports innan mätningen.
+        await worker(min(50, per_worker))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return per_worker * concurrency / elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoints", default="health,vote")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("RATE_LIMIT", "1000000/minute")
+    os.environ.setdefault("LLM_PROVIDER", "stub")
+    os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+    from corealpha_adapter.app import app
+
+    for name in args.endpoints.split(","):
+        method, path, body = ENDPOINTS[name]
+        rps = asyncio.run(_run(app, method, path, body, args.requests, args.concurrency))
+        print(f"{name:<14} {path:<16} {rps:10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""Open-model load generator for the adapter's upstream-backed endpoints.
+
+Requests are started at a fixed arrival rate whether or not earlier ones have
+finished, and each latency is measured from its *scheduled* start, so a
+stalled service shows up in the tail instead of slowing the generator down::
+
+    python -m benchmarks.mock_fingpt --port 9100 --error-rate 0.05 &
+    LLM_PROVIDER=fingpt FINGPT_BASE_URL=http://localhost:9100 FINGPT_API_KEY=x \\
+        RATE_LIMIT=1000000/minute uvicorn corealpha_adapter.app:app --port 8000 &
+    python -m benchmarks.loadgen --url http://localhost:8000 --rate 50 --duration 30
+
+``--in-process`` drives ``create_app()`` through ``httpx.ASGITransport``
+instead of a URL. ``--cassette`` sends the requests recorded with
+``FINGPT_RECORD_PATH`` instead of synthetic bodies; add ``--arrivals recorded``
+to keep their original spacing (``--speed 2`` = twice as fast).
+
+The report lists throughput, status codes and p50/p95/p99/p999 latency per
+endpoint, plus the adapter's upstream attempts, retries and circuit-breaker
+activity taken from ``/metrics`` (per process, so run the adapter with a
+single worker).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+_TEXTS = (
+    "Record growth and strong margins, guidance raise",
+    "Weak demand and a guidance cut, downgrade risk",
+    "Revenue in line, margins stable",
+)
+
+
+def _summarize(n: int) -> Dict[str, Any]:
+    return {"ticker": "NVDA", "text": f"{_TEXTS[n % 3]} #{n}"}
+
+
+def _sentiment(n: int) -> Dict[str, Any]:
+    return {"ticker": "NVDA", "texts": [f"{text} #{n}" for text in _TEXTS]}
+
+
+def _vote(n: int) -> Dict[str, Any]:
+    votes = ("BUY", "HOLD", "SELL")
+    return {
+        "proposals": [
+            {"agent": f"A{i}", "vote": votes[(n + i) % 3], "weight": 0.2, "confidence": 0.6}
+            for i in range(5)
+        ]
+    }
+
+
+# Bodies are numbered so the provider's response cache does not absorb the load.
+ENDPOINTS: Dict[str, Tuple[str, Callable[[int], Dict[str, Any]]]] = {
+    "summarize": ("/summarize", _summarize),
+    "sentiment": ("/sentiment", _sentiment),
+    "vote": ("/vote", _vote),
+}
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(round(q / 100 * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """``"summarize=1,vote=2"`` → relative weights per endpoint."""
+
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"empty endpoint mix: {spec!r}")
+    return mix
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        ok = self.statuses.get("200", 0)
+        return {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "ok_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            **{
+                f"p{q:g}_ms".replace(".", ""): round(percentile(values, q) * 1000, 2)
+                for q in PERCENTILES
+            },
+        }
+
+
+@dataclass
+class LoadResult:
+    elapsed: float
+    scheduled: int
+    dropped: int
+    endpoints: Dict[str, EndpointStats]
+    upstream: Dict[str, Any] = field(default_factory=dict)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "scheduled": self.scheduled,
+            "dropped": self.dropped,
+            "endpoints": {
+                name: stats.summary(self.elapsed) for name, stats in self.endpoints.items()
+            },
+            "upstream": self.upstream,
+        }
+
+
+def cassette_requests(path: str) -> List[Tuple[str, Dict[str, Any], float]]:
+    """``(endpoint, body, t)`` for every recorded exchange the adapter also serves."""
+
+    from corealpha_adapter.providers.cassette import iter_cassette
+
+    by_path = {route: name for name, (route, _) in ENDPOINTS.items()}
+    return [
+        (by_path[entry["path"]], entry["request"], float(entry.get("t", 0.0)))
+        for entry in iter_cassette(path)
+        if entry.get("path") in by_path
+    ]
+
+
+def _arrival_gaps(
+    rate: float, arrivals: str, rng: random.Random, recorded: Sequence[float] = ()
+) -> Iterator[float]:
+    if arrivals == "recorded":
+        # Inspelade avstånd mellan requests, skalade med --speed (rate).
+        for gap in itertools.cycle(recorded or (1.0,)):
+            yield max(0.0, gap) / rate
+    while True:
+        yield rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+
+
+async def run_load(
+    client,
+    mix: Dict[str, float],
+    rate: float,
+    duration: float,
+    *,
+    arrivals: str = "poisson",
+    max_inflight: int = 1000,
+    api_key: Optional[str] = None,
+    seed: Optional[int] = None,
+    recorded: Optional[Sequence[Tuple[str, Dict[str, Any], float]]] = None,
+) -> LoadResult:
+    """Fire requests at ``rate``/s for ``duration`` seconds and collect per-endpoint stats.
+
+    With ``recorded`` (see :func:`cassette_requests`) the bodies are sent in
+    recorded order, cycling, and ``arrivals="recorded"`` reuses their spacing
+    with ``rate`` as speed factor.
+    """
+
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    if recorded:
+        names = list(dict.fromkeys(name for name, _, _ in recorded))
+    stats = {name: EndpointStats() for name in names}
+    gaps = [b[2] - a[2] for a, b in zip(recorded or (), (recorded or ())[1:])]
+    counter = itertools.count()
+    inflight: set = set()
+    scheduled = dropped = 0
+
+    async def fire(name: str, n: int, due: float) -> None:
+        path, make_body = ENDPOINTS[name]
+        body = recorded[n % len(recorded)][1] if recorded else make_body(n)
+        # Unika nycklar per request som i http_rps, så att rate limiten inte mäts.
+        headers = {"x-api-key": api_key or f"loadgen-{n}"}
+        try:
+            response = await client.post(path, json=body, headers=headers)
+            status = str(response.status_code)
+        except Exception as exc:  # noqa: BLE001 - timeouts och avbrutna anslutningar räknas
+            status = type(exc).__name__
+        stats[name].latencies.append(time.perf_counter() - due)
+        stats[name].statuses[status] += 1
+
+    loop_start = time.perf_counter()
+    due = loop_start
+    for gap in _arrival_gaps(rate, arrivals, rng, gaps):
+        due += gap
+        if due - loop_start >= duration:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        scheduled += 1
+        if len(inflight) >= max_inflight:
+            dropped += 1
+            continue
+        n = next(counter)
+        name = recorded[n % len(recorded)][0] if recorded else rng.choices(names, weights)[0]
+        task = asyncio.create_task(fire(name, n, due))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.gather(*inflight)
+    return LoadResult(time.perf_counter() - loop_start, scheduled, dropped, stats)
+
+
+# --- Upstream behaviour from the adapter's Prometheus metrics ---
+
+
+def _scrape(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    from prometheus_client.parser import text_string_to_metric_families
+
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        if not family.name.startswith(("corealpha_upstream", "corealpha_circuit")):
+            continue
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def upstream_delta(before: str, after: str) -> Dict[str, Any]:
+    """Summarize upstream attempts, retries and breaker openings between two scrapes."""
+
+    old, new = _scrape(before), _scrape(after)
+
+    def delta(key) -> float:
+        return new.get(key, 0.0) - old.get(key, 0.0)
+
+    attempts: Dict[str, Dict[str, int]] = {}
+    retries: Dict[str, int] = {}
+    for key in new:
+        name, labels = key
+        labels_d = dict(labels)
+        if name == "corealpha_upstream_request_duration_seconds_count":
+            count = int(delta(key))
+            if count:
+                per_path = attempts.setdefault(labels_d["path"], {})
+                per_path[labels_d["status"]] = count
+        elif name == "corealpha_upstream_retries_total" and int(delta(key)):
+            retries[labels_d["path"]] = int(delta(key))
+    return {
+        "attempts": attempts,
+        "retries": retries,
+        "circuit_opened": int(delta(("corealpha_circuit_opened_total", ()))),
+        "circuit_open_at_end": bool(new.get(("corealpha_circuit_open", ()), 0.0)),
+    }
+
+
+async def _metrics_text(client) -> Optional[str]:
+    try:
+        response = await client.get("/metrics")
+    except Exception:  # noqa: BLE001 - metrics är valfria i rapporten
+        return None
+    return response.text if response.status_code == 200 else None
+
+
+async def _sample_circuit(client, interval: float, samples: List[bool]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        text = await _metrics_text(client)
+        if text is not None:
+            samples.append(bool(_scrape(text).get(("corealpha_circuit_open", ()), 0.0)))
+
+
+async def measure(client, args: argparse.Namespace) -> LoadResult:
+    before = await _metrics_text(client)
+    samples: List[bool] = []
+    sampler = asyncio.create_task(_sample_circuit(client, args.metrics_interval, samples))
+    try:
+        result = await run_load(
+            client,
+            parse_mix(args.mix),
+            args.speed if args.arrivals == "recorded" else args.rate,
+            args.duration,
+            arrivals=args.arrivals,
+            max_inflight=args.max_inflight,
+            api_key=args.api_key,
+            seed=args.seed,
+            recorded=cassette_requests(args.cassette) if args.cassette else None,
+        )
+    finally:
+        sampler.cancel()
+    after = await _metrics_text(client)
+    if before is not None and after is not None:
+        result.upstream = upstream_delta(before, after)
+        if samples:
+            result.upstream["circuit_open_fraction"] = round(sum(samples) / len(samples), 3)
+    return result
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['scheduled']} scheduled, {report['dropped']} dropped "
+        f"in {report['elapsed_s']:.1f}s",
+        f"{'endpoint':<10} {'req/s':>8} {'ok/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+        f"{'p999':>9}  statuses",
+    ]
+    for name, row in report["endpoints"].items():
+        statuses = " ".join(f"{code}={count}" for code, count in row["statuses"].items())
+        lines.append(
+            f"{name:<10} {row['throughput_rps']:>8.1f} {row['ok_rps']:>8.1f} "
+            f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+            f"{row['p999_ms']:>7.1f}ms  {statuses}"
+        )
+    upstream = report["upstream"]
+    if upstream:
+        lines.append(f"upstream attempts: {upstream['attempts']}")
+        lines.append(f"upstream retries:  {upstream['retries']}")
+        breaker = f"circuit opened {upstream['circuit_opened']}x"
+        if "circuit_open_fraction" in upstream:
+            breaker += f", open {upstream['circuit_open_fraction']:.0%} of samples"
+        lines.append(breaker + (", open at end" if upstream["circuit_open_at_end"] else ""))
+    return "\n".join(lines)
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=100)
+    if args.in_process:
+        os.environ.setdefault("RATE_LIMIT", "1000000/minute")
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        from corealpha_adapter.app import create_app
+
+        app = create_app()
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://loadgen", timeout=timeout
+            ) as client:
+                return (await measure(client, args)).report()
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+        return (await measure(client, args)).report()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000")
+    target.add_argument("--in-process", action="store_true")
+    parser.add_argument("--rate", type=float, default=20.0, help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", default="summarize=1,sentiment=1,vote=1")
+    parser.add_argument(
+        "--arrivals", choices=("poisson", "constant", "recorded"), default="poisson"
+    )
+    parser.add_argument("--cassette", default=None, help="replay recorded request bodies")
+    parser.add_argument("--speed", type=float, default=1.0, help="with --arrivals recorded")
+    parser.add_argument("--max-inflight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--api-key", default=None, help="fixed x-api-key (default: unique)")
+    parser.add_argument("--metrics-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report")
+    args = parser.parse_args(argv)
+    try:
+        parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.rate <= 0 or args.speed <= 0:
+        parser.error("--rate and --speed must be positive")
+    if args.arrivals == "recorded" and not args.cassette:
+        parser.error("--arrivals recorded needs --cassette")
+
+    report = asyncio.run(_main(args))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Local FinGPT stand-in with configurable latency and faults, for load tests.
+
+Answers ``/summarize``, ``/sentiment`` and ``/vote`` with the same payloads as
+the stub provider, after injecting the configured behaviour::
+
+    python -m benchmarks.mock_fingpt --port 9100 --latency lognormal:0.08:0.5 \\
+        --error-rate 0.02 --timeout-rate 0.005 --drip-rate 0.05 \\
+        --route /vote:error_rate=0.3
+
+Point the adapter at it with ``LLM_PROVIDER=fingpt``,
+``FINGPT_BASE_URL=http://localhost:9100`` and any ``FINGPT_API_KEY``.
+
+Latency specs: ``fixed:S``, ``uniform:LO:HI``, ``lognormal:MEDIAN:SIGMA`` and
+``exp:MEAN`` (seconds). Per request, in this order: ``error_rate`` answers
+503, ``timeout_rate`` hangs for ``hang_seconds`` (longer than the adapter's
+``HTTP_TIMEOUT_SECONDS``), ``drip_rate`` sends the body in ``drip_chunks``
+pieces ``drip_interval`` seconds apart. ``GET /_mock/stats`` returns counters
+per path and outcome.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
+from typing import Callable, Dict, List, Optional
+
+ROUTES = ("/summarize", "/sentiment", "/vote")
+
+
+@dataclass(frozen=True)
+class Latency:
+    """A latency distribution in seconds, parsed from ``kind:arg[:arg]``."""
+
+    kind: str = "fixed"
+    args: tuple = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, rest = spec.partition(":")
+        arity = {"fixed": 1, "uniform": 2, "lognormal": 2, "exp": 1}
+        try:
+            args = tuple(float(part) for part in rest.split(":")) if rest else ()
+        except ValueError:
+            raise ValueError(f"invalid latency spec: {spec!r}") from None
+        if kind not in arity or len(args) != arity[kind] or any(a < 0 for a in args):
+            raise ValueError(f"invalid latency spec: {spec!r}")
+        return cls(kind, args)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.args)
+        if self.kind == "lognormal":
+            median, sigma = self.args
+            return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.args[0]) if self.args[0] > 0 else 0.0
+        return self.args[0]
+
+
+@dataclass(frozen=True)
+class Faults:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 60.0
+    drip_rate: float = 0.0
+    drip_chunks: int = 10
+    drip_interval: float = 0.2
+
+    def with_option(self, option: str) -> "Faults":
+        """Return a copy with one ``key=value`` option applied."""
+
+        key, sep, value = option.partition("=")
+        types = {f.name: f.type for f in fields(self)}
+        if not sep or key not in types:
+            raise ValueError(f"unknown mock option: {option!r}")
+        if key == "latency":
+            return replace(self, latency=Latency.parse(value))
+        cast = int if types[key] == "int" else float
+        return replace(self, **{key: cast(value)})
+
+
+@dataclass
+class MockProfile:
+    """Default faults plus per-route overrides."""
+
+    default: Faults = field(default_factory=Faults)
+    routes: Dict[str, Faults] = field(default_factory=dict)
+
+    def for_path(self, path: str) -> Faults:
+        return self.routes.get(path, self.default)
+
+    def override(self, spec: str) -> None:
+        """Apply ``/path:key=value[,key=value]`` on top of the current faults for ``path``."""
+
+        path, _, options = spec.partition(":")
+        if path not in ROUTES or not options:
+            raise ValueError(f"invalid route override: {spec!r}")
+        faults = self.for_path(path)
+        for option in options.split(","):
+            faults = faults.with_option(option)
+        self.routes[path] = faults
+
+
+def create_mock_app(profile: Optional[MockProfile] = None, seed: Optional[int] = None):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    from corealpha_adapter.providers.stub import StubProvider
+
+    profile = profile or MockProfile()
+    rng = random.Random(seed)
+    stub = StubProvider()
+    stats: Counter = Counter()
+
+    handlers: Dict[str, Callable] = {
+        "/summarize": stub.summarize,
+        "/sentiment": stub.sentiment,
+        "/vote": stub.vote,
+    }
+
+    async def _drip(body: bytes, chunks: int, interval: float):
+        size = max(1, math.ceil(len(body) / max(1, chunks)))
+        for start in range(0, len(body), size):
+            if start:
+                await asyncio.sleep(interval)
+            yield body[start : start + size]
+
+    def _endpoint(path: str):
+        async def handle(request) -> Response:
+            faults = profile.for_path(path)
+            await asyncio.sleep(faults.latency.sample(rng))
+            roll = rng.random()
+            if roll < faults.error_rate:
+                stats[f"{path} error"] += 1
+                return JSONResponse({"detail": "mock upstream error"}, status_code=503)
+            roll -= faults.error_rate
+            if roll < faults.timeout_rate:
+                stats[f"{path} timeout"] += 1
+                await asyncio.sleep(faults.hang_seconds)
+            payload = await request.json()
+            body = json.dumps(await handlers[path](payload)).encode()
+            if rng.random() < faults.drip_rate:
+                stats[f"{path} drip"] += 1
+                return StreamingResponse(
+                    _drip(body, faults.drip_chunks, faults.drip_interval),
+                    media_type="application/json",
+                )
+            stats[f"{path} ok"] += 1
+            return Response(body, media_type="application/json")
+
+        return handle
+
+    async def health(request) -> Response:
+        return JSONResponse({"status": "ok"})
+
+    async def mock_stats(request) -> Response:
+        return JSONResponse(dict(sorted(stats.items())))
+
+    routes = [Route(path, _endpoint(path), methods=["POST"]) for path in ROUTES]
+    routes += [Route("/health", health), Route("/_mock/stats", mock_stats)]
+    app = Starlette(routes=routes)
+    app.state.profile = profile
+    app.state.stats = stats
+    return app
+
+
+def build_profile(args: argparse.Namespace) -> MockProfile:
+    default = Faults(
+        latency=Latency.parse(args.latency),
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        drip_rate=args.drip_rate,
+        drip_chunks=args.drip_chunks,
+        drip_interval=args.drip_interval,
+    )
+    profile = MockProfile(default=default)
+    for spec in args.route:
+        profile.override(spec)
+    return profile
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--latency", default="fixed:0.05")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--drip-rate", type=float, default=0.0)
+    parser.add_argument("--drip-chunks", type=int, default=10)
+    parser.add_argument("--drip-interval", type=float, default=0.2)
+    parser.add_argument(
+        "--route",
+        action="append",
+        default=[],
+        metavar="PATH:KEY=VALUE[,…]",
+        help="per-route override, e.g. /vote:error_rate=0.3,latency=fixed:1",
+    )
+    args = parser.parse_args(argv)
+    try:
+        profile = build_profile(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    import uvicorn
+
+    app = create_mock_app(profile, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cold-start benchmark: import time, ``create_app()`` and the first request.
+
+Every run happens in a fresh interpreter, so module caches from a previous
+run cannot hide import cost::
+
+    python -m benchmarks.startup --runs 5
+    python -X importtime -c "import corealpha_adapter.app" 2>&1 | sort -t'|' -k2 -n | tail
+
+The printed numbers are medians in milliseconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+PHASES = ("import_ms", "create_app_ms", "first_request_ms")
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+from corealpha_adapter.app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    status = client.get("/health").status_code
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": status,
+}))
+"""
+
+
+def measure_once(env: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """Run one cold start in a subprocess and return its phase timings."""
+
+    child_env = dict(os.environ)
+    child_env.setdefault("LLM_PROVIDER", "stub")
+    child_env.setdefault("WARMUP_WATCHLIST", "")
+    child_env.update(env or {})
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=child_env,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    if result.pop("status") != 200:
+        raise RuntimeError("/health did not answer 200 on a cold start")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    for phase in PHASES:
+        print(f"{phase:<18} {statistics.median(r[phase] for r in runs):8.1f}")
+    total = statistics.median(sum(r[p] for p in PHASES) for r in runs)
+    print(f"{'total_ms':<18} {total:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Request-body validation cost at several batch sizes.
+
+Compares FastAPI's default path (``json.loads`` into a dict, then validate
+the dict) with the fast path used by ``FastModelRoute`` (``validate_json`` on
+the raw bytes through a precompiled ``TypeAdapter``)::
+
+    python -m benchmarks.validation
+    python -m benchmarks.validation --sizes 1,50,200 --number 200
+
+Times are microseconds per request body (best of ``--repeat``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from typing import Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from corealpha_adapter.schemas import SentimentRequest, VoteRequest
+
+TEXT = "  Record growth and strong margins; guidance raised after a beat on revenue.  "
+
+
+def sentiment_body(size: int) -> bytes:
+    return json.dumps({"ticker": "NVDA", "texts": [f"{TEXT}#{i}" for i in range(size)]}).encode()
+
+
+def vote_body(size: int) -> bytes:
+    proposals = [
+        {"agent": f"A{i}", "vote": ("BUY", "HOLD", "SELL")[i % 3], "weight": 0.2, "confidence": 0.6}
+        for i in range(size)
+    ]
+    return json.dumps({"proposals": proposals}).encode()
+
+
+CASES: Dict[str, tuple] = {
+    "sentiment": (SentimentRequest, sentiment_body),
+    "vote": (VoteRequest, vote_body),
+}
+
+
+def compare(model, body: bytes, number: int, repeat: int) -> Dict[str, float]:
+    """Best per-call time in microseconds for the dict path and the JSON path."""
+
+    python_adapter = TypeAdapter(model)
+    json_adapter = TypeAdapter(model)
+    runs: Dict[str, Callable[[], object]] = {
+        "dict": lambda: python_adapter.validate_python(json.loads(body)),
+        "json": lambda: json_adapter.validate_json(body),
+    }
+    return {
+        name: min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+        for name, func in runs.items()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,50,200")
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'model':<10} {'items':>5} {'bytes':>8} {'dict µs':>9} {'json µs':>9} {'speedup':>8}")
+    for name, (model, make_body) in CASES.items():
+        for size in (int(s) for s in args.sizes.split(",")):
+            body = make_body(size)
+            result = compare(model, body, args.number, args.repeat)
+            speedup = result["dict"] / result["json"]
+            print(
+                f"{name:<10} {size:>5} {len(body):>8} "
+                f"{result['dict']:>9.1f} {result['json']:>9.1f} {speedup:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,31 @@
-"""CoreAlpha FastAPI adapter package."""
+"""CoreAlpha FastAPI adapter package.
 
-from .app import app
+The app is built on demand: ``corealpha_adapter.app`` (the attribute, as
+before) and ``corealpha_adapter.app:app`` return the app built from the
+environment, ``create_app(settings)`` builds a new one. Importing the package
+itself stays cheap.
+"""
 
-__all__ = ["app"]
+import importlib
+import sys
+import types
+
+__all__ = ["app", "create_app"]
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importsystemet binder submodulen ``app`` här; attributet ska vara appen.
+        if name == "app" and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+def __getattr__(name: str):
+    if name in ("app", "create_app"):
+        appmod = importlib.import_module(".app", __name__)
+        return getattr(appmod, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+sys.modules[__name__].__class__ = _Package
@@ -1,12 +1,30 @@
-"""Module entry point for running the adapter via ``python -m``."""
+"""Module entry point: ``python -m corealpha_adapter [serve | batch …]``.
 
-from .app import app
+Without a subcommand (or with ``serve``) the API is served by uvicorn;
+``batch`` runs a JSONL request file offline (see ``corealpha_adapter.batch``).
+"""
 
-try:  # pragma: no cover - only executed when uvicorn is available
-    import uvicorn
-except ModuleNotFoundError:  # pragma: no cover
-    raise SystemExit("uvicorn måste vara installerat för att köra 'python -m corealpha_adapter'.")
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["batch"]:
+        from .batch import main as batch_main
+
+        return batch_main(argv[1:])
+
+    try:  # pragma: no cover - only executed when uvicorn is available
+        import uvicorn
+    except ModuleNotFoundError:  # pragma: no cover
+        raise SystemExit(
+            "uvicorn måste vara installerat för att köra 'python -m corealpha_adapter'."
+        )
+
+    uvicorn.run("corealpha_adapter.app:app", host="0.0.0.0", port=8000)
+    return 0
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    sys.exit(main())
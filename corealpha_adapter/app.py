@@ -1,119 +1,138 @@
-"""FastAPI application for the CoreAlpha adapter."""
+"""FastAPI application factory for the CoreAlpha adapter.
 
+``create_app(settings)`` builds a fully configured app; nothing is configured
+at import time. The module-level ``app`` used by ``uvicorn
+corealpha_adapter.app:app`` is built on first access from the environment.
+Provider, agent registry and voting engine are lazy singletons that the
+lifespan builds at startup, so the first request does not pay for them.
+"""
+
+import asyncio
+import math
 import os
-import time
-import uuid
-from typing import Set
+from contextlib import asynccontextmanager
+from typing import Optional, Set
 
 import structlog
-from fastapi import APIRouter, FastAPI, HTTPException, Request, status
+from fastapi import APIRouter, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 from secure import Secure
 from secure import headers as secure_headers
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.requests import Request as StarletteRequest
-from starlette.responses import Response
-
-ENV = os.getenv("ENV", "dev").lower()
-docs_url = None if ENV == "prod" else "/"
-redoc_url = None if ENV == "prod" else "/redoc"
-
-app = FastAPI(
-    title="CoreAlpha Adapter API (v1.1)",
-    version="0.1.1",
-    docs_url=docs_url,
-    redoc_url=redoc_url,
-    description="DI‑vänligt adapter‑API för FinGPT + Agents + VotingEngine.",
-)
-
-
-def _parse_env_set(value: str) -> Set[str]:
-    return {item.strip() for item in value.split(",") if item.strip()}
 
-
-# --- CORS ---
-origins = [
-    origin.strip() for origin in os.getenv("TRUSTED_ORIGINS", "").split(",") if origin.strip()
-]
-allow_credentials = os.getenv("ALLOW_CREDENTIALS", "false").lower() == "true"
-if origins:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=origins,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        allow_credentials=allow_credentials,
-    )
-else:
-    # Öppen CORS, men utan credentials för att undvika token/cookie-läckage
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_methods=["*"],
-        allow_headers=["*"],
-        allow_credentials=False,
-    )
-
-# --- Trusted hosts ---
-trusted_hosts = [h.strip() for h in os.getenv("TRUSTED_HOSTS", "").split(",") if h.strip()]
-if trusted_hosts:
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=trusted_hosts)
-
-# --- HTTPS redirect in prod ---
-if ENV == "prod":
-    app.add_middleware(HTTPSRedirectMiddleware)
-
-# --- Security headers ---
-_secure = Secure(
-    hsts=secure_headers.StrictTransportSecurity(),
-    xfo=secure_headers.XFrameOptions().deny(),
-    xxp=secure_headers.XXSSProtection().set("1; mode=block"),
-    content=secure_headers.XContentTypeOptions(),
-    referrer=secure_headers.ReferrerPolicy(),
+from .core.config import Settings
+from .dependencies import api_key_guard
+from .idempotency import IdempotencyStore
+from .middleware import (
+    AdmissionControlMiddleware,
+    BodySizeLimitMiddleware,
+    RateLimitMiddleware,
+    RequestIDMiddleware,
+    SecurityHeadersMiddleware,
+    build_security_headers,
+    parse_route_limits,
 )
-_CSP = os.getenv("CSP", "default-src 'self'")
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: StarletteRequest, call_next):
-        resp: Response = await call_next(request)
-        _secure.framework.fastapi(resp)
-        resp.headers.setdefault("Content-Security-Policy", _CSP)
-        return resp
-
-
-app.add_middleware(SecurityHeadersMiddleware)
-
-
-# --- Body size limit (ASGI nivå) ---
-
-
-class BodySizeLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_bytes: int):
-        super().__init__(app)
-        self.max_bytes = max_bytes
-
-    async def dispatch(self, request: Request, call_next):
-        mb = int(os.getenv("MAX_BODY_BYTES", str(self.max_bytes)))
-        body = await request.body()
-        if len(body) > mb:
-            return PlainTextResponse("Request entity too large", status_code=413)
-        request._body = body
-        return await call_next(request)
+from .observability.log_pipeline import AccessLogSampler, configure_logging, get_log_pipeline
+from .observability.loop_monitor import LoopLagMonitor
+from .observability.profiler import ProfilerTagMiddleware
+from .observability.tracing import Tracer
+from .ratelimit import Limiter, RateLimitExceeded, build_backend, get_remote_address
+from .response_cache import ResponseCache
+from .responses import FastJSONResponse
+from .schemas import MAX_TEXT_LEN
+from .services.decisions import DecisionStore
+from .services.llm_router import get_provider
+from .services.long_summary import LongSummarizer
+from .services.readiness import build_readiness
 
+log = structlog.get_logger()
 
-app.add_middleware(BodySizeLimitMiddleware, max_bytes=int(os.getenv("MAX_BODY_BYTES", "1048576")))
+# Strömmande endpoints läser bodyn rad för rad och har ingen total gräns;
+# MAX_BODY_BYTES_ROUTES lägger till (eller skriver över) gränser per prefix.
+STREAMING_BODY_ROUTES = {"/sentiment/stream": 0}
+
+
+def _fundamentals_generation() -> int:
+    from .services.fundamentals import get_fundamentals_store
+
+    store = get_fundamentals_store()
+    return store.generation if store is not None else 0
+
+
+async def _load_fundamentals() -> None:
+    """Compile/open the fundamentals snapshot in a thread, not in the first request."""
+
+    from .services.fundamentals import FundamentalsError, get_fundamentals_store
+
+    store = get_fundamentals_store()
+    if store is None:
+        return
+    try:
+        await asyncio.to_thread(store.refresh)
+    except (OSError, FundamentalsError) as exc:
+        # FundamentalAgent faller tillbaka på stub-värden tills filen rättas.
+        log.warning("fundamentals_load_failed", source=store.source, error=str(exc))
+
+
+async def _load_provider(provider) -> None:
+    """Let a provider read its data (e.g. the replay cassette) in a thread at startup."""
+
+    from .providers import ProviderError
+
+    load = getattr(provider, "load", None)
+    if load is None:
+        return
+    try:
+        await asyncio.to_thread(load)
+    except ProviderError as exc:
+        # Readiness rapporterar felet; requests får det som vanligt providerfel.
+        log.warning("provider_load_failed", error=str(exc))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .services.agents.registry import get_agent_registry
+    from .services.voting.factory import get_voting_engine
+    from .services.warmup import get_warmup_scheduler
+
+    state = app.state
+    # Bygg de lata singletonerna nu i stället för i första requesten.
+    provider = get_provider()
+    await _load_provider(provider)
+    get_agent_registry()
+    get_voting_engine()
+    await _load_fundamentals()
+    state.loop_monitor.start()
+    state.provider_probe.start()
+    scheduler = get_warmup_scheduler()
+    state.warmup = scheduler
+    if scheduler is not None:
+        scheduler.start()
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            await scheduler.stop()
+        await state.loop_monitor.stop()
+        await state.provider_probe.stop()
+        state.tracer.flush()
+        if state.decisions is not None:
+            state.decisions.close()
+        if state.fetcher is not None:
+            await state.fetcher.aclose()
+        close_provider = getattr(provider, "close", None)
+        if close_provider is not None:
+            # Tömmer kassettinspelningen och skriver gzip-trailern.
+            await asyncio.to_thread(close_provider)
+        get_log_pipeline().flush()
 
 
-# --- Rate limiting ---
+def _parse_env_set(value: str) -> Set[str]:
+    return {item.strip() for item in value.split(",") if item.strip()}
 
 
 def _rate_limit_key(request: StarletteRequest):
@@ -123,92 +142,241 @@ def _rate_limit_key(request: StarletteRequest):
     return get_remote_address(request)
 
 
-limiter = Limiter(
-    key_func=_rate_limit_key,
-    default_limits=[os.getenv("RATE_LIMIT", "60/minute")],
-)
-
-
-@app.exception_handler(RateLimitExceeded)
 def _rate_limit_handler(request, exc):
-    return PlainTextResponse("Too Many Requests", status_code=429)
+    retry_after = str(max(1, math.ceil(exc.retry_after)))
+    return PlainTextResponse(
+        "Too Many Requests", status_code=429, headers={"Retry-After": retry_after}
+    )
 
 
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+# --- Readiness (concurrent checks; provider probed in the background) ---
+ready_router = APIRouter()
 
 
-# --- Structured logging (JSON) ---
-structlog.configure(
-    processors=[
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.JSONRenderer(),
-    ],
-)
-log = structlog.get_logger()
+@ready_router.get("/readyz")
+async def readyz(request: Request):
+    ok, results = await request.app.state.readiness.run()
+    checks = {
+        name: {"ok": r.ok, "ms": r.ms, **({"detail": r.detail} if r.detail else {})}
+        for name, r in results.items()
+    }
+    return FastJSONResponse(
+        {"ok": ok, "checks": checks},
+        status_code=status.HTTP_200_OK if ok else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
 
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the adapter app; ``settings`` defaults to ``Settings()`` (env + ``.env``)."""
 
-# --- Request ID / Correlation ID ---
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        rid = request.headers.get("x-request-id") or str(uuid.uuid4())
-        start = time.time()
-        response: Response = await call_next(request)
-        dur_ms = int((time.time() - start) * 1000)
-        response.headers.setdefault("x-request-id", rid)
-        log.info(
-            "access",
-            method=request.method,
-            path=request.url.path,
-            status=response.status_code,
-            ms=dur_ms,
-            rid=rid,
+    settings = settings or Settings()
+    env = settings.env
+    app = FastAPI(
+        title="CoreAlpha Adapter API (v1.1)",
+        version="0.1.1",
+        docs_url=None if env == "prod" else "/",
+        redoc_url=None if env == "prod" else "/redoc",
+        description="DI‑vänligt adapter‑API för FinGPT + Agents + VotingEngine.",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+    app.state.settings = settings
+
+    # --- CORS ---
+    origins = [o.strip() for o in settings.TRUSTED_ORIGINS.split(",") if o.strip()]
+    if origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=origins,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            allow_credentials=settings.ALLOW_CREDENTIALS,
+        )
+    else:
+        # Öppen CORS, men utan credentials för att undvika token/cookie-läckage
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+            allow_credentials=False,
         )
-        return response
 
+    # --- Trusted hosts ---
+    trusted_hosts = [h.strip() for h in settings.TRUSTED_HOSTS.split(",") if h.strip()]
+    if trusted_hosts:
+        app.add_middleware(TrustedHostMiddleware, allowed_hosts=trusted_hosts)
+
+    # --- HTTPS redirect in prod ---
+    if env == "prod":
+        app.add_middleware(HTTPSRedirectMiddleware)
+
+    # --- Security headers ---
+    secure = Secure(
+        hsts=secure_headers.StrictTransportSecurity(),
+        xfo=secure_headers.XFrameOptions().deny(),
+        xxp=secure_headers.XXSSProtection().set("1; mode=block"),
+        content=secure_headers.XContentTypeOptions(),
+        referrer=secure_headers.ReferrerPolicy(),
+    )
+    # Headers beräknas en gång vid start i stället för per response.
+    forced, defaults = build_security_headers(secure, settings.CSP)
+    app.add_middleware(SecurityHeadersMiddleware, forced=forced, defaults=defaults)
+
+    # --- Body size limit (ASGI nivå) ---
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_bytes=settings.MAX_BODY_BYTES,
+        route_limits={
+            **STREAMING_BODY_ROUTES,
+            **parse_route_limits(settings.MAX_BODY_BYTES_ROUTES),
+        },
+    )
+
+    # --- Rate limiting ---
+    # Delad lagring (sqlite/redis) gör att gränsen gäller totalt, inte per worker.
+    limiter = Limiter(
+        key_func=_rate_limit_key,
+        backend=build_backend(settings.RATE_LIMIT_STORAGE),
+        default_limits=[settings.RATE_LIMIT],
+    )
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_handler)
+    app.state.limiter = limiter
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    # --- Event loop lag monitor + admission control (sheds before rate-limit lookups) ---
+    loop_monitor = LoopLagMonitor(
+        interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+        slow_callback=settings.LOOP_SLOW_CALLBACK_MS / 1000,
+        max_lag=settings.ADMISSION_MAX_LAG_MS / 1000,
+        sustain=settings.ADMISSION_SUSTAIN_TICKS,
+    )
+    app.state.loop_monitor = loop_monitor
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        monitor=loop_monitor,
+        retry_after=settings.ADMISSION_RETRY_AFTER,
+    )
+
+    # --- Structured logging (JSON, rendered off the event loop) ---
+    configure_logging()
+
+    # --- Profiler request tagging (no-op unless a path-filtered profile runs) ---
+    app.add_middleware(ProfilerTagMiddleware)
+
+    # --- Request ID / Correlation ID (+ sampled tracing) ---
+    tracer = Tracer.from_env()
+    app.state.tracer = tracer
+    app.add_middleware(RequestIDMiddleware, sampler=AccessLogSampler.from_env(), tracer=tracer)
+
+    # --- Prometheus metrics ---
+    Instrumentator().instrument(app).expose(app, endpoint="/metrics", tags=["metrics"])
+
+    # --- Readiness ---
+    readiness, provider_probe = build_readiness(
+        get_provider,
+        rate_limit_backend=limiter.backend,
+        loop_monitor=loop_monitor,
+        warmup=lambda: getattr(app.state, "warmup", None),
+        probe_interval=settings.READINESS_PROBE_SECONDS,
+        cache_seconds=settings.READINESS_CACHE_SECONDS,
+        require_warmup=settings.READINESS_REQUIRE_WARMUP,
+    )
+    app.state.readiness = readiness
+    app.state.provider_probe = provider_probe
+    app.include_router(ready_router, tags=["ready"])
+
+    # --- ETag response cache för @cache_response-routes ---
+    # Saltet byter ETags när version, provider eller röstningsmetod ändras,
+    # snapshot-generationen när fundamenta laddas om.
+    salt = f"{app.version}:{os.getenv('LLM_PROVIDER', 'stub')}:{settings.VOTING_METHOD.upper()}"
+    app.state.response_cache = (
+        ResponseCache(
+            settings.RESPONSE_CACHE_MAX_ENTRIES, salt=salt, versions=(_fundamentals_generation,)
+        )
+        if settings.RESPONSE_CACHE_MAX_ENTRIES > 0
+        else None
+    )
 
-app.add_middleware(RequestIDMiddleware)
+    # --- Idempotency-Key för provider-routes (@idempotent) ---
+    app.state.idempotency = (
+        IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_ENTRIES)
+        if settings.IDEMPOTENCY_MAX_ENTRIES > 0
+        else None
+    )
 
+    # --- Hämtning av url i /summarize (delad klient, gräns per värd) ---
+    app.state.fetcher = None
+    if settings.URL_FETCH_ENABLED:
+        # Importeras här: httpx/httpcore ska inte laddas av varje import av appen.
+        from .services.fetcher import UrlFetcher
+
+        app.state.fetcher = UrlFetcher(
+            timeout=settings.URL_FETCH_TIMEOUT_SECONDS,
+            max_bytes=settings.URL_FETCH_MAX_BYTES,
+            max_connections=settings.URL_FETCH_MAX_CONNECTIONS,
+            per_host=settings.URL_FETCH_PER_HOST,
+            cache_seconds=settings.URL_FETCH_CACHE_SECONDS,
+            cache_max_entries=settings.URL_FETCH_CACHE_MAX_ENTRIES,
+            allow_private=settings.URL_FETCH_ALLOW_PRIVATE,
+        )
 
-# --- Prometheus metrics ---
-Instrumentator().instrument(app).expose(app, endpoint="/metrics", tags=["metrics"])
+    # --- Map-reduce-sammanfattning av långa dokument (/summarize/long) ---
+    app.state.long_summarizer = LongSummarizer(
+        chunk_chars=min(settings.SUMMARIZE_CHUNK_CHARS, MAX_TEXT_LEN),
+        overlap_chars=settings.SUMMARIZE_CHUNK_OVERLAP,
+        concurrency=settings.SUMMARIZE_CONCURRENCY,
+        cache_max_entries=settings.SUMMARIZE_CHUNK_CACHE_ENTRIES,
+        salt=os.getenv("LLM_PROVIDER", "stub"),
+    )
 
+    # --- Beslutshistorik för /vote och /decisions (SQLite, skrivs i bakgrundstråd) ---
+    app.state.decisions = (
+        DecisionStore(
+            settings.DECISIONS_DB_PATH,
+            retention_days=settings.DECISIONS_RETENTION_DAYS,
+            batch_size=settings.DECISIONS_BATCH_SIZE,
+            maxsize=settings.DECISIONS_QUEUE_SIZE,
+            flush_interval=settings.DECISIONS_FLUSH_MS / 1000,
+        )
+        if settings.DECISIONS_DB_PATH
+        else None
+    )
 
-# --- Readiness ---
-ready_router = APIRouter()
+    # --- API-key auth (valfritt, aktiveras om API_KEYS inte är tom) ---
+    app.state.api_keys = _parse_env_set(settings.API_KEYS)
 
+    from .routers import admin, agent, decisions, health, sentiment, summarize, vote
 
-@ready_router.get("/readyz")
-def readyz():
-    checks = {
-        "fingpt": True,
-    }
-    ok = all(checks.values())
-    return {"ok": ok, "checks": checks}
+    app.include_router(health.router, tags=["health"])
+    app.include_router(summarize.router, tags=["summarize"])
+    app.include_router(sentiment.router, tags=["sentiment"])
+    app.include_router(agent.router, tags=["agent"])
+    app.include_router(vote.router, tags=["vote"])
+    app.include_router(decisions.router, tags=["decisions"])
+    app.include_router(admin.router, tags=["admin"], include_in_schema=env != "prod")
+    return app
 
 
-# expose readiness endpoint
-app.include_router(ready_router, tags=["ready"])
+_app: Optional[FastAPI] = None
 
-# --- API-key auth (valfritt, aktiveras om API_KEYS inte är tom) ---
-_API_KEYS = _parse_env_set(os.getenv("API_KEYS", ""))
 
+def get_app() -> FastAPI:
+    """Return the process-wide app built from the environment (created on first use)."""
 
-def api_key_guard(req: Request):
-    if not _API_KEYS:
-        return  # auth avstängd
-    key = req.headers.get("x-api-key")
-    if not key or key not in _API_KEYS:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
 
 
-from .routers import agent, health, sentiment, summarize, vote  # noqa: E402
+def __getattr__(name: str):
+    # Lat modulattribut: ``from corealpha_adapter.app import app`` bygger appen först här.
+    if name == "app":
+        return get_app()
+    if name == "limiter":
+        return get_app().state.limiter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app.include_router(health.router, tags=["health"])
-app.include_router(summarize.router, tags=["summarize"])
-app.include_router(sentiment.router, tags=["sentiment"])
-app.include_router(agent.router, tags=["agent"])
-app.include_router(vote.router, tags=["vote"])
 
-__all__ = ["app", "api_key_guard", "limiter"]
+__all__ = ["app", "api_key_guard", "create_app", "get_app", "limiter"]  # noqa: F822
@@ -0,0 +1,354 @@
+"""Offline bulk processing: ``python -m corealpha_adapter batch``.
+
+Runs a JSONL file of requests straight through the provider, the agent
+registry and the voting engine, without HTTP. One request per line::
+
+    {"id": "r1", "op": "sentiment", "ticker": "NVDA", "texts": ["strong growth"]}
+    {"id": "r2", "op": "propose", "ticker": "NVDA", "agent": "Macro"}
+    {"id": "r3", "op": "analyze", "ticker": "NVDA"}
+
+``op`` is ``summarize``, ``sentiment``, ``propose``, ``vote`` or ``analyze``
+(summarize → sentiment → agents → vote for one ticker); the other fields are
+the body of the matching endpoint. Results are written as JSONL in input
+order: ``{"line": 1, "id": "r1", "op": "sentiment", "ok": true, "result": …}``
+or ``{…, "ok": false, "error": "…"}``.
+
+Provider calls run on the event loop with ``--concurrency`` requests in
+flight. Agent proposals and votes are CPU-bound and run in a process pool
+with ``--workers`` > 0 (inline otherwise). Every ``--checkpoint-every``
+results the output is flushed and ``<output>.ckpt`` records how far it got;
+``--resume`` truncates the output to the last checkpoint and continues.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .schemas import (
+    MAX_TEXT_LEN,
+    AgentProposalRequest,
+    AnalyzeRequest,
+    SentimentRequest,
+    SummarizeRequest,
+    VoteRequest,
+)
+from .services.agents.registry import get_agent_registry
+from .services.fundamentals import FundamentalsError, get_fundamentals_store
+from .services.llm_router import get_provider
+from .services.voting.factory import get_voting_engine
+
+try:  # pragma: no cover - orjson is optional
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None
+
+OPS: Dict[str, type] = {
+    "summarize": SummarizeRequest,
+    "sentiment": SentimentRequest,
+    "propose": AgentProposalRequest,
+    "vote": VoteRequest,
+    "analyze": AnalyzeRequest,
+}
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# --- CPU-bound stages (module level so the process pool can pickle them) ---
+
+
+def load_fundamentals() -> None:
+    """Open the fundamentals snapshot up front; the CLI has no lifespan doing it."""
+
+    store = get_fundamentals_store()
+    if store is None:
+        return
+    try:
+        store.refresh()
+    except (OSError, FundamentalsError) as exc:
+        print(f"fundamentals: {exc} (stub values used)", file=sys.stderr)
+
+
+def propose_one(
+    agent: str, ticker: str, sentiment: Optional[float] = None, price: Optional[float] = None
+) -> Dict[str, Any]:
+    registry = get_agent_registry()
+    impl = registry.get(agent)
+    if impl is None:
+        raise LookupError(f"Agent '{agent}' ej registrerad")
+    return registry.propose(impl, ticker=ticker, sentiment=sentiment, price=price).model_dump()
+
+
+def vote_one(proposals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    req = VoteRequest.model_validate({"proposals": proposals})
+    return get_voting_engine().vote(req).model_dump()
+
+
+def decide(
+    ticker: str,
+    sentiment: Optional[float],
+    price: Optional[float] = None,
+    agents: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """All agents' proposals for ``ticker`` and the resulting vote."""
+
+    names = agents or get_agent_registry().names()
+    proposals = [propose_one(name, ticker, sentiment, price) for name in names]
+    keys = ("agent", "vote", "weight", "confidence")
+    vote = vote_one([{key: p[key] for key in keys} for p in proposals])
+    return {"proposals": proposals, "vote": vote}
+
+
+@dataclass
+class BatchStats:
+    processed: int = 0
+    ok: int = 0
+    errors: int = 0
+    resumed_from: int = 0
+    elapsed: float = 0.0
+    per_op: Dict[str, List[float]] = field(default_factory=dict)  # op -> [count, seconds]
+
+    def observe(self, op: str, ok: bool, seconds: float) -> None:
+        self.processed += 1
+        if ok:
+            self.ok += 1
+        else:
+            self.errors += 1
+        entry = self.per_op.setdefault(op, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"batch: {self.processed} requests in {self.elapsed:.2f}s "
+            f"({self.throughput:.1f} req/s), ok={self.ok} errors={self.errors} "
+            f"resumed_from_line={self.resumed_from}"
+        ]
+        for op, (count, seconds) in sorted(self.per_op.items()):
+            lines.append(f"  {op:<10} {count:>8}  mean {seconds / count * 1000:8.2f} ms")
+        return "\n".join(lines)
+
+
+class Checkpoint:
+    """``<output>.ckpt``: input lines consumed and output bytes written so far."""
+
+    def __init__(self, path: str, input_path: str) -> None:
+        self.path = path
+        self.input_path = input_path
+
+    def load(self) -> Tuple[int, int]:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return 0, 0
+        if data.get("input") != self.input_path:
+            raise SystemExit(f"checkpoint {self.path} belongs to {data.get('input')!r}")
+        return int(data["lines"]), int(data["output_bytes"])
+
+    def save(self, lines: int, output_bytes: int) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"input": self.input_path, "lines": lines, "output_bytes": output_bytes}, fh)
+        os.replace(tmp, self.path)
+
+
+class BatchRunner:
+    """Dispatches parsed requests with bounded concurrency, preserving input order."""
+
+    def __init__(self, provider=None, concurrency: int = 16, executor: Optional[Executor] = None):
+        self.provider = provider or get_provider()
+        self.concurrency = max(1, concurrency)
+        self.executor = executor
+        self.stats = BatchStats()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _cpu(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def handle(self, op: str, req: BaseModel) -> Any:
+        provider = self.provider
+        if op == "summarize":
+            return await provider.summarize(req.model_dump(exclude_none=True))
+        if op == "sentiment":
+            return await provider.sentiment(req.model_dump(exclude_none=True))
+        if op == "propose":
+            return await self._cpu(propose_one, req.agent, req.ticker, req.sentiment, req.price)
+        if op == "vote":
+            return await self._cpu(vote_one, [p.model_dump() for p in req.proposals])
+
+        summary_req = SummarizeRequest(ticker=req.ticker, url=req.url, text=req.text)
+        summary = await provider.summarize(summary_req.model_dump(exclude_none=True))
+        text = str(summary.get("summary", "")) if isinstance(summary, dict) else str(summary)
+        score = 0.0
+        if text.strip():
+            sentiment_req = SentimentRequest(ticker=req.ticker, texts=[text[:MAX_TEXT_LEN]])
+            result = await provider.sentiment(sentiment_req.model_dump(exclude_none=True))
+            if isinstance(result, dict):
+                score = round(float(result.get("score", 0.0)), 3)
+        decision = await self._cpu(decide, req.ticker, score, req.price, req.agents)
+        return {"summary": summary, "sentiment": score, **decision}
+
+    async def process(self, lineno: int, raw: str) -> bytes:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        row: Dict[str, Any] = {"line": lineno}
+        op = "invalid"
+        started = time.perf_counter()
+        async with self._semaphore:
+            try:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    raise ValueError("request must be a JSON object")
+                if data.get("id") is not None:
+                    row["id"] = data["id"]
+                schema = OPS.get(data.get("op"))
+                if schema is None:
+                    raise ValueError(f"unknown op {data.get('op')!r}, expected one of {list(OPS)}")
+                op = row["op"] = data["op"]
+                body = {k: v for k, v in data.items() if k not in ("id", "op")}
+                row["result"] = await self.handle(op, schema.model_validate(body))
+                row["ok"] = True
+            except Exception as exc:  # noqa: BLE001 - one bad request must not stop the batch
+                row.pop("result", None)
+                row["ok"] = False
+                row["error"] = f"{type(exc).__name__}: {exc}"
+        self.stats.observe(op, row["ok"], time.perf_counter() - started)
+        return _dumps(row)
+
+    async def run(
+        self,
+        lines: Iterable[str],
+        out: IO[bytes],
+        skip: int = 0,
+        checkpoint: Optional[Checkpoint] = None,
+        checkpoint_every: int = 100,
+    ) -> BatchStats:
+        """Process ``lines`` (skipping the first ``skip``) and write results to ``out``."""
+
+        started = time.perf_counter()
+        self.stats.resumed_from = skip
+        # Fönster av tasks i input-ordning; huvudet skrivs när det är klart.
+        window: Deque[Tuple[int, asyncio.Task]] = deque()
+        consumed = skip
+        since_checkpoint = 0
+
+        async def write_head() -> None:
+            nonlocal consumed, since_checkpoint
+            lineno, task = window.popleft()
+            out.write(await task)
+            consumed = lineno
+            since_checkpoint += 1
+            if checkpoint is not None and since_checkpoint >= checkpoint_every:
+                _sync(out)
+                checkpoint.save(consumed, out.tell())
+                since_checkpoint = 0
+
+        try:
+            lineno = 0
+            for lineno, raw in enumerate(lines, 1):
+                if lineno <= skip or not raw.strip():
+                    continue
+                task = asyncio.ensure_future(self.process(lineno, raw))
+                window.append((lineno, task))
+                if len(window) >= 2 * self.concurrency:
+                    await write_head()
+            while window:
+                await write_head()
+            consumed = max(consumed, lineno)
+        finally:
+            for _, task in window:
+                task.cancel()
+            self.stats.elapsed = time.perf_counter() - started
+        if checkpoint is not None:
+            _sync(out)
+            checkpoint.save(consumed, out.tell())
+        return self.stats
+
+
+def _sync(out: IO[bytes]) -> None:
+    out.flush()
+    try:
+        os.fsync(out.fileno())
+    except (AttributeError, OSError, ValueError):  # pragma: no cover - pipes, BytesIO
+        pass
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 16,
+    workers: int = 0,
+    checkpoint_every: int = 100,
+    resume: bool = False,
+    provider=None,
+) -> BatchStats:
+    checkpoint = Checkpoint(f"{output_path}.ckpt", os.path.abspath(input_path))
+    load_fundamentals()
+    skip, offset = checkpoint.load() if resume else (0, 0)
+    executor = None
+    if workers > 0:
+        # spawn: inga ärvda trådar/lås från logg-pipelinen i barnprocesserna.
+        executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_fundamentals,
+        )
+    try:
+        with (
+            open(input_path, encoding="utf-8") as src,
+            open(output_path, "r+b" if resume and os.path.exists(output_path) else "wb") as out,
+        ):
+            # Allt efter senaste checkpoint skrivs om.
+            out.truncate(offset)
+            out.seek(offset)
+            runner = BatchRunner(provider, concurrency=concurrency, executor=executor)
+            return asyncio.run(runner.run(src, out, skip, checkpoint, checkpoint_every))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m corealpha_adapter batch", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("input", help="JSONL file with one request per line")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file for the results")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--workers", type=int, default=0, help="processes for agents/votes")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.ckpt")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        checkpoint_every=max(1, args.checkpoint_every),
+        resume=args.resume,
+    )
+    print(stats.summary(), file=sys.stderr)
+    return 1 if stats.errors else 0
@@ -0,0 +1,142 @@
+"""Bounded queue plus one daemon writer thread, shared by logs, cassettes and decisions.
+
+Producers call :meth:`BackgroundWriter.submit` from any task or thread; it
+never blocks. The writer thread takes up to ``batch_size`` items at a time and
+hands them to ``write_batch``, so file, gzip and SQLite work stays off the
+event loop. A full queue drops the item; a batch whose ``write_batch`` raises
+is dropped as a whole. Both are counted in ``dropped`` and reported to
+``on_drop``.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """One daemon thread draining a bounded queue into ``write_batch``.
+
+    With ``maintenance`` set, the thread also calls it every
+    ``maintenance_interval`` seconds (and on start), waking up at least every
+    ``poll_interval`` seconds to check.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any]], None],
+        name: str,
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+        on_drop: Optional[Callable[[int], None]] = None,
+        maintenance: Optional[Callable[[], None]] = None,
+        maintenance_interval: float = 3600.0,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.name = name
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._write_batch = write_batch
+        self._on_drop = on_drop
+        self._maintenance = maintenance
+        self._maintenance_interval = maintenance_interval
+        self._poll_interval = poll_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> bool:
+        """Start the writer thread unless it runs; ``True`` when this call started it."""
+
+        if self.running:
+            return False
+        with self._lock:
+            if self.running:
+                return False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            return True
+
+    def submit(self, item: Any) -> bool:
+        """Queue ``item`` without blocking; ``False`` when it was dropped."""
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.drop(1)
+            return False
+        return True
+
+    def drop(self, count: int) -> None:
+        self.dropped += count
+        if self._on_drop is not None:
+            self._on_drop(count)
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until every queued item has been written (``True`` on success)."""
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or self._thread is None:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 2.0) -> bool:
+        """Drain the queue and stop the thread; ``False`` if it is still running."""
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return False
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _run(self) -> None:
+        q = self._queue
+        wait = self._poll_interval if self._maintenance is not None else None
+        next_maintenance = time.monotonic()
+        while True:
+            if self._maintenance is not None and time.monotonic() >= next_maintenance:
+                try:
+                    self._maintenance()
+                except Exception:  # noqa: BLE001 - underhåll får inte stoppa skrivningen
+                    pass
+                next_maintenance = time.monotonic() + self._maintenance_interval
+            try:
+                batch: List[Any] = [q.get(timeout=wait)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            items = [item for item in batch if item is not _STOP]
+            try:
+                if items:
+                    self._write_batch(items)
+            except Exception:  # noqa: BLE001 - en trasig batch får inte döda skrivaren
+                self.drop(len(items))
+            finally:
+                for _ in batch:
+                    q.task_done()
+            if stop:
+                return
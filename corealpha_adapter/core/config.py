@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -13,8 +15,72 @@ class Settings(BaseSettings):
     USE_STUB_AGENTS: bool = Field(default=True)
     VOTING_METHOD: str = Field(default="WSUM")
 
+    # --- HTTP app (read by ``create_app``) ---
+    TRUSTED_ORIGINS: str = Field(default="")
+    ALLOW_CREDENTIALS: bool = Field(default=False)
+    TRUSTED_HOSTS: str = Field(default="")
+    CSP: str = Field(default="default-src 'self'")
+    API_KEYS: str = Field(default="")
+    MAX_BODY_BYTES: int = Field(default=1048576)
+    # Läggs till app.STREAMING_BODY_ROUTES (``/sentiment/stream`` har ingen total gräns).
+    MAX_BODY_BYTES_ROUTES: str = Field(default="")
+    RATE_LIMIT: str = Field(default="60/minute")
+    RATE_LIMIT_STORAGE: str = Field(default="memory://")
+    LOOP_MONITOR_INTERVAL_MS: float = Field(default=100)
+    LOOP_SLOW_CALLBACK_MS: float = Field(default=250)
+    ADMISSION_MAX_LAG_MS: float = Field(default=0)
+    ADMISSION_SUSTAIN_TICKS: int = Field(default=3)
+    ADMISSION_RETRY_AFTER: int = Field(default=1)
+    READINESS_PROBE_SECONDS: float = Field(default=15)
+    READINESS_CACHE_SECONDS: float = Field(default=1)
+    READINESS_REQUIRE_WARMUP: bool = Field(default=True)
+    ADMIN_API_KEY: str = Field(default="")
+    PROFILER_ENABLED: Optional[bool] = Field(default=None)
+    PROFILER_MAX_SECONDS: float = Field(default=60)
+    JSON_BODY_FAST_PATH: bool = Field(default=True)
+    SENTIMENT_STREAM_CHUNK: int = Field(default=64)
+    # Svar från @cache_response-routes; 0 stänger av ETag-cachen.
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1024)
+    IDEMPOTENCY_TTL_SECONDS: float = Field(default=3600)
+    # 0 stänger av Idempotency-Key (headern ignoreras).
+    IDEMPOTENCY_MAX_ENTRIES: int = Field(default=10000)
+    # Hämtning av SummarizeRequest.url; texten skickas till providern.
+    URL_FETCH_ENABLED: bool = Field(default=True)
+    URL_FETCH_TIMEOUT_SECONDS: float = Field(default=10)
+    URL_FETCH_MAX_BYTES: int = Field(default=2_000_000)
+    URL_FETCH_MAX_CONNECTIONS: int = Field(default=50)
+    URL_FETCH_PER_HOST: int = Field(default=4)
+    URL_FETCH_CACHE_SECONDS: float = Field(default=300)
+    URL_FETCH_CACHE_MAX_ENTRIES: int = Field(default=256)
+    URL_FETCH_ALLOW_PRIVATE: bool = Field(default=False)
+    # /summarize/long: chunkstorlek (högst MAX_TEXT_LEN), överlapp och parallella anrop.
+    SUMMARIZE_CHUNK_CHARS: int = Field(default=4000)
+    SUMMARIZE_CHUNK_OVERLAP: int = Field(default=300)
+    SUMMARIZE_CONCURRENCY: int = Field(default=4)
+    SUMMARIZE_CHUNK_CACHE_ENTRIES: int = Field(default=4096)
+    # Beslutshistorik för /vote (SQLite, WAL); tom sökväg stänger av /decisions.
+    DECISIONS_DB_PATH: str = Field(default="")
+    DECISIONS_RETENTION_DAYS: float = Field(default=90)
+    DECISIONS_BATCH_SIZE: int = Field(default=256)
+    DECISIONS_FLUSH_MS: float = Field(default=500)
+    DECISIONS_QUEUE_SIZE: int = Field(default=10000)
+
     class Config:
         env_file = ".env"
+        # .env innehåller även variabler som läses direkt av andra moduler.
+        extra = "ignore"
+
+    @property
+    def env(self) -> str:
+        return self.ENV.lower()
+
+    @property
+    def profiler_enabled(self) -> bool:
+        """Explicit ``PROFILER_ENABLED`` wins; otherwise on everywhere except prod."""
+
+        if self.PROFILER_ENABLED is not None:
+            return self.PROFILER_ENABLED
+        return self.env != "prod"
 
 
 settings = Settings()
@@ -0,0 +1,27 @@
+"""Request dependencies shared by the routers.
+
+They read their configuration from ``request.app.state`` (set by
+``create_app``), so routers can be imported without building an app.
+"""
+
+import hashlib
+
+from fastapi import HTTPException, Request, status
+
+
+def api_key_guard(req: Request):
+    keys = getattr(req.app.state, "api_keys", None)
+    if not keys:
+        return  # auth avstängd
+    key = req.headers.get("x-api-key")
+    if not key or key not in keys:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+
+
+def principal(req: Request) -> str:
+    """Short hash of the caller's API key ("" with auth off), to scope per-caller state."""
+
+    if not getattr(req.app.state, "api_keys", None):
+        return ""
+    key = req.headers.get("x-api-key", "")
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
@@ -0,0 +1,185 @@
+"""``Idempotency-Key`` support for provider-backed POST endpoints.
+
+``@idempotent()`` marks an endpoint; ``FastModelRoute`` then treats requests
+carrying an ``Idempotency-Key`` header as follows:
+
+* The first request with a key runs the endpoint in its own task, so the
+  execution finishes (and is stored) even if that client gives up.
+* A repeat with the same key and the same body bytes attaches to the running
+  execution, or gets the stored response once it has finished. Replays carry
+  ``Idempotent-Replayed: true``.
+* A repeat with a different body is rejected with 422.
+
+Responses below 500 are kept for ``IDEMPOTENCY_TTL_SECONDS`` in a store
+bounded by ``IDEMPOTENCY_MAX_ENTRIES``. Errors raised by the endpoint and 5xx
+responses are shared with requests already attached, but not stored, so a
+later retry runs again. Keys are scoped per route and API key.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .dependencies import principal
+from .observability.metrics import IDEMPOTENCY_CONFLICTS, IDEMPOTENCY_SAVED
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+
+def idempotent():
+    """Mark an endpoint as accepting ``Idempotency-Key``; place it below ``@router.post``.
+
+    TTL and store size are per app (``IDEMPOTENCY_*`` settings).
+    """
+
+    def decorator(func):
+        func.__idempotent__ = True
+        return func
+
+    return decorator
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+    raw_headers: List[Tuple[bytes, bytes]]
+
+
+@dataclass
+class Execution:
+    fingerprint: str
+    task: "asyncio.Task"
+    expires_at: float = float("inf")  # löper först när exekveringen är klar
+    response: Optional[StoredResponse] = None
+
+
+class IdempotencyStore:
+    """Executions by scoped key: running ones and finished responses with a TTL."""
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Execution]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Execution]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= (time.monotonic() if now is None else now):
+            del self._entries[key]
+            return None
+        return entry
+
+    def begin(self, key: str, execution: Execution) -> None:
+        while self._entries and len(self._entries) >= self.max_entries:
+            # Äldsta först; en pågående exekvering körs klart men dedupliceras inte längre.
+            self._entries.popitem(last=False)
+        self._entries[key] = execution
+
+    def finish(self, key: str, execution: Execution, response: Optional[StoredResponse]) -> None:
+        if self._entries.get(key) is not execution:
+            return  # redan utträngd
+        if response is None:
+            del self._entries[key]
+            return
+        execution.response = response
+        execution.expires_at = time.monotonic() + self.ttl
+
+
+def conflict(route: str) -> None:
+    IDEMPOTENCY_CONFLICTS.labels(route=route).inc()
+
+
+def saved(route: str, source: str) -> None:
+    IDEMPOTENCY_SAVED.labels(route=route, source=source).inc()
+
+
+def _stored(response: Response) -> Optional[StoredResponse]:
+    body = getattr(response, "body", None)
+    if response.status_code >= 500 or not isinstance(body, bytes):
+        return None
+    return StoredResponse(response.status_code, body, list(response.raw_headers))
+
+
+def _replay(stored: StoredResponse) -> Response:
+    response = Response(status_code=stored.status_code)
+    response.body = stored.body
+    response.raw_headers = [*stored.raw_headers, REPLAYED_HEADER]
+    return response
+
+
+def _consume_result(task: "asyncio.Task") -> None:
+    # Fel hämtas av de som väntar; utan väntare ska asyncio inte logga dem som glömda.
+    if not task.cancelled():
+        task.exception()
+
+
+def idempotent_handler(
+    handler: Callable[[Request], Awaitable[Response]],
+    path: str,
+    rate_check: Optional[Callable] = None,
+) -> Callable[[Request], Awaitable[Response]]:
+    """Wrap a route handler so requests with an ``Idempotency-Key`` are deduplicated."""
+
+    async def respond(request: Request) -> Response:
+        store: Optional[IdempotencyStore] = getattr(request.app.state, "idempotency", None)
+        if store is None or "idempotency-key" not in request.headers:
+            return await handler(request)
+        key = request.headers["idempotency-key"]
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+            )
+        body = await request.body()
+        fingerprint = hashlib.blake2b(body, digest_size=16).hexdigest()
+        scoped = f"{path}:{principal(request)}:{key}"
+
+        execution = store.get(scoped)
+        if execution is not None:
+            if execution.fingerprint != fingerprint:
+                conflict(path)
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                    detail="Idempotency-Key was already used with a different request body",
+                )
+            if rate_check is not None:
+                await rate_check(request)
+            if execution.response is not None:
+                saved(path, "stored")
+                return _replay(execution.response)
+            response = await asyncio.shield(execution.task)
+            stored = _stored(response)
+            if stored is None:
+                return await handler(request)  # t.ex. strömmande svar som inte kan delas
+            saved(path, "inflight")
+            return _replay(stored)
+
+        async def execute() -> Response:
+            stored = None
+            try:
+                response = await handler(request)
+                stored = _stored(response)
+                return response
+            finally:
+                store.finish(scoped, execution, stored)
+
+        # Egen task: exekveringen slutförs och sparas även om klienten kopplar ner.
+        execution = Execution(fingerprint, asyncio.ensure_future(execute()))
+        execution.task.add_done_callback(_consume_result)
+        store.begin(scoped, execution)
+        return await asyncio.shield(execution.task)
+
+    return respond
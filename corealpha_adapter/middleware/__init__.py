@@ -0,0 +1,17 @@
+"""Pure ASGI middlewares used by the CoreAlpha adapter."""
+
+from .admission import AdmissionControlMiddleware
+from .body_limit import BodySizeLimitMiddleware, parse_route_limits
+from .rate_limit import RateLimitMiddleware
+from .request_id import RequestIDMiddleware
+from .security import SecurityHeadersMiddleware, build_security_headers
+
+__all__ = [
+    "AdmissionControlMiddleware",
+    "BodySizeLimitMiddleware",
+    "RateLimitMiddleware",
+    "RequestIDMiddleware",
+    "SecurityHeadersMiddleware",
+    "build_security_headers",
+    "parse_route_limits",
+]
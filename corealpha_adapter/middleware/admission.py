@@ -0,0 +1,51 @@
+"""Lag-based admission control: shed new requests while the event loop is overloaded."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..observability.metrics import ADMISSION_SHED
+
+_BODY = b"Service overloaded"
+DEFAULT_EXEMPT_PATHS = ("/health", "/healthz", "/readyz", "/metrics", "/admin")
+
+
+class AdmissionControlMiddleware:
+    """Answer 503 + ``Retry-After`` while ``monitor.overloaded`` is true.
+
+    Paths equal to or under ``exempt_paths`` (probes, metrics, admin) are always
+    admitted so orchestration and diagnosis keep working under overload.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        monitor,
+        retry_after: int = 1,
+        exempt_paths: Iterable[str] = DEFAULT_EXEMPT_PATHS,
+    ) -> None:
+        self.app = app
+        self.monitor = monitor
+        self.exempt_paths = tuple(p.rstrip("/") for p in exempt_paths)
+        self._start = {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(_BODY)).encode()),
+                (b"retry-after", str(max(1, retry_after)).encode()),
+            ],
+        }
+
+    def _exempt(self, path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in self.exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.monitor.overloaded or self._exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        ADMISSION_SHED.inc()
+        await send(self._start)
+        await send({"type": "http.response.body", "body": _BODY})
@@ -0,0 +1,118 @@
+"""Request body size limit enforced while the body streams in (ASGI level)."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_TOO_LARGE_BODY = b"Request entity too large"
+_TOO_LARGE_START: Message = {
+    "type": "http.response.start",
+    "status": 413,
+    "headers": [
+        (b"content-type", b"text/plain; charset=utf-8"),
+        (b"content-length", str(len(_TOO_LARGE_BODY)).encode()),
+        (b"connection", b"close"),
+    ],
+}
+
+
+def parse_route_limits(value: str) -> Dict[str, int]:
+    """Parse ``"/batch=10485760,/sentiment/stream=0"`` into a prefix → bytes mapping."""
+
+    limits: Dict[str, int] = {}
+    for item in value.split(","):
+        prefix, sep, raw = item.strip().partition("=")
+        if sep and prefix.strip():
+            limits[prefix.strip().rstrip("/") or "/"] = int(raw)
+    return limits
+
+
+class BodySizeLimitMiddleware:
+    """Reject bodies above ``max_bytes`` without buffering them.
+
+    A ``Content-Length`` above the limit is rejected before the app runs. When
+    the length is declared and within the limit the server already enforces
+    the framing, so ``receive`` is passed through untouched; only chunked
+    bodies are counted chunk by chunk. ``route_limits`` overrides the limit
+    for path prefixes (longest prefix wins, ``<= 0`` disables the limit).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_bytes: int,
+        route_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.route_limits: List[Tuple[str, int]] = sorted(
+            (route_limits or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.route_limits:
+            if path == prefix or path.startswith(prefix + "/") or prefix == "/":
+                return limit if limit > 0 else None
+        return self.max_bytes if self.max_bytes > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    await _reject(send)
+                    return
+                await self.app(scope, receive, send)
+                return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Appen ser en frånkoppling; svaret ersätts med 413 nedan.
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if exceeded and not started:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, send_wrapper)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await _reject(send)
+
+
+async def _reject(send: Send) -> None:
+    await send(_TOO_LARGE_START)
+    await send({"type": "http.response.body", "body": _TOO_LARGE_BODY})
@@ -0,0 +1,79 @@
+"""Global (default) rate limit applied before routing."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_BODY = b"Too Many Requests"
+
+
+class RateLimitMiddleware:
+    """Applies ``limiter.default_limits`` to every route without its own ``@limiter.limit``.
+
+    Each route gets its own default bucket per client.
+    """
+
+    def __init__(self, app: ASGIApp, limiter) -> None:
+        self.app = app
+        self.limiter = limiter
+        self._static: Optional[Dict[str, bool]] = None
+        self._dynamic: List[Tuple[BaseRoute, bool]] = []
+
+    def _index(self, app) -> Dict[str, bool]:
+        static: Dict[str, bool] = {}
+        for route in getattr(app, "routes", ()):
+            path = getattr(route, "path", None)
+            if path is None:
+                continue
+            limited = getattr(getattr(route, "endpoint", None), "__rate_limited__", False)
+            if "{" in path:
+                self._dynamic.append((route, limited))
+            else:
+                static[path] = static.get(path, False) or limited
+        return static
+
+    def _endpoint(self, scope: Scope) -> Optional[str]:
+        """Route path scoping the default bucket; ``None`` for routes with their own limit."""
+
+        if self._static is None:
+            self._static = self._index(scope.get("app"))
+        path = scope["path"]
+        limited = self._static.get(path)
+        if limited is not None:
+            return None if limited else path
+        for route, limited in self._dynamic:
+            if route.matches(scope)[0] != Match.NONE:
+                return None if limited else route.path
+        return path  # ingen route (404): egen hink per sökväg
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+        endpoint = self._endpoint(scope)
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.limiter.check_default(Request(scope), endpoint)
+        if decision is None:
+            await self.app(scope, receive, send)
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(_BODY)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _BODY})
@@ -0,0 +1,75 @@
+"""Request ID propagation, JSON access logging and per-request tracing."""
+
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Optional
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..observability.log_pipeline import AccessLogSampler
+from ..observability.tracing import Tracer
+
+log = structlog.get_logger()
+
+
+class RequestIDMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        sampler: Optional[AccessLogSampler] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        self.app = app
+        self.sampler = sampler
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                rid = value.decode("latin-1")
+                break
+        rid = rid or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = rid
+        start = time.time()
+        status_code = 500
+        trace = self.tracer.begin(rid) if self.tracer is not None else None
+        server_timing = trace is not None and self.tracer.server_timing
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                if not any(name == b"x-request-id" for name, _ in headers):
+                    headers.append((b"x-request-id", rid.encode("latin-1")))
+                if server_timing:
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            dur_ms = int((time.time() - start) * 1000)
+            if trace is not None:
+                trace.attrs.update(
+                    method=scope["method"], path=scope["path"], status=status_code, ms=dur_ms
+                )
+                self.tracer.end(trace)
+            if self.sampler is None or self.sampler.should_log(status_code, dur_ms):
+                log.info(
+                    "access",
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status_code,
+                    ms=dur_ms,
+                    rid=rid,
+                )
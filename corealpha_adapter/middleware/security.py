@@ -0,0 +1,52 @@
+"""Security headers applied to every HTTP response."""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+_ROUTE_OVERRIDABLE = {b"cache-control"}
+
+
+def build_security_headers(secure, csp: str) -> Tuple[RawHeaders, RawHeaders]:
+    """Precompute ``(forced, defaults)`` raw header lists once at startup.
+
+    ``forced`` headers overwrite whatever the route set (like
+    ``secure.framework.fastapi``); ``defaults`` are only added when missing.
+    ``Cache-Control`` is a default, so routes with an explicit cache policy
+    (``@cache_response``) keep it and everything else stays ``no-store``.
+    """
+
+    forced: RawHeaders = []
+    defaults = [(b"content-security-policy", csp.encode("latin-1"))]
+    for key, value in secure.headers().items():
+        header = (key.lower().encode("latin-1"), value.encode("latin-1"))
+        (defaults if header[0] in _ROUTE_OVERRIDABLE else forced).append(header)
+    return forced, defaults
+
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app: ASGIApp, forced: RawHeaders, defaults: RawHeaders) -> None:
+        self.app = app
+        self.forced = forced
+        self.defaults = defaults
+        self._forced_names = {name for name, _ in forced}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [h for h in message.get("headers", ()) if h[0] not in self._forced_names]
+                present = {name for name, _ in headers}
+                headers.extend(self.forced)
+                headers.extend(h for h in self.defaults if h[0] not in present)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1 @@
+"""Observability helpers (metrics, logging, tracing) for the CoreAlpha adapter."""
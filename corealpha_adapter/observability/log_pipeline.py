@@ -0,0 +1,164 @@
+"""Non-blocking structured logging.
+
+Callers only run the cheap structlog processors (level, raw timestamp,
+exception formatting) and push the event dict onto a bounded queue. A daemon
+thread renders JSON and writes batches to the stream, so a slow log collector
+never stalls the event loop. When the queue is full the record is dropped and
+counted in ``corealpha_log_records_dropped_total``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TextIO
+
+import structlog
+
+from ..core.background import BackgroundWriter
+from .metrics import LOG_DROPPED, LOG_QUEUE_DEPTH, LOG_SAMPLED_OUT
+
+
+class LogPipeline:
+    """Renders and writes records on a :class:`BackgroundWriter` thread."""
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+        self._renderer = structlog.processors.JSONRenderer()
+        self._writer = BackgroundWriter(
+            self._write_records,
+            name="log-writer",
+            maxsize=maxsize,
+            batch_size=batch_size,
+            on_drop=LOG_DROPPED.inc,
+        )
+
+    @property
+    def dropped(self) -> int:
+        return self._writer.dropped
+
+    def start(self) -> None:
+        self._writer.start()
+
+    def submit(self, event_dict: Dict[str, Any]) -> None:
+        self._writer.submit(event_dict)
+
+    def qsize(self) -> int:
+        return self._writer.qsize()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until every queued record has been written (``True`` on success)."""
+
+        return self._writer.flush(timeout)
+
+    def close(self, timeout: float = 2.0) -> None:
+        self._writer.close(timeout)
+
+    def render(self, event_dict: Dict[str, Any]) -> str:
+        ts = event_dict.pop("_ts", None)
+        if ts is not None:
+            stamp = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+            event_dict["timestamp"] = stamp.replace("+00:00", "Z")
+        return self._renderer(None, "", event_dict)
+
+    def _write_records(self, batch: List[Dict[str, Any]]) -> None:
+        lines = []
+        for item in batch:
+            try:
+                lines.append(self.render(item))
+            except Exception:  # noqa: BLE001 - a bad record must not kill the writer
+                self._writer.drop(1)
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+
+class QueueLogger:
+    """structlog logger whose every method hands the event dict to the pipeline."""
+
+    def __init__(self, pipeline: LogPipeline) -> None:
+        self._pipeline = pipeline
+
+    def msg(self, event_dict: Dict[str, Any]) -> None:
+        self._pipeline.submit(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = fatal = log = msg
+
+
+def _add_raw_timestamp(logger, method_name, event_dict):
+    # ISO-formateringen görs i skrivartråden; här sparas bara epoch-tiden.
+    event_dict["_ts"] = time.time()
+    return event_dict
+
+
+def _to_queue_logger(logger, method_name, event_dict):
+    return (event_dict,), {}
+
+
+class AccessLogSampler:
+    """Decides which access records to keep.
+
+    Responses with ``status >= always_status`` and responses slower than
+    ``slow_ms`` are always logged; the rest are kept with probability
+    ``sample_rate``.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, slow_ms: int = 1000, always_status: int = 400):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.slow_ms = slow_ms
+        self.always_status = always_status
+
+    def should_log(self, status: int, ms: int) -> bool:
+        if status >= self.always_status or ms >= self.slow_ms:
+            return True
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            return True
+        LOG_SAMPLED_OUT.inc()
+        return False
+
+    @classmethod
+    def from_env(cls) -> "AccessLogSampler":
+        return cls(
+            sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0")),
+            slow_ms=int(os.getenv("ACCESS_LOG_SLOW_MS", "1000")),
+            always_status=int(os.getenv("ACCESS_LOG_ALWAYS_STATUS", "400")),
+        )
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        LOG_QUEUE_DEPTH.set_function(_pipeline.qsize)
+        atexit.register(_pipeline.close)
+    return _pipeline
+
+
+def configure_logging(pipeline: Optional[LogPipeline] = None) -> LogPipeline:
+    """Route structlog through the queue pipeline (idempotent)."""
+
+    pipeline = pipeline or get_log_pipeline()
+    pipeline.start()
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            _add_raw_timestamp,
+            structlog.processors.format_exc_info,
+            _to_queue_logger,
+        ],
+        logger_factory=lambda *args: QueueLogger(pipeline),
+        cache_logger_on_first_use=True,
+    )
+    return pipeline
@@ -0,0 +1,121 @@
+"""Event loop lag monitoring.
+
+A small task sleeps for ``interval`` seconds in a loop; how late each wake-up
+is, is the time the loop spent running other callbacks (the lag). Every tick
+also refreshes a heartbeat. A watchdog thread checks that heartbeat and, when
+the loop has been blocked longer than ``slow_callback`` seconds, logs the loop
+thread's current stack once per stall – which is the code that blocks it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+import structlog
+
+from .metrics import LOOP_LAG_CURRENT, LOOP_LAG_SECONDS, LOOP_SLOW_CALLBACKS
+
+log = structlog.get_logger()
+
+
+class LoopLagMonitor:
+    """Measures loop lag and tracks whether it has stayed above ``max_lag``."""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_callback: float = 0.25,
+        max_lag: float = 0.0,
+        sustain: int = 3,
+    ) -> None:
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.max_lag = max_lag
+        self.sustain = max(1, sustain)
+        self.lag = 0.0
+        self.ticks = 0
+        self.slow_callbacks = 0
+        self._over = 0
+        self._heartbeat = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def overloaded(self) -> bool:
+        """True once ``sustain`` consecutive ticks have lagged more than ``max_lag``."""
+
+        return self.max_lag > 0 and self._over >= self.sustain
+
+    def observe(self, lag: float) -> None:
+        self.lag = lag
+        self.ticks += 1
+        LOOP_LAG_SECONDS.observe(lag)
+        LOOP_LAG_CURRENT.set(lag)
+        if self.max_lag > 0 and lag > self.max_lag:
+            self._over += 1
+        else:
+            self._over = 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), name="corealpha-loop-monitor"
+        )
+        if self.slow_callback > 0:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="corealpha-loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        interval = self.interval
+        while True:
+            due = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+            self.observe(max(0.0, now - due))
+
+    def _watch(self) -> None:
+        reported = None
+        # Kontrollera ungefär fyra gånger per tröskel.
+        period = max(0.01, self.slow_callback / 4)
+        while not self._stop.wait(period):
+            heartbeat = self._heartbeat
+            blocked = time.perf_counter() - heartbeat - self.interval
+            if blocked < self.slow_callback or reported == heartbeat:
+                continue
+            reported = heartbeat
+            self.slow_callbacks += 1
+            LOOP_SLOW_CALLBACKS.inc()
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=30)) if frame else ""
+            log.warning("slow_callback", blocked_ms=int(blocked * 1000), stack=stack)
@@ -0,0 +1,198 @@
+"""Prometheus metrics emitted from inside the adapter.
+
+Metrics are registered on the default ``prometheus_client`` registry, which is
+the one the instrumentator exposes on ``/metrics``. This module must only be
+imported once per process (it is never reloaded), otherwise registration fails
+with duplicated time series.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# --- Warm-up scheduler ---
+WARMUP_RUNS = Counter(
+    "corealpha_warmup_runs_total",
+    "Completed warm-up runs over the watchlist.",
+    ["outcome"],
+)
+WARMUP_TICKERS = Counter(
+    "corealpha_warmup_tickers_total",
+    "Tickers processed by the warm-up scheduler.",
+    ["outcome"],
+)
+WARMUP_PROGRESS = Gauge(
+    "corealpha_warmup_progress_ratio",
+    "Share of the watchlist processed in the current (or last) warm-up run.",
+)
+WARMUP_DURATION = Histogram(
+    "corealpha_warmup_duration_seconds",
+    "Wall-clock duration of a full warm-up run.",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+WARMUP_LAST_SUCCESS = Gauge(
+    "corealpha_warmup_last_success_timestamp_seconds",
+    "Unix time when the last warm-up run finished without errors.",
+)
+
+# --- Rate limiting ---
+RATE_LIMIT_DECISION_SECONDS = Histogram(
+    "corealpha_ratelimit_decision_seconds",
+    "Latency of a single rate-limit decision, including the backend round trip.",
+    ["backend"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05),
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "corealpha_ratelimit_decisions_total",
+    "Rate-limit decisions by result (allowed, limited, error = backend failure, failed open).",
+    ["result"],
+)
+
+# --- Logging pipeline ---
+LOG_DROPPED = Counter(
+    "corealpha_log_records_dropped_total",
+    "Log records dropped because the log queue was full (or failed to render).",
+)
+LOG_SAMPLED_OUT = Counter(
+    "corealpha_access_log_sampled_out_total",
+    "Access log records skipped by sampling.",
+)
+LOG_QUEUE_DEPTH = Gauge(
+    "corealpha_log_queue_depth",
+    "Log records waiting for the writer thread.",
+)
+
+# --- Provider (FinGPT) ---
+# Labels are normalised via ``provider_path``/``status_label`` so cardinality stays bounded.
+PROVIDER_PATHS = ("/summarize", "/sentiment", "/vote")
+
+UPSTREAM_SECONDS = Histogram(
+    "corealpha_upstream_request_duration_seconds",
+    "Latency of single upstream FinGPT attempts.",
+    ["path", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20),
+)
+UPSTREAM_RETRIES = Counter(
+    "corealpha_upstream_retries_total",
+    "Upstream attempts that were retried after a failure.",
+    ["path"],
+)
+PROVIDER_CACHE_EVENTS = Counter(
+    "corealpha_provider_cache_events_total",
+    "Provider response cache events (hit, miss, expired, eviction).",
+    ["event"],
+)
+PROVIDER_CACHE_LOCK_WAIT_SECONDS = Histogram(
+    "corealpha_provider_cache_lock_wait_seconds",
+    "Time spent waiting for the provider cache/circuit lock.",
+    buckets=(0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+CIRCUIT_STATE = Gauge(
+    "corealpha_circuit_open",
+    "1 while the FinGPT circuit breaker is open, otherwise 0.",
+)
+CIRCUIT_OPENED = Counter(
+    "corealpha_circuit_opened_total",
+    "Times the FinGPT circuit breaker has opened.",
+)
+
+# --- HTTP response cache (ETag) ---
+RESPONSE_CACHE_EVENTS = Counter(
+    "corealpha_response_cache_events_total",
+    "Response cache events per route (hit, not_modified, miss, store, eviction).",
+    ["route", "event"],
+)
+
+# --- Idempotency-Key ---
+IDEMPOTENCY_SAVED = Counter(
+    "corealpha_idempotency_saved_executions_total",
+    "Requests answered by an earlier execution with the same Idempotency-Key.",
+    ["route", "source"],
+)
+IDEMPOTENCY_CONFLICTS = Counter(
+    "corealpha_idempotency_conflicts_total",
+    "Idempotency-Key reused with a different request body (rejected with 422).",
+    ["route"],
+)
+
+# --- URL fetching for /summarize ---
+URL_FETCH_EVENTS = Counter(
+    "corealpha_url_fetch_total",
+    "URL fetches by outcome (hit, revalidated, fetched, error).",
+    ["event"],
+)
+URL_FETCH_SECONDS = Histogram(
+    "corealpha_url_fetch_seconds",
+    "Network time for fetching and extracting a URL (cache hits excluded).",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# --- Long-document summarization ---
+LONG_SUMMARY_CHUNKS = Counter(
+    "corealpha_long_summary_calls_total",
+    "Map-reduce summarize steps by source (provider call or chunk cache).",
+    ["source"],
+)
+
+# --- Decision history ---
+DECISIONS_WRITTEN = Counter(
+    "corealpha_decisions_written_total",
+    "Vote decisions written to the decision history store.",
+)
+DECISIONS_DROPPED = Counter(
+    "corealpha_decisions_dropped_total",
+    "Vote decisions dropped because the history queue was full or a write failed.",
+)
+DECISIONS_COMPACTED = Counter(
+    "corealpha_decisions_compacted_total",
+    "Decisions deleted by retention compaction.",
+)
+
+# --- Agents and voting ---
+AGENT_PROPOSE_SECONDS = Histogram(
+    "corealpha_agent_propose_duration_seconds",
+    "Duration of agent propose() calls.",
+    ["agent"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+VOTE_ENGINE_SECONDS = Histogram(
+    "corealpha_vote_engine_duration_seconds",
+    "Duration of voting engine vote() calls.",
+    ["method"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+VOTE_PROPOSALS = Histogram(
+    "corealpha_vote_proposals",
+    "Number of proposals per vote.",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 50, 100, 200),
+)
+
+
+def provider_path(path: str) -> str:
+    return path if path in PROVIDER_PATHS else "other"
+
+
+def status_label(status) -> str:
+    """HTTP status as a label; out-of-range codes collapse to ``invalid``."""
+
+    if isinstance(status, int):
+        return str(status) if 100 <= status < 600 else "invalid"
+    return str(status)
+
+
+# --- Event loop ---
+LOOP_LAG_SECONDS = Histogram(
+    "corealpha_event_loop_lag_seconds",
+    "Delay between when the loop monitor tick was due and when it ran.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_LAG_CURRENT = Gauge(
+    "corealpha_event_loop_lag_current_seconds",
+    "Event loop lag measured by the most recent monitor tick.",
+)
+LOOP_SLOW_CALLBACKS = Counter(
+    "corealpha_event_loop_slow_callbacks_total",
+    "Times the event loop was blocked longer than the slow-callback threshold.",
+)
+ADMISSION_SHED = Counter(
+    "corealpha_admission_shed_total",
+    "Requests rejected with 503 because event loop lag stayed above the limit.",
+)
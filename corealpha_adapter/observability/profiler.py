@@ -0,0 +1,239 @@
+"""On-demand sampling profiler for the running worker.
+
+A daemon thread snapshots every thread's Python stack with
+``sys._current_frames()`` at a fixed interval and counts identical stacks.
+Nothing is instrumented and no tracing hook is installed, so the cost is
+bounded by the sampling rate and only paid while a profile is running.
+
+With ``path_prefix`` set, only work done for matching requests is kept:
+``ProfilerTagMiddleware`` registers the asyncio task serving each matching
+request, event-loop samples are kept while one of those tasks is the running
+task, and threadpool samples are kept while at least one matching request is
+in flight.
+
+Results can be rendered as collapsed stacks (``flamegraph.pl``, speedscope,
+inferno) or as a speedscope JSON document.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_MAX_DEPTH = 128
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is already running in this worker."""
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "corealpha_adapter" + os.sep):
+        index = filename.rfind(marker)
+        if index >= 0:
+            if marker.startswith("corealpha_adapter"):
+                return filename[index:]
+            return filename[index + len(marker) :]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """Collects stack samples from all threads for ``seconds``."""
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        path_prefix: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        loop_thread_id: Optional[int] = None,
+    ) -> None:
+        self.interval = max(0.001, interval)
+        self.path_prefix = path_prefix
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.samples: "Counter[Tuple[str, Tuple[str, ...]]]" = Counter()
+        self.sample_count = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self._labels: Dict[Tuple[Any, int], str] = {}
+        self._tagged: Dict[Any, int] = {}
+        self._tag_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- request tagging (called from the event loop) ---
+
+    def matches(self, path: str) -> bool:
+        prefix = self.path_prefix
+        return prefix is not None and (path == prefix or path.startswith(prefix.rstrip("/") + "/"))
+
+    def enter(self, task: Any) -> None:
+        with self._tag_lock:
+            self._tagged[task] = self._tagged.get(task, 0) + 1
+
+    def exit(self, task: Any) -> None:
+        with self._tag_lock:
+            depth = self._tagged.get(task, 0) - 1
+            if depth > 0:
+                self._tagged[task] = depth
+            else:
+                self._tagged.pop(task, None)
+
+    # --- sampling ---
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="corealpha-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self.started
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        key = (code, frame.f_lineno)
+        label = self._labels.get(key)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{frame.f_lineno})"
+            self._labels[key] = label
+        return label
+
+    def _keep(self, thread_id: int) -> bool:
+        if self.path_prefix is None:
+            return True
+        if not self._tagged:
+            return False
+        if thread_id != self.loop_thread_id or self.loop is None:
+            return True
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return False
+        return task in self._tagged
+
+    def sample_once(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or not self._keep(thread_id):
+                continue
+            stack: List[str] = []
+            while frame is not None and len(stack) < _MAX_DEPTH:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+        self.sample_count += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    # --- output ---
+
+    def collapsed(self) -> str:
+        """One ``thread;frame;…;leaf count`` line per distinct stack."""
+
+        lines = [
+            ";".join((thread,) + stack) + f" {count}"
+            for (thread, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self, name: str = "corealpha") -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        index: Dict[str, int] = {}
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for (thread, stack), count in self.samples.most_common():
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({"name": label})
+                ids.append(index[label])
+            profile = profiles.setdefault(
+                thread,
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(self.duration, 6),
+                    "samples": [],
+                    "weights": [],
+                },
+            )
+            profile["samples"].append(ids)
+            profile["weights"].append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "corealpha-adapter",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+_active: Optional[SamplingProfiler] = None
+_active_lock = threading.Lock()
+
+
+def active_profiler() -> Optional[SamplingProfiler]:
+    return _active
+
+
+async def profile(
+    seconds: float, interval: float = 0.005, path_prefix: Optional[str] = None
+) -> SamplingProfiler:
+    """Profile this worker for ``seconds`` without blocking the event loop."""
+
+    global _active
+    profiler = SamplingProfiler(
+        interval=interval,
+        path_prefix=path_prefix,
+        loop=asyncio.get_running_loop(),
+        loop_thread_id=threading.get_ident(),
+    )
+    with _active_lock:
+        if _active is not None:
+            raise ProfilerBusyError("A profile is already running in this worker")
+        _active = profiler
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        _active = None
+        # join() väntar högst ett samplingsintervall.
+        profiler.stop()
+    return profiler
+
+
+class ProfilerTagMiddleware:
+    """Registers the task serving each request that the active profile filters on."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = _active
+        if profiler is None or scope["type"] != "http" or not profiler.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        profiler.enter(task)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.exit(task)
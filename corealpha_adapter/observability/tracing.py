@@ -0,0 +1,257 @@
+"""Lightweight per-request tracing.
+
+``RequestIDMiddleware`` starts a :class:`Trace` for sampled requests (keyed by
+the request ID) and stores it in a context variable. Code on the hot path
+records spans with :func:`span` or, when it already has timestamps, with
+:func:`record`. Both are a single context-variable lookup when the request is
+not sampled, so instrumentation can stay in place with sampling off.
+
+Sampled responses get a ``Server-Timing`` header summarising the spans, and the
+finished trace is handed to an exporter (``TRACE_EXPORTER``):
+
+* ``log`` – one ``trace`` record through the structured log pipeline.
+* ``jsonl:///abs/path.jsonl`` – one JSON object per line, written by a
+  background thread so the event loop never blocks on disk.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import random
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+import structlog
+
+from .log_pipeline import LogPipeline
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("corealpha_trace", default=None)
+
+log = structlog.get_logger()
+
+
+class Trace:
+    """Spans recorded for one request; times are ``time.perf_counter`` values."""
+
+    __slots__ = ("request_id", "started", "wall", "spans", "marks", "attrs", "_token")
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.wall = time.time()
+        self.spans: List[Tuple[str, float, float, Dict[str, Any]]] = []
+        self.marks: Dict[str, float] = {}
+        self.attrs: Dict[str, Any] = {}
+        self._token: Optional[Token] = None
+
+    def add(self, name: str, start: float, end: float, attrs: Optional[Dict[str, Any]] = None):
+        self.spans.append((name, start, end, attrs or {}))
+
+    def mark(self, name: str) -> None:
+        self.marks[name] = time.perf_counter()
+
+    def add_since(self, name: str, mark: str, **attrs: Any) -> None:
+        """Record a span from an earlier :meth:`mark` until now."""
+
+        start = self.marks.get(mark)
+        if start is not None:
+            self.add(name, start, time.perf_counter(), attrs)
+
+    def server_timing(self, now: Optional[float] = None) -> str:
+        """Spans summed per name, in first-seen order, plus the total so far."""
+
+        totals: Dict[str, List[float]] = {}
+        for name, start, end, _ in self.spans:
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += end - start
+            entry[1] += 1
+        parts = []
+        for name, (seconds, count) in totals.items():
+            part = f"{name};dur={seconds * 1000:.3f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        total = (now if now is not None else time.perf_counter()) - self.started
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event": "trace",
+            "rid": self.request_id,
+            "ts": self.wall,
+            **self.attrs,
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "ms": round((end - start) * 1000, 3),
+                    **attrs,
+                }
+                for name, start, end, attrs in self.spans
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "start")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.add(self.name, self.start, time.perf_counter(), self.attrs)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing a block into the current trace (no-op when unsampled)."""
+
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attrs)
+
+
+def record(name: str, start: float, end: float, **attrs: Any) -> None:
+    """Add an already-timed span (``perf_counter`` values) to the current trace."""
+
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, start, end, attrs)
+
+
+class Exporter(Protocol):
+    def export(self, trace: Trace) -> None: ...
+
+    def flush(self, timeout: float = 2.0) -> bool: ...
+
+
+class LogExporter:
+    """Emit each trace as one structured log record."""
+
+    def export(self, trace: Trace) -> None:
+        data = trace.to_dict()
+        log.info(data.pop("event"), **data)
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        return True
+
+
+class JSONLinesExporter:
+    """Append traces to a JSON-lines file from a background writer thread."""
+
+    def __init__(self, path: str, maxsize: int = 10_000) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._stream = open(path, "a", encoding="utf-8")
+        self._pipeline = LogPipeline(stream=self._stream, maxsize=maxsize)
+        self._pipeline.start()
+        atexit.register(self.close)
+
+    def export(self, trace: Trace) -> None:
+        self._pipeline.submit(trace.to_dict())
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        return self._pipeline.flush(timeout)
+
+    def close(self) -> None:
+        self._pipeline.close()
+        self._stream.close()
+
+
+def build_exporter(value: str) -> Optional[Exporter]:
+    """Build an exporter from ``""``/``none``, ``log`` or ``jsonl:///abs/path``."""
+
+    value = value.strip()
+    if value.lower() in ("", "none"):
+        return None
+    if value.lower() == "log":
+        return LogExporter()
+    scheme, sep, rest = value.partition(":")
+    if sep and scheme.lower() == "jsonl":
+        path = rest[2:] if rest.startswith("//") else rest
+        return JSONLinesExporter(path)
+    raise ValueError(f"Unsupported trace exporter: {value!r}")
+
+
+class Tracer:
+    """Samples requests, owns the context variable and hands traces to the exporter."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        exporter: Optional[Exporter] = None,
+        server_timing: bool = True,
+    ) -> None:
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.exporter = exporter
+        self.server_timing = server_timing
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0.0
+
+    def begin(self, request_id: str) -> Optional[Trace]:
+        if self.sample_rate <= 0.0:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        trace = Trace(request_id)
+        trace._token = _current.set(trace)
+        return trace
+
+    def end(self, trace: Trace) -> None:
+        if trace._token is not None:
+            _current.reset(trace._token)
+            trace._token = None
+        if self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+            except Exception:  # noqa: BLE001 - tracing must never fail a request
+                pass
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        return self.exporter.flush(timeout) if self.exporter is not None else True
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+            exporter=build_exporter(os.getenv("TRACE_EXPORTER", "")),
+            server_timing=os.getenv("TRACE_SERVER_TIMING", "true").lower() == "true",
+        )
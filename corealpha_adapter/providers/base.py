@@ -13,6 +13,9 @@ class BaseLLM(Protocol):
     async def vote(self, proposals: List[Dict]):  # type: ignore[override]
         """Return an aggregated vote for the supplied proposals."""
 
+    async def ping(self) -> bool:
+        """Return ``True`` if the backing service is reachable."""
+
 
 class ProviderError(Exception):
     """Base class for provider errors."""
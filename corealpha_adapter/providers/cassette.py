@@ -0,0 +1,152 @@
+"""Record/replay cassettes of upstream FinGPT exchanges.
+
+A cassette is JSON Lines, gzip-compressed when the file name ends in ``.gz``.
+Each line is one upstream request with its final outcome::
+
+    {"key": "3f9a…", "path": "/sentiment", "t": 12.503, "elapsed": 0.183,
+     "attempts": 1, "status": 200, "request": {…}, "response": {…}}
+
+``key`` is :func:`canonical_key` of path and payload, ``t`` the offset in
+seconds since recording started (the traffic shape) and ``elapsed`` the
+upstream time including retries. Failed requests carry ``error`` instead of
+``response``.
+
+:class:`CassetteWriter` only queues lines; a daemon thread does the file and
+gzip work, so recording never blocks the event loop. Close the writer (the
+app does it on shutdown, ``atexit`` covers the rest) to write the gzip
+trailer; a cassette cut short anyway still replays up to the damage.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+
+from ..core.background import BackgroundWriter
+
+PathLike = Union[str, Path]
+
+
+def canonical_key(path: str, payload: Dict[str, Any]) -> str:
+    """Stable lookup key for a request: same path and JSON payload → same key."""
+
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(f"{path}\n{body}".encode()).hexdigest()
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return io.TextIOWrapper(gzip.open(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_cassette(path: PathLike) -> Iterator[Dict[str, Any]]:
+    """Yield the exchanges of a cassette in recorded order.
+
+    A torn last line is skipped, and a gzip stream that ends early or is
+    corrupt ends the iteration after the last intact line.
+    """
+
+    with _open(Path(path), "r") as fh:
+        lines = iter(fh)
+        while True:
+            try:
+                line = next(lines)
+            except StopIteration:
+                return
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                # Processen dog innan gzip-trailern skrevs; behåll det som hann skrivas.
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # En avbruten inspelning kan lämna en halv sista rad.
+                continue
+
+
+class CassetteWriter:
+    """Append exchanges to a cassette from any task or thread without blocking.
+
+    Lines go on a bounded :class:`BackgroundWriter` queue that one daemon
+    thread writes to the file. When the queue is full the exchange is dropped
+    and counted in ``dropped``. ``{pid}`` in ``path`` is replaced by the
+    process id, so several workers never append to the same file.
+    """
+
+    def __init__(self, path: PathLike, maxsize: int = 10_000) -> None:
+        self.path = Path(path)
+        self._fh: Optional[IO[str]] = None
+        self._writer = BackgroundWriter(self._write_lines, name="cassette-writer", maxsize=maxsize)
+        self._started = time.monotonic()
+
+    @property
+    def dropped(self) -> int:
+        return self._writer.dropped
+
+    @property
+    def running(self) -> bool:
+        return self._writer.running
+
+    def write(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        *,
+        elapsed: float,
+        attempts: int,
+        status: Any,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        entry: Dict[str, Any] = {
+            "key": canonical_key(path, payload),
+            "path": path,
+            "t": round(time.monotonic() - self._started, 4),
+            "elapsed": round(elapsed, 4),
+            "attempts": attempts,
+            "status": status,
+            "request": payload,
+        }
+        if error is None:
+            entry["response"] = response
+        else:
+            entry["error"] = error
+        # Serialisera här: svaret delas med cachen och får inte ändras under skrivningen.
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        if self._writer.start():
+            atexit.register(self.close)
+        self._writer.submit(line)
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if self._fh is None:
+            path = Path(str(self.path).replace("{pid}", str(os.getpid())))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = _open(path, "a")
+        self._fh.write("".join(lines))
+        self._fh.flush()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until every queued exchange has been written (``True`` on success)."""
+
+        return self._writer.flush(timeout)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Drain the queue, stop the writer thread and close the file (gzip trailer)."""
+
+        atexit.unregister(self.close)
+        if not self._writer.close(timeout):
+            return  # skrivaren hänger; stäng inte filen under den
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
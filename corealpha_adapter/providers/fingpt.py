@@ -7,11 +7,24 @@ import copy
 import json
 import os
 import time
+from contextlib import asynccontextmanager
 from typing import Any, Dict, Tuple
 
 import httpx
 
+from ..observability.metrics import (
+    CIRCUIT_OPENED,
+    CIRCUIT_STATE,
+    PROVIDER_CACHE_EVENTS,
+    PROVIDER_CACHE_LOCK_WAIT_SECONDS,
+    UPSTREAM_RETRIES,
+    UPSTREAM_SECONDS,
+    provider_path,
+    status_label,
+)
+from ..observability.tracing import record, span
 from .base import ProviderCircuitOpenError, ProviderConfigurationError, ProviderError
+from .cassette import CassetteWriter
 
 
 class FinGPTProvider:
@@ -23,13 +36,17 @@ class FinGPTProvider:
         self._timeout = int(os.getenv("HTTP_TIMEOUT_SECONDS", "20"))
         self._max_retries = int(os.getenv("HTTP_MAX_RETRIES", "2"))
         self._cache_ttl = float(os.getenv("HTTP_CACHE_SECONDS", "30"))
+        self._cache_max_entries = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "1024"))
         self._backoff_base = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+        self._health_path = os.getenv("FINGPT_HEALTH_PATH", "/health")
         self._circuit_threshold = 3
         self._circuit_open_seconds = 30.0
         self._failure_count = 0
         self._circuit_open_until = 0.0
         self._cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
         self._lock = asyncio.Lock()
+        record_path = os.getenv("FINGPT_RECORD_PATH", "")
+        self._recorder = CassetteWriter(record_path) if record_path else None
 
     async def summarize(self, payload):  # type: ignore[override]
         request_payload = self._normalize_payload(payload)
@@ -46,12 +63,35 @@ class FinGPTProvider:
         data = await self._request("/vote", request_payload)
         return data
 
-    async def _request(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def circuit_open(self) -> bool:
+        return bool(self._circuit_open_until) and time.monotonic() < self._circuit_open_until
+
+    async def ping(self) -> bool:
+        """Probe ``FINGPT_HEALTH_PATH``; any non-5xx answer means the API is reachable."""
+
+        self._check_configured()
+        headers = {"Authorization": f"Bearer {self._api_key}"}
+        timeout = min(float(self._timeout), 5.0)
+        async with httpx.AsyncClient(base_url=self._base_url, timeout=timeout) as client:
+            response = await client.get(self._health_path, headers=headers)
+        return response.status_code < 500
+
+    def close(self) -> None:
+        """Flush and close the ``FINGPT_RECORD_PATH`` cassette, if recording."""
+
+        if self._recorder is not None:
+            self._recorder.close()
+
+    def _check_configured(self) -> None:
         if not self._base_url:
             raise ProviderConfigurationError("FINGPT_BASE_URL is not configured")
         if not self._api_key:
             raise ProviderConfigurationError("FINGPT_API_KEY is not configured")
 
+    async def _request(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_configured()
+
         cache_key = (path, json.dumps(payload, sort_keys=True))
         now = time.monotonic()
 
@@ -61,73 +101,130 @@ class FinGPTProvider:
 
         await self._ensure_circuit_closed(now)
 
+        label = provider_path(path)
         last_error: Exception | None = None
+        first_started = time.perf_counter()
         for attempt in range(self._max_retries + 1):
+            started = time.perf_counter()
+            status: Any = "error"
+            error: Exception | None = None
             try:
                 response = await self._execute_request(path, payload)
+                status = response.status_code
                 response.raise_for_status()
                 data: Dict[str, Any] = response.json()
-                await self._record_success()
-                await self._store_cache(cache_key, data, now)
-                return data
             except (
                 httpx.HTTPStatusError,
                 httpx.RequestError,
             ) as exc:  # pragma: no cover - defensive
-                last_error = exc
-                await self._record_failure(now)
-                if attempt >= self._max_retries:
-                    break
+                if isinstance(exc, httpx.TimeoutException):
+                    status = "timeout"
+                error = exc
+            finally:
+                ended = time.perf_counter()
+                UPSTREAM_SECONDS.labels(path=label, status=status_label(status)).observe(
+                    ended - started
+                )
+                record("upstream", started, ended, path=label, status=status, attempt=attempt)
+
+            if error is None:
+                await self._record_success()
+                await self._store_cache(cache_key, data, now)
+                if self._recorder is not None:
+                    self._recorder.write(
+                        path,
+                        payload,
+                        elapsed=ended - first_started,
+                        attempts=attempt + 1,
+                        status=status,
+                        response=data,
+                    )
+                return data
+            last_error = error
+            await self._record_failure(now)
+            if attempt >= self._max_retries:
+                break
+            UPSTREAM_RETRIES.labels(path=label).inc()
+            with span("backoff"):
                 await asyncio.sleep(self._backoff_base * (2**attempt))
 
         if isinstance(last_error, httpx.HTTPStatusError):
-            raise ProviderError(
+            failure = ProviderError(
                 f"FinGPT request failed with status {last_error.response.status_code}"
-            ) from last_error
-        if last_error is not None:
-            raise ProviderError("FinGPT request failed") from last_error
-        raise ProviderError("FinGPT request failed")
+            )
+        else:
+            failure = ProviderError("FinGPT request failed")
+        if self._recorder is not None:
+            self._recorder.write(
+                path,
+                payload,
+                elapsed=time.perf_counter() - first_started,
+                attempts=self._max_retries + 1,
+                status=status,
+                error=str(failure),
+            )
+        raise failure from last_error
 
     async def _execute_request(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
         headers = {"Authorization": f"Bearer {self._api_key}"}
         async with httpx.AsyncClient(base_url=self._base_url, timeout=self._timeout) as client:
             return await client.post(path, json=payload, headers=headers)
 
-    async def _get_cached(self, cache_key: Tuple[str, str], now: float) -> Dict[str, Any] | None:
+    @asynccontextmanager
+    async def _locked(self):
+        started = time.perf_counter()
         async with self._lock:
+            PROVIDER_CACHE_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started)
+            yield
+
+    async def _get_cached(self, cache_key: Tuple[str, str], now: float) -> Dict[str, Any] | None:
+        async with self._locked():
             item = self._cache.get(cache_key)
             if not item:
+                PROVIDER_CACHE_EVENTS.labels(event="miss").inc()
                 return None
             expires_at, value = item
             if expires_at < now:
                 del self._cache[cache_key]
+                PROVIDER_CACHE_EVENTS.labels(event="expired").inc()
                 return None
+            PROVIDER_CACHE_EVENTS.labels(event="hit").inc()
             return copy.deepcopy(value)
 
     async def _store_cache(
         self, cache_key: Tuple[str, str], value: Dict[str, Any], now: float
     ) -> None:
-        async with self._lock:
+        async with self._locked():
+            self._cache.pop(cache_key, None)
+            while self._cache and len(self._cache) >= self._cache_max_entries:
+                # Äldsta posten först (dict bevarar insättningsordning).
+                del self._cache[next(iter(self._cache))]
+                PROVIDER_CACHE_EVENTS.labels(event="eviction").inc()
             self._cache[cache_key] = (now + self._cache_ttl, copy.deepcopy(value))
 
     async def _ensure_circuit_closed(self, now: float) -> None:
-        async with self._lock:
+        async with self._locked():
             if self._circuit_open_until and now < self._circuit_open_until:
                 raise ProviderCircuitOpenError("FinGPT circuit breaker is open")
             if self._circuit_open_until and now >= self._circuit_open_until:
                 self._failure_count = 0
                 self._circuit_open_until = 0.0
+                CIRCUIT_STATE.set(0)
 
     async def _record_success(self) -> None:
-        async with self._lock:
+        async with self._locked():
             self._failure_count = 0
             self._circuit_open_until = 0.0
+            CIRCUIT_STATE.set(0)
 
     async def _record_failure(self, now: float) -> None:
-        async with self._lock:
+        async with self._locked():
             self._failure_count += 1
             if self._failure_count >= self._circuit_threshold:
+                if not self._circuit_open_until:
+                    CIRCUIT_OPENED.inc()
                 self._circuit_open_until = now + self._circuit_open_seconds
+                CIRCUIT_STATE.set(1)
 
     @staticmethod
     def _normalize_payload(payload: Any) -> Dict[str, Any]:
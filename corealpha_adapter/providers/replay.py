@@ -0,0 +1,115 @@
+"""Provider that serves recorded FinGPT exchanges from a cassette."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from .base import ProviderConfigurationError, ProviderError
+from .cassette import canonical_key, iter_cassette
+
+
+class ReplayProvider:
+    """Answer requests from ``REPLAY_CASSETTE``, looked up by :func:`canonical_key`.
+
+    Each reply waits the recorded upstream time multiplied by
+    ``REPLAY_LATENCY_SCALE`` (``0`` = no delay). A key recorded several times
+    replays its exchanges in order and then starts over. Unknown requests raise
+    :class:`ProviderError`, or go to the stub provider with
+    ``REPLAY_ON_MISS=stub``.
+
+    The cassette is read and indexed once, in a worker thread: by the app
+    lifespan via :meth:`load`, or by whichever request or probe needs it first.
+    """
+
+    circuit_open = False
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        latency_scale: Optional[float] = None,
+        on_miss: Optional[str] = None,
+    ) -> None:
+        self._path = path if path is not None else os.getenv("REPLAY_CASSETTE", "")
+        if latency_scale is None:
+            latency_scale = float(os.getenv("REPLAY_LATENCY_SCALE", "1"))
+        self._latency_scale = max(0.0, latency_scale)
+        self._on_miss = (on_miss or os.getenv("REPLAY_ON_MISS", "error")).lower()
+        self._index: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._load_lock = threading.Lock()
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._fallback = None
+
+    async def summarize(self, payload):  # type: ignore[override]
+        return await self._replay("/summarize", payload)
+
+    async def sentiment(self, payload):  # type: ignore[override]
+        return await self._replay("/sentiment", payload)
+
+    async def vote(self, payload):  # type: ignore[override]
+        return await self._replay("/vote", payload)
+
+    async def ping(self) -> bool:
+        await self._index_async()
+        return True
+
+    def load(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Read and index the cassette (blocking; call it off the event loop)."""
+
+        with self._load_lock:
+            if self._index is None:
+                if not self._path:
+                    raise ProviderConfigurationError("REPLAY_CASSETTE is not configured")
+                index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+                try:
+                    for entry in iter_cassette(self._path):
+                        index[entry["key"]].append(entry)
+                except OSError as exc:
+                    raise ProviderConfigurationError(f"cannot read cassette: {exc}") from exc
+                self._index = dict(index)
+        return self._index
+
+    async def _index_async(self) -> Dict[str, List[Dict[str, Any]]]:
+        index = self._index
+        if index is None:
+            # Gzip-uppackning och indexering blockerar; låset gör att bara en tråd läser.
+            index = await asyncio.to_thread(self.load)
+        return index
+
+    async def _replay(self, path: str, payload: Any) -> Dict[str, Any]:
+        request_payload = _normalize_payload(payload)
+        key = canonical_key(path, request_payload)
+        entries = (await self._index_async()).get(key)
+        if not entries:
+            if self._on_miss == "stub":
+                return await getattr(self._stub(), path.strip("/"))(request_payload)
+            raise ProviderError(f"no cassette entry for {path} request")
+
+        entry = entries[self._cursor[key] % len(entries)]
+        self._cursor[key] += 1
+        delay = float(entry.get("elapsed", 0.0)) * self._latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if "error" in entry:
+            raise ProviderError(entry["error"])
+        return copy.deepcopy(entry["response"])
+
+    def _stub(self):
+        if self._fallback is None:
+            from .stub import StubProvider
+
+            self._fallback = StubProvider()
+        return self._fallback
+
+
+def _normalize_payload(payload: Any) -> Dict[str, Any]:
+    # Samma normalisering som FinGPTProvider, så att nycklarna matchar inspelningen.
+    if isinstance(payload, dict):
+        return dict(payload)
+    if payload is None:
+        return {}
+    return {"text": payload}
@@ -143,3 +143,8 @@ class StubProvider:
         engine = get_voting_engine()
         vote_resp: VoteResponse = engine.vote(vote_req)
         return vote_resp.model_dump()
+
+    circuit_open = False
+
+    async def ping(self) -> bool:
+        return True
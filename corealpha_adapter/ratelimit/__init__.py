@@ -0,0 +1,27 @@
+"""Token-bucket rate limiting with backends shared across workers and nodes."""
+
+from .backends import Backend, MemoryBackend, RedisBackend, SQLiteBackend, build_backend
+from .engine import (
+    Decision,
+    Limiter,
+    Rate,
+    RateLimitExceeded,
+    get_remote_address,
+    limit,
+    parse_rate,
+)
+
+__all__ = [
+    "Backend",
+    "Decision",
+    "Limiter",
+    "MemoryBackend",
+    "Rate",
+    "RateLimitExceeded",
+    "RedisBackend",
+    "SQLiteBackend",
+    "build_backend",
+    "get_remote_address",
+    "limit",
+    "parse_rate",
+]
@@ -0,0 +1,354 @@
+"""Token-bucket storage backends.
+
+``acquire`` atomically refills a bucket, takes ``cost`` tokens if available and
+returns ``(allowed, retry_after_seconds)``.
+
+* ``memory://`` – per process, for tests and single-worker dev.
+* ``sqlite:///abs/path`` – one file shared by every worker on the host. Put it on
+  tmpfs (``/dev/shm``) and each decision is a single UPSERT … RETURNING.
+* ``redis://host:port/db`` – shared across nodes; the bucket update runs as a
+  Lua script using the Redis server clock, spoken over a minimal RESP client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Protocol, Tuple
+from urllib.parse import urlparse
+
+
+class Backend(Protocol):
+    name: str
+
+    async def acquire(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> Tuple[bool, float]: ...
+
+    async def ping(self) -> bool: ...
+
+
+def _retry_after(tokens: float, cost: float, refill_per_second: float) -> float:
+    if refill_per_second <= 0:
+        return 0.0
+    return max(0.0, (cost - tokens) / refill_per_second)
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # Äldsta (mest vilade) hinken tappas; den hade ändå fyllts på.
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, refill_per_second)
+
+    async def ping(self) -> bool:
+        return True
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    ts REAL NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# Refill and take in one statement; SET-uttrycken ser radens gamla värden.
+_SQLITE_ACQUIRE = """
+INSERT INTO buckets (key, tokens, ts, allowed)
+VALUES (:key, :cap - :cost, :now, :cap >= :cost)
+ON CONFLICT(key) DO UPDATE SET
+    allowed = min(:cap, tokens + max(0.0, :now - ts) * :rate) >= :cost,
+    tokens = min(:cap, tokens + max(0.0, :now - ts) * :rate)
+        - CASE WHEN min(:cap, tokens + max(0.0, :now - ts) * :rate) >= :cost
+          THEN :cost ELSE 0.0 END,
+    ts = :now
+RETURNING allowed, tokens
+"""
+
+
+class SQLiteBackend:
+    """Buckets in a WAL-mode SQLite file shared by all local worker processes.
+
+    Statements run on one dedicated thread per process, never on the event
+    loop. ``busy_timeout`` is short: when another worker holds the write lock
+    longer than that, ``acquire`` raises and the limiter fails open instead of
+    stalling the request.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        prune_every: int = 10_000,
+        idle_seconds: float = 86400.0,
+        busy_timeout: float = 0.05,
+    ):
+        self.path = path
+        self.prune_every = prune_every
+        self.idle_seconds = idle_seconds
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Anslutningar får inte ärvas över fork; öppna en ny per process.
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(_SQLITE_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _run(self, func, *args):
+        # Trådar överlever inte fork; en ny executor per process.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="ratelimit-sqlite")
+            self._executor_pid = os.getpid()
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _acquire_sync(self, params):
+        with self._lock:
+            conn = self._connection()
+            allowed, tokens = conn.execute(_SQLITE_ACQUIRE, params).fetchone()
+            self._ops += 1
+            if self._ops % self.prune_every == 0:
+                conn.execute(
+                    "DELETE FROM buckets WHERE ts < ?", (params["now"] - self.idle_seconds,)
+                )
+        return allowed, tokens
+
+    def _ping_sync(self) -> None:
+        with self._lock:
+            self._connection().execute("SELECT 1").fetchone()
+
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        params = {
+            "key": key,
+            "cap": capacity,
+            "rate": refill_per_second,
+            "now": time.time(),
+            "cost": cost,
+        }
+        allowed, tokens = await self._run(self._acquire_sync, params)
+        allowed = bool(allowed)
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, refill_per_second)
+
+    async def ping(self) -> bool:
+        await self._run(self._ping_sync)
+        return True
+
+
+_REDIS_SCRIPT = """
+local cap = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1])
+local ts = tonumber(b[2])
+if tokens == nil then
+  tokens = cap
+  ts = now
+end
+tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(cap / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisError(Exception):
+    """Error reply from the Redis server."""
+
+
+class _RedisConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def roundtrip(self, args):
+        self.writer.write(encode_command(args))
+        await self.writer.drain()
+        return await read_reply(self.reader)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisBackend:
+    """Minimal RESP2 client that runs the token-bucket script with EVALSHA.
+
+    Commands are spread over a pool of up to ``max_connections`` connections,
+    so concurrent rate-limit checks do not wait for each other's round trips.
+    A connection that fails or times out mid-command is discarded, since its
+    reply stream can no longer be trusted.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 0.25,
+        prefix: str = "corealpha:rl:",
+        max_connections: int = 16,
+    ) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.prefix = prefix
+        self.max_connections = max_connections
+        self._idle: List[_RedisConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._sha: Optional[str] = None
+
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        reply = await self._evalsha(self.prefix + key, capacity, refill_per_second, cost)
+        allowed, tokens = int(reply[0]), float(reply[1])
+        return bool(allowed), 0.0 if allowed else _retry_after(tokens, cost, refill_per_second)
+
+    async def ping(self) -> bool:
+        return await self.command("PING") == "PONG"
+
+    async def _evalsha(self, key: str, *args: float):
+        if self._sha is None:
+            self._sha = await self.command("SCRIPT", "LOAD", _REDIS_SCRIPT)
+        try:
+            return await self.command("EVALSHA", self._sha, 1, key, *args)
+        except RedisError as exc:
+            if not str(exc).startswith("NOSCRIPT"):
+                raise
+            self._sha = await self.command("SCRIPT", "LOAD", _REDIS_SCRIPT)
+            return await self.command("EVALSHA", self._sha, 1, key, *args)
+
+    async def command(self, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else None
+            try:
+                if conn is None:
+                    conn = await self._connect()
+                reply = await asyncio.wait_for(conn.roundtrip(args), self.timeout)
+            except RedisError:
+                if conn is not None:
+                    self._idle.append(conn)  # felsvaret är helt läst; anslutningen är hel
+                raise
+            except BaseException:
+                # Fel eller avbrott mitt i ett kommando: svaret kan fortfarande vara på väg.
+                if conn is not None:
+                    conn.close()
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def _connect(self) -> _RedisConnection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        conn = _RedisConnection(reader, writer)
+        try:
+            if self.password:
+                await asyncio.wait_for(conn.roundtrip(("AUTH", self.password)), self.timeout)
+            if self.db:
+                await asyncio.wait_for(conn.roundtrip(("SELECT", self.db)), self.timeout)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def encode_command(args) -> bytes:
+    parts: List[bytes] = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader):
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise asyncio.IncompleteReadError(line, None)
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        size = int(payload)
+        if size < 0:
+            return None
+        data = await reader.readexactly(size + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Unexpected reply type {kind!r}")
+
+
+def build_backend(url: str) -> Backend:
+    """Build a backend from ``memory://``, ``sqlite:///abs/path`` or ``redis://…``."""
+
+    scheme = url.split("://", 1)[0].lower() if "://" in url else url.lower()
+    if scheme in ("", "memory"):
+        return MemoryBackend()
+    if scheme == "sqlite":
+        return SQLiteBackend(url.split("://", 1)[1])
+    if scheme == "redis":
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported rate limit storage: {url!r}")
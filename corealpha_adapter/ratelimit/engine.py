@@ -0,0 +1,168 @@
+"""Rate parsing, limit decisions and the per-route ``@limit`` decorators."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from ..observability.metrics import RATE_LIMIT_DECISION_SECONDS, RATE_LIMIT_DECISIONS
+from ..observability.tracing import record
+from .backends import Backend
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$", re.I)
+
+
+@dataclass(frozen=True)
+class Rate:
+    """``amount`` requests per ``period`` seconds, enforced as a token bucket."""
+
+    amount: int
+    period: float
+    text: str
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.amount / self.period
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    retry_after: float
+
+
+def parse_rate(value: str) -> Rate:
+    """Parse ``"60/minute"``, ``"1000 per hour"`` or ``"10/5 seconds"``."""
+
+    match = _RATE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    amount, multiplier, unit = match.groups()
+    period = _PERIODS[unit.lower()] * int(multiplier or 1)
+    return Rate(amount=int(amount), period=period, text=value.strip())
+
+
+def get_remote_address(request: Request) -> str:
+    if request.client and request.client.host:
+        return request.client.host
+    return "127.0.0.1"
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rate: Rate, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded: {rate.text}")
+        self.rate = rate
+        self.retry_after = retry_after
+
+
+class Limiter:
+    """Shared decision engine for the global middleware limit and route limits."""
+
+    def __init__(
+        self,
+        key_func: Callable[[Request], str],
+        backend: Backend,
+        default_limits: Sequence[str] = (),
+        enabled: bool = True,
+    ) -> None:
+        self.key_func = key_func
+        self.backend = backend
+        self.default_limits: List[Rate] = [parse_rate(v) for v in default_limits if v]
+        self.enabled = enabled
+
+    async def hit(self, bucket: str, rate: Rate, cost: float = 1.0) -> Decision:
+        start = time.perf_counter()
+        try:
+            allowed, retry_after = await self.backend.acquire(
+                bucket, float(rate.amount), rate.refill_per_second, cost
+            )
+            result = "allowed" if allowed else "limited"
+        except Exception:  # noqa: BLE001 - fail open when the backend is unavailable
+            allowed, retry_after, result = True, 0.0, "error"
+        end = time.perf_counter()
+        RATE_LIMIT_DECISION_SECONDS.labels(backend=self.backend.name).observe(end - start)
+        record("ratelimit", start, end, result=result)
+        RATE_LIMIT_DECISIONS.labels(result=result).inc()
+        return Decision(allowed, retry_after)
+
+    async def check_default(self, request: Request, endpoint: str) -> Optional[Decision]:
+        """Apply the default limits; return the first denying decision, if any.
+
+        Buckets are scoped per ``endpoint`` (the matched route path), as with
+        slowapi: probes, scrapes and 404s do not drain one shared budget.
+        """
+
+        if not self.enabled or not self.default_limits:
+            return None
+        key = self.key_func(request)
+        for rate in self.default_limits:
+            decision = await self.hit(f"default:{rate.text}:{endpoint}:{key}", rate)
+            if not decision.allowed:
+                return decision
+        return None
+
+    def limit(self, value: str):
+        """Decorate an endpoint with its own limit (replaces the default limits for it).
+
+        The endpoint must accept a ``request: Request`` argument. Sync endpoints
+        keep running in the threadpool.
+        """
+
+        return _limit_decorator(value, lambda request: self)
+
+
+def limit(value: str):
+    """Like :meth:`Limiter.limit`, using the limiter of the app that serves the request.
+
+    The limiter is looked up on ``request.app.state.limiter`` per call, so a
+    router can be decorated at import time and mounted on any app built by
+    ``create_app``. Without a limiter on the app the endpoint is not limited.
+    """
+
+    return _limit_decorator(value, _app_limiter)
+
+
+def _app_limiter(request: Request) -> Optional["Limiter"]:
+    return getattr(request.app.state, "limiter", None)
+
+
+def _limit_decorator(value: str, resolve: Callable[[Request], Optional[Limiter]]):
+    rate = parse_rate(value)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        is_async = asyncio.iscoroutinefunction(func)
+
+        async def check(request: Request) -> None:
+            limiter = resolve(request)
+            if limiter is not None and limiter.enabled:
+                key = limiter.key_func(request)
+                decision = await limiter.hit(f"{name}:{rate.text}:{key}", rate)
+                if not decision.allowed:
+                    raise RateLimitExceeded(rate, decision.retry_after)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get("request")
+            if request is None:
+                request = next((a for a in args if isinstance(a, Request)), None)
+            if request is not None:
+                await check(request)
+            if is_async:
+                return await func(*args, **kwargs)
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        wrapper.__rate_limited__ = True
+        # Låter svar som serveras utan endpointen (ETag-cachen) debiteras samma kvot.
+        wrapper.__rate_limit_check__ = check
+        return wrapper
+
+    return decorator
@@ -0,0 +1,185 @@
+"""HTTP conditional caching for endpoints whose response is a pure function of the body.
+
+``@cache_response(max_age=60)`` marks such an endpoint; ``FastModelRoute``
+then handles it as follows:
+
+* The strong ETag is a hash of the path, the validated body in canonical
+  form (``model_dump_json``), the app's cache salt (version, provider,
+  voting method) and the current data versions (e.g. the fundamentals
+  snapshot generation). Equal requests therefore get equal ETags,
+  independent of key order or whitespace in the JSON, until the data behind
+  them is reloaded.
+* A request found in the app's :class:`ResponseCache` is answered from the
+  stored bytes, or with ``304 Not Modified`` when ``If-None-Match`` matches,
+  without running the endpoint or serializing again. Entries live
+  ``max_age`` seconds; the store is an LRU bounded by
+  ``RESPONSE_CACHE_MAX_ENTRIES``.
+* Every 200 response carries ``ETag`` and the route's ``Cache-Control``.
+* ``on_hit(request, model, body)`` runs for every answer served from the
+  cache, ``304`` included, for side effects the skipped endpoint would have
+  had (``/vote`` records its decision there).
+
+Entries are stored per API key, so a hit means the same key already passed
+the route's dependencies with the same request. Per-route ``@limit`` quotas
+are charged on hits as well.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Sequence
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .dependencies import principal
+from .observability.metrics import RESPONSE_CACHE_EVENTS
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int
+    cache_control: str
+    on_hit: Optional[Callable[..., None]] = None
+
+
+def cache_response(
+    max_age: int = 60,
+    cache_control: Optional[str] = None,
+    on_hit: Optional[Callable[..., None]] = None,
+):
+    """Mark an endpoint as cacheable; place it below ``@router.post``."""
+
+    policy = CachePolicy(max_age, cache_control or f"private, max-age={max_age}", on_hit)
+
+    def decorator(func):
+        func.__response_cache__ = policy
+        return func
+
+    return decorator
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    media_type: Optional[str]
+    expires_at: float
+
+
+class ResponseCache:
+    """Bounded LRU of rendered response bodies, keyed by ETag and API key."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        salt: str = "",
+        versions: Sequence[Callable[[], object]] = (),
+    ) -> None:
+        self.max_entries = max_entries
+        self._salt = salt.encode()
+        # Läses vid varje request: en omladdning byter ETag och därmed cachenyckel.
+        self._versions = tuple(versions)
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def etag(self, path: str, canonical_body: bytes) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        versions = ":".join(str(version()) for version in self._versions).encode()
+        for part in (self._salt, versions, path.encode(), canonical_body):
+            digest.update(part)
+            digest.update(b"\0")
+        return f'"{digest.hexdigest()}"'
+
+    def get(self, key: str, route: str, now: Optional[float] = None) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            RESPONSE_CACHE_EVENTS.labels(route=route, event="miss").inc()
+            return None
+        if entry.expires_at <= (time.monotonic() if now is None else now):
+            del self._entries[key]
+            RESPONSE_CACHE_EVENTS.labels(route=route, event="miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, route: str, entry: CachedResponse) -> None:
+        self._entries.pop(key, None)
+        while self._entries and len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            RESPONSE_CACHE_EVENTS.labels(route=route, event="eviction").inc()
+        self._entries[key] = entry
+        RESPONSE_CACHE_EVENTS.labels(route=route, event="store").inc()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for ``If-None-Match`` (RFC 9110 13.1.2)."""
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _cache_headers(policy: CachePolicy, etag: str) -> dict:
+    return {"etag": etag, "cache-control": policy.cache_control}
+
+
+def cached_handler(
+    handler: Callable[[Request], Awaitable[Response]],
+    policy: CachePolicy,
+    path: str,
+    body_model: Callable[[Request], Awaitable[Optional[BaseModel]]],
+    rate_check: Optional[Callable] = None,
+) -> Callable[[Request], Awaitable[Response]]:
+    """Wrap a route handler so it is answered from the app's :class:`ResponseCache`.
+
+    ``body_model`` returns the validated request body, or ``None`` when the
+    request cannot be keyed (it then runs ``handler`` unchanged).
+    """
+
+    async def respond(request: Request) -> Response:
+        cache = getattr(request.app.state, "response_cache", None)
+        model = await body_model(request) if cache is not None else None
+        if model is None:
+            return await handler(request)
+
+        etag = cache.etag(path, model.model_dump_json().encode())
+        key = f"{etag}:{principal(request)}"
+        if_none_match = request.headers.get("if-none-match")
+        entry = cache.get(key, path)
+        if entry is not None:
+            if rate_check is not None:
+                await rate_check(request)
+            if policy.on_hit is not None:
+                policy.on_hit(request, model, entry.body)
+            headers = _cache_headers(policy, etag)
+            if etag_matches(if_none_match, etag):
+                RESPONSE_CACHE_EVENTS.labels(route=path, event="not_modified").inc()
+                return Response(status_code=304, headers=headers)
+            RESPONSE_CACHE_EVENTS.labels(route=path, event="hit").inc()
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+        response = await handler(request)
+        body = getattr(response, "body", None)
+        if response.status_code != 200 or not isinstance(body, bytes):
+            return response
+        response.headers.update(_cache_headers(policy, etag))
+        cache.put(
+            key,
+            path,
+            CachedResponse(body, response.media_type, time.monotonic() + policy.max_age),
+        )
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=_cache_headers(policy, etag))
+        return response
+
+    return respond
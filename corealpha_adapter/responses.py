@@ -0,0 +1,235 @@
+"""Fast JSON serialization path shared by all routers.
+
+``FastJSONResponse`` is the app's default response class. Pydantic models are
+serialized by pydantic-core (``model_dump_json``) and plain data by orjson
+when it is installed; both produce the same compact UTF-8 bytes as FastAPI's
+``JSONResponse`` for the payloads this API returns.
+
+``FastModelRoute`` lets a handler that returns an instance of exactly its
+``response_model`` skip FastAPI's re-validation and ``jsonable_encoder`` pass:
+the model is rendered directly into a ``FastJSONResponse``. For sampled
+requests it also records the ``validate`` (body parsing, validation and
+dependencies), ``endpoint`` and ``serialize`` trace spans.
+
+For a route whose body is a single Pydantic model, ``FastModelRoute`` also
+validates the raw JSON bytes straight into the model with a ``TypeAdapter``
+compiled once per route (``validate_json``), instead of ``json.loads`` into a
+dict followed by a second validation pass. FastAPI then receives the model
+instance, which it accepts without re-validating. Invalid bodies fall back to
+FastAPI's normal path, so error payloads and the order of dependency errors
+(e.g. 401 before 422) are unchanged. ``Settings.JSON_BODY_FAST_PATH`` turns
+the fast path off.
+
+Endpoints marked with ``@cache_response`` (see ``response_cache``) get
+ETags and are answered from the app's response cache when possible; those
+marked with ``@idempotent`` (see ``idempotency``) deduplicate requests that
+carry the same ``Idempotency-Key``.
+
+``NDJSONStreamingResponse`` streams ``application/x-ndjson`` from a handler
+that is still reading its request body.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+from typing import Any, Callable, Optional
+
+from fastapi import params
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from .idempotency import idempotent_handler
+from .observability.tracing import current_trace, span
+from .response_cache import CachePolicy, cached_handler
+
+try:  # pragma: no cover - orjson is optional
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            if isinstance(content, BaseModel):
+                return content.model_dump_json().encode("utf-8")
+            if orjson is not None:
+                try:
+                    return orjson.dumps(content)
+                except TypeError:
+                    pass
+            return super().render(content)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """StreamingResponse for bodies produced while the request body is still read.
+
+    Starlette's ``StreamingResponse`` listens for ``http.disconnect`` on
+    ``receive`` in parallel with streaming, which would swallow the request
+    body messages the generator is reading. Here the response only sends; a
+    client disconnect surfaces as ``ClientDisconnect`` from ``request.stream()``.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
+
+
+def _takes_response_param(endpoint) -> bool:
+    for param in inspect.signature(endpoint).parameters.values():
+        annotation = param.annotation
+        if isinstance(annotation, type) and issubclass(annotation, Response):
+            return True
+    return False
+
+
+class FastModelRoute(APIRoute):
+    """APIRoute that bypasses response re-validation for exact model instances."""
+
+    def __init__(self, path: str, endpoint, **kwargs: Any) -> None:
+        model = kwargs.get("response_model")
+        plain = not any(
+            kwargs.get(option)
+            for option in (
+                "response_model_include",
+                "response_model_exclude",
+                "response_model_exclude_unset",
+                "response_model_exclude_defaults",
+                "response_model_exclude_none",
+            )
+        ) and kwargs.get("response_model_by_alias", True)
+        if (
+            not getattr(endpoint, "__fast_model_route__", False)
+            and isinstance(model, type)
+            and issubclass(model, BaseModel)
+            and plain
+            # En Response-parameter (headers/cookies) måste slås ihop av FastAPI.
+            and not _takes_response_param(endpoint)
+        ):
+            endpoint = _fast_endpoint(endpoint, model, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        # Kompileras en gång per route; ``body_field`` är satt före detta anrop.
+        adapter = _json_body_adapter(self)
+        policy: Optional[CachePolicy] = getattr(self.endpoint, "__response_cache__", None)
+        rate_check = getattr(self.endpoint, "__rate_limit_check__", None)
+        path = self.path
+
+        run = handler
+        if adapter is not None:
+            run = _validating_handler(handler, adapter)
+            if policy is not None:
+                body_model = functools.partial(_body_model, adapter=adapter)
+                run = cached_handler(handler, policy, path, body_model, rate_check)
+        if getattr(self.endpoint, "__idempotent__", False):
+            run = idempotent_handler(run, path, rate_check)
+
+        async def traced_handler(request: Request) -> Response:
+            trace = current_trace()
+            if trace is not None:
+                trace.mark("route")
+            return await run(request)
+
+        return traced_handler
+
+
+def _json_body_adapter(route: APIRoute) -> Optional[TypeAdapter]:
+    field = route.body_field
+    if field is None or route._embed_body_fields or isinstance(field.field_info, params.Form):
+        return None
+    model = field.field_info.annotation
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        return None
+    return TypeAdapter(model)
+
+
+def _fast_path_enabled(request: Request) -> bool:
+    settings = getattr(request.app.state, "settings", None)
+    return getattr(settings, "JSON_BODY_FAST_PATH", True)
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return True  # FastAPI tolkar body utan content-type som JSON
+    mime = content_type.split(";", 1)[0].strip().lower()
+    return mime == "application/json" or (
+        mime.startswith("application/") and mime.endswith("+json")
+    )
+
+
+async def _prevalidate_json_body(request: Request, adapter: TypeAdapter) -> Optional[BaseModel]:
+    if not _is_json(request.headers.get("content-type")):
+        return None
+    body = await request.body()
+    if not body:
+        return None
+    try:
+        model = adapter.validate_json(body)
+    except ValidationError:
+        return None  # FastAPI validerar igen och bygger sitt vanliga 422-svar
+    # ``request.json()`` returnerar den cachade modellen i stället för en dict.
+    request._json = model
+    return model
+
+
+async def _body_model(request: Request, adapter: TypeAdapter) -> Optional[BaseModel]:
+    model = await _prevalidate_json_body(request, adapter)
+    if model is not None and not _fast_path_enabled(request):
+        del request._json  # modellen behövs bara för cachenyckeln
+    return model
+
+
+def _validating_handler(handler: Callable, adapter: TypeAdapter) -> Callable:
+    async def run(request: Request) -> Response:
+        if _fast_path_enabled(request):
+            await _prevalidate_json_body(request, adapter)
+        return await handler(request)
+
+    return run
+
+
+def _fast_endpoint(endpoint, model: type, status_code):
+    code = status_code or 200
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            trace = current_trace()
+            if trace is not None:
+                trace.add_since("validate", "route")
+            with span("endpoint"):
+                result = await endpoint(*args, **kwargs)
+            if type(result) is model:
+                return FastJSONResponse(result, status_code=code)
+            return result
+
+        async_wrapper.__fast_model_route__ = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        trace = current_trace()
+        if trace is not None:
+            trace.add_since("validate", "route")
+        with span("endpoint"):
+            result = endpoint(*args, **kwargs)
+        if type(result) is model:
+            return FastJSONResponse(result, status_code=code)
+        return result
+
+    sync_wrapper.__fast_model_route__ = True
+    return sync_wrapper
@@ -1 +1 @@
-from . import agent, health, sentiment, summarize, vote  # noqa: F401
+from . import agent, decisions, health, sentiment, summarize, vote  # noqa: F401
@@ -0,0 +1,47 @@
+import hmac
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+
+from ..dependencies import api_key_guard
+from ..observability.profiler import ProfilerBusyError, profile
+from ..ratelimit import limit
+from ..responses import FastJSONResponse, FastModelRoute
+
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
+
+
+def admin_key_guard(req: Request):
+    settings = req.app.state.settings
+    # Avstängt i prod om det inte slås på uttryckligen.
+    if not settings.profiler_enabled or not settings.ADMIN_API_KEY:
+        # Dölj endpointen helt när den inte är aktiverad.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    key = req.headers.get("x-admin-key", "")
+    if not hmac.compare_digest(key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
+
+
+@router.get("/admin/profile", dependencies=[Depends(admin_key_guard)])
+@limit("6/minute")
+async def admin_profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    path: Optional[str] = Query(None, description="Profile only requests under this path"),
+):
+    try:
+        result = await profile(
+            min(seconds, request.app.state.settings.PROFILER_MAX_SECONDS),
+            interval=interval_ms / 1000,
+            path_prefix=path,
+        )
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+    headers = {"x-profile-samples": str(result.sample_count)}
+    if format == "speedscope":
+        return FastJSONResponse(result.speedscope(name=path or "worker"), headers=headers)
+    return PlainTextResponse(result.collapsed(), headers=headers)
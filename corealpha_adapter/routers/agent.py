@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 
-from ..app import api_key_guard, limiter
+from ..dependencies import api_key_guard
+from ..ratelimit import limit
+from ..response_cache import cache_response
+from ..responses import FastModelRoute
 from ..schemas import AgentProposalRequest, AgentProposalResponse
 from ..services.agents.registry import AgentRegistry, get_agent_registry
 
-router = APIRouter(dependencies=[Depends(api_key_guard)])
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
 
 
 @router.post("/agent/propose", response_model=AgentProposalResponse)
-@limiter.limit("30/minute")
+@cache_response(max_age=60)
+@limit("30/minute")
 def agent_propose(
     req: AgentProposalRequest,
     request: Request,
@@ -17,7 +21,8 @@ def agent_propose(
     agent = reg.get(req.agent)
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent '{req.agent}' ej registrerad")
-    return agent.propose(
+    return reg.propose(
+        agent,
         ticker=req.ticker,
         sentiment=req.sentiment,
         price=req.price,
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from ..dependencies import api_key_guard
+from ..ratelimit import limit
+from ..responses import FastModelRoute
+from ..schemas import DecisionPage, DecisionRecord
+from ..services.decisions import InvalidCursor
+
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # naiva tider tolkas som UTC
+    return value.timestamp()
+
+
+@router.get("/decisions", response_model=DecisionPage)
+@limit("60/minute")
+async def decisions(
+    request: Request,
+    ticker: Optional[str] = Query(None, min_length=1, max_length=16),
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, max_length=64),
+):
+    store = request.app.state.decisions
+    if store is None:
+        # Dölj endpointen när historiken inte är konfigurerad.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    try:
+        items, next_cursor = await run_in_threadpool(
+            store.query, ticker, _epoch(start), _epoch(end), limit, cursor
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    records = [
+        DecisionRecord(**{**item, "ts": datetime.fromtimestamp(item["ts"], timezone.utc)})
+        for item in items
+    ]
+    return DecisionPage(items=records, next_cursor=next_cursor)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-router = APIRouter()
+from ..responses import FastModelRoute
+
+router = APIRouter(route_class=FastModelRoute)
 
 
 @router.get("/health")
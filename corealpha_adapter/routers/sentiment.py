@@ -1,14 +1,17 @@
-from typing import Any, Iterable, List
+from typing import Any, Iterable, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
 
-from ..app import api_key_guard, limiter
+from ..dependencies import api_key_guard
+from ..idempotency import idempotent
 from ..providers import ProviderCircuitOpenError, ProviderConfigurationError, ProviderError
+from ..ratelimit import limit
+from ..responses import FastModelRoute, NDJSONStreamingResponse
 from ..schemas import SentimentRequest, SentimentResponse, Source
 from ..services.llm_router import get_provider
+from ..services.sentiment_stream import iter_lines, score_stream
 
-router = APIRouter(dependencies=[Depends(api_key_guard)])
-provider = get_provider()
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
 
 
 def _coerce_sources(raw_sources: Any) -> List[Source]:
@@ -26,14 +29,15 @@ def _coerce_sources(raw_sources: Any) -> List[Source]:
 
 
 @router.post("/sentiment", response_model=SentimentResponse)
-@limiter.limit("30/minute")
+@idempotent()
+@limit("30/minute")
 async def sentiment(
     request: Request,
     req: SentimentRequest = Body(...),
 ):
     payload = req.model_dump(exclude_none=True)
     try:
-        result = await provider.sentiment(payload)
+        result = await get_provider().sentiment(payload)
     except ProviderConfigurationError as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
     except ProviderCircuitOpenError as exc:
@@ -66,3 +70,32 @@ async def sentiment(
         ]
 
     return SentimentResponse(score=round(score, 3), rationale=rationale, sources=sources)
+
+
+@router.post(
+    "/sentiment/stream",
+    response_class=NDJSONStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+@limit("10/minute")
+async def sentiment_stream(
+    request: Request,
+    ticker: Optional[str] = Query(None, min_length=1, max_length=16),
+):
+    """Score an NDJSON body line by line; one NDJSON result per input line."""
+
+    settings = request.app.state.settings
+    lines = iter_lines(request.stream())
+    stream = score_stream(
+        lines,
+        get_provider(),
+        ticker,
+        settings.SENTIMENT_STREAM_CHUNK,
+        settings.SUMMARIZE_CONCURRENCY,
+    )
+    return NDJSONStreamingResponse(stream)
@@ -1,15 +1,27 @@
 import time
 from typing import Any, Iterable, List
 
+import structlog
 from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
 
-from ..app import api_key_guard, limiter
+from ..dependencies import api_key_guard
+from ..idempotency import idempotent
 from ..providers import ProviderCircuitOpenError, ProviderConfigurationError, ProviderError
-from ..schemas import Source, SummarizeRequest, SummarizeResponse
+from ..ratelimit import limit
+from ..responses import FastModelRoute
+from ..schemas import (
+    MAX_LONG_TEXT_LEN,
+    MAX_TEXT_LEN,
+    LongSummarizeRequest,
+    LongSummarizeResponse,
+    Source,
+    SummarizeRequest,
+    SummarizeResponse,
+)
 from ..services.llm_router import get_provider
 
-router = APIRouter(dependencies=[Depends(api_key_guard)])
-provider = get_provider()
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
+log = structlog.get_logger()
 
 
 def _coerce_sources(raw_sources: Any, fallback: List[Source]) -> List[Source]:
@@ -27,15 +39,29 @@ def _coerce_sources(raw_sources: Any, fallback: List[Source]) -> List[Source]:
 
 
 @router.post("/summarize", response_model=SummarizeResponse)
-@limiter.limit("30/minute")
+@idempotent()
+@limit("30/minute")
 async def summarize(
     request: Request,
     req: SummarizeRequest = Body(...),
 ):
     payload = req.model_dump(exclude_none=True)
     start = time.perf_counter()
+    page_title = None
+    fetcher = request.app.state.fetcher
+    if req.url and not req.text and fetcher is not None:
+        from ..services.fetcher import FetchError
+
+        try:
+            page = await fetcher.fetch(req.url)
+        except FetchError as exc:
+            # Som tidigare: providern får bara url:en.
+            log.warning("url_fetch_failed", url=req.url, error=str(exc))
+        else:
+            payload["text"] = page.text[:MAX_TEXT_LEN]
+            page_title = page.title
     try:
-        result = await provider.summarize(payload)
+        result = await get_provider().summarize(payload)
     except ProviderConfigurationError as exc:  # missing API key, etc.
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
     except ProviderCircuitOpenError as exc:
@@ -60,7 +86,7 @@ async def summarize(
 
     fallback_sources: List[Source] = []
     if req.url:
-        fallback_sources.append(Source(title="Källa", url=req.url))
+        fallback_sources.append(Source(title=page_title or "Källa", url=req.url))
     if req.ticker:
         fallback_sources.append(Source(title=f"{req.ticker} (stub)", url="http://example.com/ir"))
 
@@ -77,3 +103,60 @@ async def summarize(
         sources=sources,
         latency_ms=latency_ms,
     )
+
+
+@router.post("/summarize/long", response_model=LongSummarizeResponse)
+@idempotent()
+@limit("10/minute")
+async def summarize_long(
+    request: Request,
+    req: LongSummarizeRequest = Body(...),
+):
+    start = time.perf_counter()
+    text = req.text
+    page_title = None
+    if text is None:
+        fetcher = request.app.state.fetcher
+        if not req.url or fetcher is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="text or a fetchable url is required",
+            )
+        from ..services.fetcher import FetchError
+
+        try:
+            page = await fetcher.fetch(req.url)
+        except FetchError as exc:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+        text, page_title = page.text[:MAX_LONG_TEXT_LEN], page.title
+
+    try:
+        result, stats = await request.app.state.long_summarizer.summarize(
+            get_provider(), text, ticker=req.ticker
+        )
+    except ProviderConfigurationError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    except ProviderCircuitOpenError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)
+        ) from exc
+    except ProviderError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+
+    summary_text = str(result.get("summary", ""))
+    if not summary_text:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Provider returned an empty summary",
+        )
+    sources = _coerce_sources(result.get("sources"), [])
+    if req.url:
+        sources.insert(0, Source(title=page_title or "Källa", url=req.url))
+
+    return LongSummarizeResponse(
+        summary=summary_text,
+        impact=str(result.get("impact", "Okänd")),
+        sources=sources,
+        latency_ms=int((time.perf_counter() - start) * 1000),
+        **stats,
+    )
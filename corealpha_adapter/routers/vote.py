@@ -1,23 +1,46 @@
 from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
 
-from ..app import api_key_guard, limiter
+from ..dependencies import api_key_guard
+from ..idempotency import idempotent
 from ..providers import ProviderCircuitOpenError, ProviderConfigurationError, ProviderError
+from ..ratelimit import limit
+from ..response_cache import cache_response
+from ..responses import FastModelRoute
 from ..schemas import VoteRequest, VoteResponse
 from ..services.llm_router import get_provider
 
-router = APIRouter(dependencies=[Depends(api_key_guard)])
-provider = get_provider()
+router = APIRouter(dependencies=[Depends(api_key_guard)], route_class=FastModelRoute)
+
+
+def _record_decision(request: Request, req: VoteRequest, response: VoteResponse) -> None:
+    store = request.app.state.decisions
+    if store is not None:
+        store.record(
+            response.decision,
+            response.calibrated_probs,
+            response.explain.model_dump(),
+            req.model_dump(include={"proposals"})["proposals"],
+            ticker=req.ticker,
+        )
+
+
+def _record_cached_decision(request: Request, req: VoteRequest, body: bytes) -> None:
+    # Cacheträffen är också en röstning; spara den som om handlern hade körts.
+    if request.app.state.decisions is not None:
+        _record_decision(request, req, VoteResponse.model_validate_json(body))
 
 
 @router.post("/vote", response_model=VoteResponse)
-@limiter.limit("30/minute")
+@cache_response(max_age=60, on_hit=_record_cached_decision)
+@idempotent()
+@limit("30/minute")
 async def vote(
     request: Request,
     req: VoteRequest = Body(...),
 ):
-    payload = req.model_dump()
+    payload = req.model_dump(exclude={"ticker"})
     try:
-        result = await provider.vote(payload)
+        result = await get_provider().vote(payload)
     except ProviderConfigurationError as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
     except ProviderCircuitOpenError as exc:
@@ -28,17 +51,20 @@ async def vote(
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
     if isinstance(result, VoteResponse):
-        return result
-    if isinstance(result, dict):
+        response = result
+    elif isinstance(result, dict):
         try:
-            return VoteResponse.model_validate(result)
+            response = VoteResponse.model_validate(result)
         except Exception as exc:  # pragma: no cover - defensive
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Provider returned an invalid vote payload",
             ) from exc
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Provider returned an unsupported vote payload",
+        )
 
-    raise HTTPException(
-        status_code=status.HTTP_502_BAD_GATEWAY,
-        detail="Provider returned an unsupported vote payload",
-    )
+    _record_decision(request, req, response)
+    return response
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, List, Literal, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, conlist, constr
 
 MAX_TEXT_LEN = int(os.getenv("MAX_TEXT_LEN", "5000"))
 MAX_ITEMS = int(os.getenv("MAX_ITEMS", "200"))
+MAX_LONG_TEXT_LEN = int(os.getenv("MAX_LONG_TEXT_LEN", "500000"))
 
 TextStr = constr(strip_whitespace=True, min_length=1, max_length=MAX_TEXT_LEN)
 TickerStr = constr(strip_whitespace=True, min_length=1, max_length=16)
@@ -34,11 +36,33 @@ class SummarizeResponse(BaseModel):
     latency_ms: int
 
 
+class LongSummarizeRequest(BaseModel):
+    """Long document (10-K, transcript) summarized chunk by chunk; ``url`` is fetched."""
+
+    ticker: Optional[TickerStr] = None
+    url: Optional[str] = Field(default=None, max_length=2048)
+    text: Optional[constr(strip_whitespace=True, min_length=1, max_length=MAX_LONG_TEXT_LEN)] = None
+
+
+class LongSummarizeResponse(SummarizeResponse):
+    chunks: int
+    provider_calls: int
+    cached_calls: int
+    truncated: bool = False
+
+
 class SentimentRequest(BaseModel):
     ticker: Optional[TickerStr] = None
     texts: conlist(TextStr, min_length=1, max_length=MAX_ITEMS)
 
 
+class SentimentStreamItem(BaseModel):
+    """One NDJSON line of ``/sentiment/stream`` (a bare JSON string is also accepted)."""
+
+    id: Optional[Union[str, int]] = None
+    text: TextStr
+
+
 class SentimentResponse(BaseModel):
     score: float
     rationale: str
@@ -70,6 +94,18 @@ class VoteProposal(BaseModel):
 
 class VoteRequest(BaseModel):
     proposals: conlist(VoteProposal, min_length=1, max_length=MAX_ITEMS)
+    # Skickas inte till providern; används bara som index i beslutshistoriken.
+    ticker: Optional[TickerStr] = None
+
+
+class AnalyzeRequest(BaseModel):
+    """Full chain for one ticker: summarize → sentiment → agents → vote."""
+
+    ticker: TickerStr
+    url: Optional[str] = Field(default=None, max_length=2048)
+    text: Optional[TextStr] = None
+    price: Optional[float] = Field(default=None, ge=0.0)
+    agents: Optional[conlist(AgentNameStr, min_length=1, max_length=MAX_ITEMS)] = None
 
 
 class VoteExplain(BaseModel):
@@ -83,6 +119,18 @@ class VoteResponse(BaseModel):
     calibrated_probs: Dict[str, float]
 
 
+class DecisionRecord(VoteResponse):
+    id: int
+    ts: datetime
+    ticker: Optional[str] = None
+    proposals: List[VoteProposal]
+
+
+class DecisionPage(BaseModel):
+    items: List[DecisionRecord]
+    next_cursor: Optional[str] = None
+
+
 # Backwards compatible aliases (legacy names)
 SummarizeReq = SummarizeRequest
 SummarizeResp = SummarizeResponse
@@ -95,17 +143,24 @@ VoteReq = VoteRequest
 VoteResp = VoteResponse
 
 __all__ = [
+    "AnalyzeRequest",
     "AgentProposalReq",
     "AgentProposalRequest",
     "AgentProposalResp",
     "AgentProposalResponse",
     "AgentNameStr",
+    "DecisionPage",
+    "DecisionRecord",
+    "LongSummarizeRequest",
+    "LongSummarizeResponse",
     "MAX_ITEMS",
+    "MAX_LONG_TEXT_LEN",
     "MAX_TEXT_LEN",
     "SentimentReq",
     "SentimentRequest",
     "SentimentResp",
     "SentimentResponse",
+    "SentimentStreamItem",
     "Source",
     "SummarizeReq",
     "SummarizeRequest",
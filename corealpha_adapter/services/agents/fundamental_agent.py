@@ -1,6 +1,8 @@
+import math
 from typing import Optional
 
 from ...schemas import AgentProposalResponse
+from ..fundamentals import get_fundamentals_store
 from .base import IAgent, deterministic_rng
 
 
@@ -17,6 +19,16 @@ class FundamentalAgent(IAgent):
         rng = deterministic_rng(ticker, self.name)
         pe = 15 + rng.random() * 30
         gm = 0.40 + rng.random() * 0.30
+        rationale = "Värdering vs kvalitet (stub)."
+
+        # Snapshoten laddas i lifespan/poll-tråden; saknas den används stub-värden.
+        store = get_fundamentals_store()
+        row = store.get(ticker) if store is not None else None
+        if row and not math.isnan(row["pe"]) and not math.isnan(row["gross_margin"]):
+            pe = row["pe"]
+            gm = row["gross_margin"]
+            rationale = "Värdering vs kvalitet (snapshot)."
+
         vote = "BUY" if (gm > 0.55 and pe < 35) else ("SELL" if (gm < 0.45 and pe > 28) else "HOLD")
         conf = 0.5 + rng.random() * 0.4
         return AgentProposalResponse(
@@ -24,6 +36,6 @@ class FundamentalAgent(IAgent):
             vote=vote,
             weight=self.default_weight,
             confidence=conf,
-            rationale="Värdering vs kvalitet (stub).",
+            rationale=rationale,
             features=[f"PE fwd {pe:.1f}x", f"GM {int(gm * 100)}%"],
         )
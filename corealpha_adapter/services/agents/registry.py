@@ -1,5 +1,8 @@
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional
 
+from ...observability.metrics import AGENT_PROPOSE_SECONDS
+from ...observability.tracing import record
 from .base import IAgent
 from .fundamental_agent import FundamentalAgent
 from .macro_agent import MacroAgent
@@ -23,9 +26,35 @@ class AgentRegistry:
     def get(self, name: str) -> Optional[IAgent]:
         return self._agents.get(name)
 
+    def names(self) -> List[str]:
+        return list(self._agents)
 
-_reg = AgentRegistry()
+    def propose(self, agent: IAgent, ticker: str, sentiment=None, price=None):
+        """Run ``agent.propose`` and time it per agent."""
+
+        name = getattr(agent, "name", None)
+        label = name if self._agents.get(name) is agent else "other"
+        started = time.perf_counter()
+        try:
+            return agent.propose(ticker=ticker, sentiment=sentiment, price=price)
+        finally:
+            ended = time.perf_counter()
+            AGENT_PROPOSE_SECONDS.labels(agent=label).observe(ended - started)
+            record("agent", started, ended, agent=label)
+
+
+_reg: Optional[AgentRegistry] = None
 
 
 def get_agent_registry() -> AgentRegistry:
+    global _reg
+    if _reg is None:
+        _reg = AgentRegistry()
     return _reg
+
+
+def reset_agent_registry() -> None:
+    """Drop the cached registry (useful in tests)."""
+
+    global _reg
+    _reg = None
@@ -0,0 +1,246 @@
+"""Append-only history of ``/vote`` decisions in a WAL-mode SQLite file.
+
+``record`` only puts the decision on a bounded queue; a daemon thread writes
+batches in one transaction each, so the request path never touches the disk.
+When the queue is full the decision is dropped and counted in
+``corealpha_decisions_dropped_total``.
+
+Rows are indexed by ``(ticker, ts)`` and ``ts`` for time-range queries and
+paged newest first with a keyset cursor. The writer deletes rows older than
+the retention period every ``compact_interval`` seconds and returns the
+space to the file system (incremental vacuum plus WAL checkpoint).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.background import BackgroundWriter
+from ..observability.metrics import DECISIONS_COMPACTED, DECISIONS_DROPPED, DECISIONS_WRITTEN
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    ticker TEXT,
+    decision TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_ticker_ts ON decisions (ticker, ts, id);
+CREATE INDEX IF NOT EXISTS decisions_ts ON decisions (ts, id);
+"""
+
+Row = Tuple[float, Optional[str], str, str]
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that was not produced by :meth:`DecisionStore.query`."""
+
+
+def encode_cursor(ts: float, row_id: int) -> str:
+    return f"{ts!r}:{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    ts, sep, row_id = cursor.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return float(ts), int(row_id)
+    except ValueError:
+        raise InvalidCursor(f"invalid cursor: {cursor!r}") from None
+
+
+class DecisionStore:
+    """:class:`BackgroundWriter` in front of a SQLite decision table.
+
+    The writer thread owns one connection; ``query`` reads through a separate
+    connection per calling thread, so reads never wait for a write batch.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: float = 90.0,
+        batch_size: int = 256,
+        maxsize: int = 10_000,
+        flush_interval: float = 0.5,
+        compact_interval: float = 3600.0,
+    ) -> None:
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self._writer = BackgroundWriter(
+            self._write,
+            name="decision-writer",
+            maxsize=maxsize,
+            batch_size=batch_size,
+            on_drop=DECISIONS_DROPPED.inc,
+            maintenance=self.compact,
+            maintenance_interval=compact_interval,
+            poll_interval=flush_interval,
+        )
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._pid: Optional[int] = None
+        self._local = threading.local()
+        self._readers: List[Any] = []
+        self._readers_lock = threading.Lock()
+        self._generation = 0
+        self._schema_key: Optional[Tuple[int, int]] = None
+
+    @property
+    def dropped(self) -> int:
+        return self._writer.dropped
+
+    # --- write path ---
+
+    def record(
+        self,
+        decision: str,
+        calibrated_probs: Dict[str, float],
+        explain: Dict[str, Any],
+        proposals: List[Dict[str, Any]],
+        ticker: Optional[str] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        """Queue one decision; never blocks."""
+
+        self.start()
+        data = {"calibrated_probs": calibrated_probs, "explain": explain, "proposals": proposals}
+        self._writer.submit((time.time() if ts is None else ts, ticker, decision, data))
+
+    def start(self) -> None:
+        self._writer.start()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until every queued decision has been written (``True`` on success)."""
+
+        return self._writer.flush(timeout)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the writer and close every connection, also when the queue did not drain."""
+
+        self._writer.close(timeout)
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._generation += 1
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+    def _open(self):
+        import sqlite3
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        return sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+
+    def _connection(self):
+        # Anslutningar får inte ärvas över fork; öppna en ny per process.
+        if self._conn is None or self._pid != os.getpid():
+            conn = self._open()
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # verkar bara på en ny fil
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+            self._schema_key = (self._pid, self._generation)
+        return self._conn
+
+    def _reader(self):
+        local = self._local
+        key = (os.getpid(), self._generation)
+        if getattr(local, "key", None) != key:
+            if self._schema_key != key:
+                with self._db_lock:
+                    self._connection()  # skapar filen, WAL-läget och schemat
+            conn = self._open()
+            conn.execute("PRAGMA query_only=ON")
+            with self._readers_lock:
+                self._readers.append(conn)
+            local.conn, local.key = conn, key
+        return local.conn
+
+    def _write(self, batch: List[Tuple[float, Optional[str], str, Dict[str, Any]]]) -> None:
+        rows: List[Row] = [
+            (ts, ticker, decision, json.dumps(data, separators=(",", ":")))
+            for ts, ticker, decision, data in batch
+        ]
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT INTO decisions (ts, ticker, decision, data) VALUES (?, ?, ?, ?)", rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        DECISIONS_WRITTEN.inc(len(rows))
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Delete decisions older than the retention period; returns the number removed."""
+
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        with self._db_lock:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM decisions WHERE ts < ?", (cutoff,)).rowcount
+            if removed:
+                conn.execute("PRAGMA incremental_vacuum")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if removed:
+            DECISIONS_COMPACTED.inc(removed)
+        return removed
+
+    # --- read path (call from a worker thread) ---
+
+    def query(
+        self,
+        ticker: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Decisions newest first, ``start <= ts < end``; returns ``(items, next_cursor)``."""
+
+        clauses, params = [], []
+        if ticker is not None:
+            clauses.append("ticker = ?")
+            params.append(ticker)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if cursor is not None:
+            ts, row_id = decode_cursor(cursor)
+            clauses.append("(ts < ? OR (ts = ? AND id < ?))")
+            params.extend((ts, ts, row_id))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT id, ts, ticker, decision, data FROM decisions {where} "
+            "ORDER BY ts DESC, id DESC LIMIT ?"
+        )
+        rows = self._reader().execute(sql, (*params, limit + 1)).fetchall()
+        items = [
+            {"id": row_id, "ts": ts, "ticker": tick, "decision": decision, **json.loads(data)}
+            for row_id, ts, tick, decision, data in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["ts"], last["id"])
+        return items, next_cursor
@@ -0,0 +1,390 @@
+"""Fetch ``SummarizeRequest.url`` and extract the article text for the provider.
+
+One pooled ``httpx.AsyncClient`` is shared by all requests; a semaphore per
+host caps concurrent connections to any single site. Bodies are streamed and
+aborted once they exceed ``max_bytes``, and the whole fetch (redirects
+included) has a deadline.
+
+Extracted pages are kept in an LRU. Within ``cache_seconds`` a page is served
+without touching the network; after that it is revalidated with
+``If-None-Match``/``If-Modified-Since`` and a ``304`` keeps the cached text.
+
+Hosts resolving to private, loopback or link-local addresses are refused
+unless ``allow_private`` is set, so the endpoint cannot be used to probe the
+internal network. The check runs in the network backend below httpx's
+connection pool: the name is resolved, vetted and connected to in one step,
+so a DNS answer that changes between check and connect (rebinding) cannot
+redirect it inward, while the pool, TLS SNI and certificate checks stay keyed
+by hostname.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import re
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from ..observability.metrics import URL_FETCH_EVENTS, URL_FETCH_SECONDS
+
+_TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+_USER_AGENT = "CoreAlpha-Adapter/1.0 (+summarize)"
+
+
+class FetchError(Exception):
+    """Raised when a URL cannot be fetched or yields no usable text."""
+
+
+@dataclass
+class Page:
+    url: str
+    title: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fresh_until: float = 0.0
+
+
+# --- extraction ---
+
+_SKIP = {
+    "script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form",
+}  # fmt: skip
+_BLOCKS = {
+    "p", "div", "section", "article", "main", "li", "blockquote", "pre", "td", "br",
+    "h1", "h2", "h3", "h4", "h5", "h6", "tr", "table", "ul", "ol", "dd", "dt", "figcaption",
+}  # fmt: skip
+_VOID = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+_WS = re.compile(r"\s+")
+
+
+class _ArticleParser(HTMLParser):
+    """Collects text blocks, remembering which ones sit inside ``<article>``/``<main>``."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[Tuple[str, bool, bool]] = []  # (text, in_article, in_main)
+        self._buf: List[str] = []
+        self._skip = 0
+        self._article = 0
+        self._main = 0
+        self._in_title = False
+
+    def _flush(self) -> None:
+        text = _WS.sub(" ", "".join(self._buf)).strip()
+        self._buf = []
+        if text:
+            self.blocks.append((text, self._article > 0, self._main > 0))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in _BLOCKS:
+            self._flush()
+        if tag == "article":
+            self._article += 1
+        elif tag == "main":
+            self._main += 1
+
+    def handle_endtag(self, tag):
+        if tag in _VOID:
+            return
+        if tag in _SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        if tag in _BLOCKS:
+            self._flush()
+        if tag == "article":
+            self._article = max(0, self._article - 1)
+        elif tag == "main":
+            self._main = max(0, self._main - 1)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self._buf.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_text(html: str) -> Tuple[str, str]:
+    """Return ``(title, text)`` for the main content of an HTML page.
+
+    Prefers the blocks inside ``<article>``, then ``<main>``, then the whole
+    document minus navigation, headers, footers, scripts and forms.
+    """
+
+    parser = _ArticleParser()
+    parser.feed(html)
+    parser.close()
+    blocks = parser.blocks
+    for pick in (1, 2):
+        chosen = [b for b in blocks if b[pick]]
+        if chosen:
+            blocks = chosen
+            break
+    text = "\n\n".join(b[0] for b in blocks)
+    return _WS.sub(" ", parser.title).strip(), text
+
+
+# --- fetching ---
+
+
+def _is_public(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return True  # namn kontrolleras efter uppslag
+    return address.is_global
+
+
+class _VettingBackend(httpcore.AsyncNetworkBackend):
+    """Resolves, vets and connects in one step, under the connection pool."""
+
+    def __init__(self, vet) -> None:
+        self._vet = vet
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self, host, port, timeout=None, local_address=None, socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        address = await self._vet(host, port)
+        return await self._backend.connect_tcp(
+            address,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _VettingTransport(httpx.AsyncHTTPTransport):
+    """``AsyncHTTPTransport`` whose pool connects through :class:`_VettingBackend`."""
+
+    def __init__(self, vet, limits: httpx.Limits) -> None:
+        super().__init__(limits=limits)
+        # httpx 0.27 tar ingen network_backend; poolen byggs om med samma inställningar.
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_VettingBackend(vet),
+        )
+
+
+class UrlFetcher:
+    """Pooled, size- and time-bounded page fetcher with a revalidating cache."""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_bytes: int = 2_000_000,
+        max_connections: int = 50,
+        per_host: int = 4,
+        cache_seconds: float = 300.0,
+        cache_max_entries: int = 256,
+        allow_private: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.cache_seconds = cache_seconds
+        self.cache_max_entries = cache_max_entries
+        self.allow_private = allow_private
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+        self._cache: "OrderedDict[str, Page]" = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=limits,
+                follow_redirects=False,
+                headers={"user-agent": _USER_AGENT, "accept": ", ".join(_TEXT_TYPES)},
+                transport=self._transport or _VettingTransport(self._resolve, limits),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> Page:
+        """Return the extracted page for ``url``; raises :class:`FetchError`."""
+
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                page, event = await self._fetch(url)
+        except TimeoutError:
+            URL_FETCH_EVENTS.labels(event="error").inc()
+            raise FetchError(f"Fetching {url} timed out") from None
+        except FetchError:
+            URL_FETCH_EVENTS.labels(event="error").inc()
+            raise
+        URL_FETCH_EVENTS.labels(event=event).inc()
+        if event != "hit":
+            URL_FETCH_SECONDS.observe(time.perf_counter() - started)
+        return page
+
+    async def _fetch(self, url: str) -> Tuple[Page, str]:
+        cached = self._cache.get(url)
+        if cached is not None:
+            self._cache.move_to_end(url)
+            if cached.fresh_until > time.monotonic():
+                return cached, "hit"
+
+        current = url
+        for _ in range(5):
+            response_page = await self._get(current, url, cached)
+            if isinstance(response_page, Page):
+                return response_page, "fetched"
+            if response_page is None:
+                cached.fresh_until = time.monotonic() + self.cache_seconds
+                return cached, "revalidated"
+            current = response_page  # redirect
+        raise FetchError(f"Too many redirects for {url}")
+
+    async def _resolve(self, host: str, port: int) -> str:
+        """Refuse non-public hosts; returns the vetted address to connect to."""
+
+        if self.allow_private:
+            return host
+        if not _is_public(host):
+            raise FetchError(f"Refusing to fetch non-public address {host}")
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return host  # IP-literal: inget uppslag att fästa
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+        except OSError as exc:
+            raise FetchError(f"Cannot resolve {host}") from exc
+        if not infos or not all(_is_public(info[4][0]) for info in infos):
+            raise FetchError(f"Refusing to fetch non-public address {host}")
+        return infos[0][4][0]
+
+    async def _get(self, url: str, cache_key: str, cached: Optional[Page]):
+        """One hop: a :class:`Page`, ``None`` for 304, or the redirect target."""
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise FetchError(f"Unsupported URL: {url}")
+        host = parts.hostname.lower()
+        if not self.allow_private and not _is_public(host):
+            raise FetchError(f"Refusing to fetch non-public address {host}")
+
+        headers = {}
+        if cached is not None and url == cache_key:
+            if cached.etag:
+                headers["if-none-match"] = cached.etag
+            if cached.last_modified:
+                headers["if-modified-since"] = cached.last_modified
+
+        semaphore, users = self._hosts.get(host) or (asyncio.Semaphore(self.per_host), 0)
+        self._hosts[host] = (semaphore, users + 1)
+        try:
+            await semaphore.acquire()
+            try:
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and headers:
+                        return None
+                    if response.is_redirect:
+                        location = response.headers.get("location")
+                        if not location:
+                            raise FetchError(f"Redirect without location from {url}")
+                        return str(response.url.join(location))
+                    if response.status_code != 200:
+                        raise FetchError(f"{url} answered {response.status_code}")
+                    content_type = response.headers.get("content-type", "text/html")
+                    media_type = content_type.split(";")[0].strip().lower()
+                    if not media_type.startswith(_TEXT_TYPES):
+                        raise FetchError(f"Unsupported content type {content_type!r}")
+                    body = await self._read_capped(response)
+                    encoding = response.charset_encoding or "utf-8"
+            except httpx.HTTPError as exc:
+                raise FetchError(f"Fetching {url} failed: {exc.__class__.__name__}") from exc
+            finally:
+                semaphore.release()
+        finally:
+            # Släpp semaforen när ingen använder värden, så mappen inte växer obegränsat.
+            semaphore, users = self._hosts[host]
+            if users <= 1:
+                del self._hosts[host]
+            else:
+                self._hosts[host] = (semaphore, users - 1)
+
+        try:
+            decoded = body.decode(encoding, errors="replace")
+        except LookupError:
+            decoded = body.decode("utf-8", errors="replace")
+        if media_type == "text/plain":
+            title, text = "", _WS.sub(" ", decoded).strip()
+        else:
+            title, text = extract_text(decoded)
+        if not text:
+            raise FetchError(f"No text content at {url}")
+        page = Page(
+            url=cache_key,
+            title=title,
+            text=text,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            fresh_until=time.monotonic() + self.cache_seconds,
+        )
+        self._store(page)
+        return page
+
+    async def _read_capped(self, response: httpx.Response) -> bytes:
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchError(f"Response larger than {self.max_bytes} bytes")
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise FetchError(f"Response larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _store(self, page: Page) -> None:
+        if self.cache_max_entries <= 0:
+            return
+        self._cache.pop(page.url, None)
+        while self._cache and len(self._cache) >= self.cache_max_entries:
+            self._cache.popitem(last=False)
+        self._cache[page.url] = page
@@ -0,0 +1,419 @@
+"""Memory-mapped fundamentals snapshot store with an O(1) ticker index.
+
+A CSV/Parquet snapshot (one row per ticker) is compiled into a compact binary
+file that every worker maps read-only, so the page cache holds a single copy
+regardless of how many uvicorn workers are running::
+
+    [magic][header len][header JSON]
+    [tickers: rows x 16 bytes]
+    [index: slots x uint32, open addressing on crc32(ticker)]
+    [column 0: rows x float64] [column 1: rows x float64] ...
+
+The store polls the source file in a background thread and swaps in a freshly
+compiled snapshot atomically when the file changes.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from typing import IO, Dict, List, Optional, Tuple
+
+_MAGIC = b"CAFUND1\n"
+_PREAMBLE = struct.Struct("<8sI")
+_TICKER_WIDTH = 16
+_EMPTY_SLOT = 0xFFFFFFFF
+_ALIGN = 8
+
+REQUIRED_COLUMNS = ("pe", "gross_margin")
+
+
+class FundamentalsError(Exception):
+    """Raised when a fundamentals snapshot cannot be read or compiled."""
+
+
+def _normalize_ticker(ticker: str) -> Optional[bytes]:
+    key = ticker.strip().upper().encode("utf-8")
+    if not key or len(key) > _TICKER_WIDTH:
+        return None
+    return key
+
+
+def _pad(size: int) -> int:
+    return (-size) % _ALIGN
+
+
+def _slot_count(rows: int) -> int:
+    slots = 8
+    while slots < rows * 2:
+        slots *= 2
+    return slots
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if not text:
+        return math.nan
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def _read_csv(raw: IO[bytes], path: str) -> Tuple[List[str], List[str], List[List[float]]]:
+    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as fh:
+        reader = csv.reader(fh)
+        try:
+            header = [h.strip() for h in next(reader)]
+        except StopIteration:
+            raise FundamentalsError(f"{path} is empty") from None
+        lowered = [h.lower() for h in header]
+        if "ticker" not in lowered:
+            raise FundamentalsError(f"{path} has no 'ticker' column")
+        ticker_idx = lowered.index("ticker")
+        columns = [h for i, h in enumerate(lowered) if i != ticker_idx]
+        tickers: List[str] = []
+        values: List[List[float]] = [[] for _ in columns]
+        for record in reader:
+            if not record or ticker_idx >= len(record):
+                continue
+            tickers.append(record[ticker_idx])
+            col = 0
+            for i in range(len(header)):
+                if i == ticker_idx:
+                    continue
+                values[col].append(_to_float(record[i] if i < len(record) else None))
+                col += 1
+    return tickers, columns, values
+
+
+def _read_parquet(raw: IO[bytes], path: str) -> Tuple[List[str], List[str], List[List[float]]]:
+    try:
+        import pyarrow
+        import pyarrow.parquet as pq
+    except ModuleNotFoundError:  # pragma: no cover - optional dependency
+        raise FundamentalsError("pyarrow måste vara installerat för Parquet-snapshots") from None
+
+    try:
+        table = pq.read_table(raw)
+    except pyarrow.ArrowException as exc:
+        raise FundamentalsError(f"{path} is not a readable Parquet file: {exc}") from exc
+    names = {name.lower(): name for name in table.column_names}
+    if "ticker" not in names:
+        raise FundamentalsError(f"{path} has no 'ticker' column")
+    tickers = [str(t) for t in table.column(names["ticker"]).to_pylist()]
+    columns = [lower for lower in names if lower != "ticker"]
+    values = [[_to_float(v) for v in table.column(names[c]).to_pylist()] for c in columns]
+    return tickers, columns, values
+
+
+def compile_snapshot(source: str, target: str) -> None:
+    """Compile a CSV/Parquet snapshot at ``source`` into the binary format at ``target``.
+
+    The file is written next to ``target`` and moved into place with
+    ``os.replace`` so readers never observe a half-written snapshot.
+    """
+
+    read = _read_parquet if source.lower().endswith((".parquet", ".pq")) else _read_csv
+    with open(source, "rb") as src:
+        # Stämpeln tas före läsningen: skrivs filen om under tiden ser nästa
+        # refresh en ny stämpel och kompilerar om, i stället för tvärtom.
+        stat = os.fstat(src.fileno())
+        try:
+            raw_tickers, columns, values = read(src, source)
+        except (csv.Error, KeyError, UnicodeDecodeError) as exc:
+            raise FundamentalsError(f"{source} could not be parsed: {exc}") from exc
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise FundamentalsError(f"{source} is missing columns: {', '.join(missing)}")
+
+    # Sista raden vinner vid dubbletter, precis som en dict-baserad inläsning.
+    rows: Dict[bytes, int] = {}
+    for i, raw in enumerate(raw_tickers):
+        key = _normalize_ticker(raw)
+        if key is not None:
+            rows[key] = i
+    keys = list(rows)
+    picks = [rows[k] for k in keys]
+
+    slots = _slot_count(len(keys))
+    mask = slots - 1
+    index = [_EMPTY_SLOT] * slots
+    for row, key in enumerate(keys):
+        slot = zlib.crc32(key) & mask
+        while index[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        index[slot] = row
+
+    header = {
+        "version": 1,
+        "byteorder": sys.byteorder,
+        "rows": len(keys),
+        "slots": slots,
+        "columns": columns,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    header_bytes += b" " * _pad(_PREAMBLE.size + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".fundamentals-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_PREAMBLE.pack(_MAGIC, len(header_bytes)))
+            fh.write(header_bytes)
+            fh.write(b"".join(k.ljust(_TICKER_WIDTH, b"\0") for k in keys))
+            index_bytes = struct.pack(f"={slots}I", *index)
+            fh.write(index_bytes + b"\0" * _pad(len(index_bytes)))
+            for column in values:
+                fh.write(struct.pack(f"={len(picks)}d", *(column[i] for i in picks)))
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class FundamentalsSnapshot:
+    """Read-only view over a compiled snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if len(buf) < _PREAMBLE.size:
+            raise FundamentalsError(f"{path} is not a fundamentals snapshot")
+        magic, header_len = _PREAMBLE.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise FundamentalsError(f"{path} is not a fundamentals snapshot")
+        header = json.loads(bytes(buf[_PREAMBLE.size : _PREAMBLE.size + header_len]))
+        if header.get("byteorder") != sys.byteorder:
+            raise FundamentalsError(f"{path} was compiled for another byte order")
+
+        self.path = path
+        self.rows: int = header["rows"]
+        self.columns: Tuple[str, ...] = tuple(header["columns"])
+        self.source_stamp: Tuple[int, int] = (header["source_mtime_ns"], header["source_size"])
+        self._slots: int = header["slots"]
+        self._mask = self._slots - 1
+
+        offset = _PREAMBLE.size + header_len
+        self._tickers = buf[offset : offset + self.rows * _TICKER_WIDTH]
+        offset += self.rows * _TICKER_WIDTH
+        index_size = self._slots * 4
+        self._index = buf[offset : offset + index_size].cast("I")
+        offset += index_size + _pad(index_size)
+        self._columns: Dict[str, memoryview] = {}
+        for name in self.columns:
+            size = self.rows * 8
+            self._columns[name] = buf[offset : offset + size].cast("d")
+            offset += size
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def row(self, ticker: str) -> Optional[int]:
+        """Return the row number for ``ticker`` or ``None`` when it is unknown."""
+
+        key = _normalize_ticker(ticker)
+        if key is None or not self.rows:
+            return None
+        padded = key.ljust(_TICKER_WIDTH, b"\0")
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            row = self._index[slot]
+            if row == _EMPTY_SLOT:
+                return None
+            start = row * _TICKER_WIDTH
+            if self._tickers[start : start + _TICKER_WIDTH] == padded:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def value(self, ticker: str, column: str) -> Optional[float]:
+        row = self.row(ticker)
+        data = self._columns.get(column)
+        if row is None or data is None:
+            return None
+        return data[row]
+
+    def get(self, ticker: str) -> Optional[Dict[str, float]]:
+        row = self.row(ticker)
+        if row is None:
+            return None
+        return {name: data[row] for name, data in self._columns.items()}
+
+
+class FundamentalsStore:
+    """Keeps the current snapshot for ``source`` and reloads it when the file changes."""
+
+    def __init__(
+        self,
+        source: str,
+        compiled_path: Optional[str] = None,
+        poll_seconds: float = 30.0,
+    ) -> None:
+        self.source = os.path.abspath(source)
+        self.compiled_path = compiled_path or _default_compiled_path(self.source)
+        self.poll_seconds = poll_seconds
+        self._snapshot: Optional[FundamentalsSnapshot] = None
+        self._generation = 0
+        self._failed_stamp: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> Optional[FundamentalsSnapshot]:
+        """The current snapshot, or ``None`` until :meth:`refresh` has loaded one."""
+
+        return self._snapshot
+
+    @property
+    def generation(self) -> int:
+        """Monotonic counter bumped on every snapshot swap."""
+
+        return self._generation
+
+    def get(self, ticker: str) -> Optional[Dict[str, float]]:
+        snap = self.snapshot
+        return snap.get(ticker) if snap is not None else None
+
+    def refresh(self) -> bool:
+        """Reload the snapshot if the source changed. Returns ``True`` on swap.
+
+        A source that fails to compile raises :class:`FundamentalsError` once;
+        later calls skip it (returning ``False``) until the file changes again.
+        """
+
+        with self._reload_lock:
+            try:
+                stat = os.stat(self.source)
+            except FileNotFoundError:
+                return False
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            current = self._snapshot
+            if current is not None and current.source_stamp == stamp:
+                return False
+            if stamp == self._failed_stamp:
+                return False
+
+            try:
+                if _is_compiled(self.source):
+                    snap = FundamentalsSnapshot(self.source)
+                    snap.source_stamp = stamp
+                else:
+                    snap = self._open_compiled(stamp)
+                    if snap is None:
+                        compile_snapshot(self.source, self.compiled_path)
+                        snap = FundamentalsSnapshot(self.compiled_path)
+            except (FundamentalsError, ValueError):
+                # Försök inte kompilera samma trasiga fil i varje request.
+                self._failed_stamp = stamp
+                raise
+            # En enda referenstilldelning: läsare ser antingen gammal eller ny snapshot.
+            self._snapshot = snap
+            self._generation += 1
+            return True
+
+    def _open_compiled(self, stamp: Tuple[int, int]) -> Optional[FundamentalsSnapshot]:
+        # En annan worker kan redan ha kompilerat samma källa.
+        try:
+            snap = FundamentalsSnapshot(self.compiled_path)
+        except (FileNotFoundError, FundamentalsError, ValueError):
+            return None
+        return snap if snap.source_stamp == stamp else None
+
+    def start(self) -> None:
+        """Start polling the source file in a daemon thread."""
+
+        if self._thread is not None or self.poll_seconds <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="fundamentals-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except (OSError, FundamentalsError):
+                # Behåll föregående snapshot; nästa poll försöker igen.
+                continue
+
+
+def _is_compiled(path: str) -> bool:
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(len(_MAGIC)) == _MAGIC
+    except OSError:
+        return False
+
+
+def _default_compiled_path(source: str) -> str:
+    base = os.getenv("FUNDAMENTALS_CACHE_DIR") or tempfile.gettempdir()
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(base, f"corealpha-fundamentals-{digest}.bin")
+
+
+_store: Optional[FundamentalsStore] = None
+
+
+def get_fundamentals_store() -> Optional[FundamentalsStore]:
+    """Return the process-wide store configured via ``FUNDAMENTALS_PATH`` (or ``None``)."""
+
+    global _store
+    if _store is None:
+        path = os.getenv("FUNDAMENTALS_PATH", "")
+        if not path:
+            return None
+        _store = FundamentalsStore(
+            path,
+            poll_seconds=float(os.getenv("FUNDAMENTALS_RELOAD_SECONDS", "30")),
+        )
+        _store.start()
+    return _store
+
+
+def reset_fundamentals_store() -> None:
+    """Stop and drop the cached store (useful in tests)."""
+
+    global _store
+    if _store is not None:
+        _store.stop()
+    _store = None
+
+
+__all__ = [
+    "FundamentalsError",
+    "FundamentalsSnapshot",
+    "FundamentalsStore",
+    "REQUIRED_COLUMNS",
+    "compile_snapshot",
+    "get_fundamentals_store",
+    "reset_fundamentals_store",
+]
@@ -24,6 +24,10 @@ def get_provider() -> BaseLLM:
         from ..providers.fingpt import FinGPTProvider
 
         _provider = FinGPTProvider()
+    elif provider_name == "replay":
+        from ..providers.replay import ReplayProvider
+
+        _provider = ReplayProvider()
     else:
         from ..providers.stub import StubProvider
 
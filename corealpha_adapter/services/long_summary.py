@@ -0,0 +1,212 @@
+"""Map-reduce summarization for documents longer than ``MAX_TEXT_LEN``.
+
+The text is split into sentence-aligned chunks of at most ``chunk_chars``
+characters; consecutive chunks share up to ``overlap_chars`` of trailing
+sentences so statements that straddle a boundary keep their context. Chunks
+are summarized through the provider with at most ``concurrency`` calls in
+flight (map). The chunk summaries are joined and, while still longer than one
+chunk, chunked and summarized again; the last level is summarized once more
+into the final summary (reduce). There is no fixed number of levels: reducing
+goes on while each level cuts the text to at most 3/4 of the level below,
+which also bounds the reduce calls to a few times the map calls. Only when
+the provider stops shortening the text that much is the last level cut to
+one chunk, and ``truncated`` says so.
+
+Every provider call is cached by a hash of its input text, so editing a
+document only re-summarizes the chunks whose text changed (and the reduce
+steps above them). The cache is an LRU salted with the provider name, so
+switching providers never serves stale summaries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..observability.metrics import LONG_SUMMARY_CHUNKS
+
+# Meningsslut: . ! ? (ev. följt av citattecken/parentes) och whitespace, eller tom rad.
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+# En reduce-nivå måste korta texten till högst så här stor andel, annars avbryts reduceringen.
+_MIN_SHRINK = 0.75
+
+
+def split_sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_END.split(text) if part and part.strip()]
+
+
+def _pieces(sentence: str, size: int) -> List[str]:
+    """Hard-split a sentence longer than ``size`` at whitespace where possible."""
+
+    pieces = []
+    while len(sentence) > size:
+        cut = sentence.rfind(" ", 0, size + 1)
+        if cut <= 0:
+            cut = size
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def _is_boundary(sentence: str, gap: int) -> bool:
+    # I snitt en gräns per `gap` tecken; beror bara på meningen själv.
+    digest = hashlib.blake2b(sentence.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 2**32 < len(sentence) / gap
+
+
+def chunk_text(text: str, size: int, overlap: int = 0) -> List[str]:
+    """Sentence-aligned chunks of at most ``size`` characters with ``overlap`` carried over.
+
+    Once a chunk holds ``size // 4`` characters it ends after any sentence
+    whose hash marks a boundary (about one per ``size // 4`` characters).
+    Boundaries thus depend on local content rather than on everything before
+    them: an edit moves at most the boundaries next to it, and the chunks
+    further on come out identical.
+    """
+
+    if size <= 0:
+        raise ValueError("size must be positive")
+    overlap = max(0, min(overlap, size // 2))
+    sentences = [piece for s in split_sentences(text) for piece in _pieces(s, size)]
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0  # tecken i " ".join(current)
+
+    def close(upcoming: int) -> None:
+        nonlocal current, length
+        chunks.append(" ".join(current))
+        # Bär med de sista meningarna som ryms i överlappet (och bredvid nästa mening).
+        carried: List[str] = []
+        carried_len = 0
+        for previous in reversed(current):
+            if carried_len + len(previous) + 1 > min(overlap, size - upcoming):
+                break
+            carried.insert(0, previous)
+            carried_len += len(previous) + 1
+        current, length = carried, max(0, carried_len - 1)
+
+    for index, sentence in enumerate(sentences):
+        if current and length + 1 + len(sentence) > size:
+            close(len(sentence))
+        length += len(sentence) + (1 if current else 0)
+        current.append(sentence)
+        natural = length >= size // 4 and _is_boundary(sentence, max(1, size // 4))
+        if natural and index + 1 < len(sentences):
+            close(len(sentences[index + 1]))
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class LongSummarizer:
+    """Chunked map-reduce over a provider's ``summarize`` with a per-chunk cache."""
+
+    def __init__(
+        self,
+        chunk_chars: int = 4000,
+        overlap_chars: int = 300,
+        concurrency: int = 4,
+        cache_max_entries: int = 4096,
+        salt: str = "",
+    ) -> None:
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self.concurrency = concurrency
+        self.cache_max_entries = cache_max_entries
+        self._salt = salt.encode()
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _key(self, text: str, ticker: Optional[str]) -> str:
+        digest = hashlib.blake2b(self._salt, digest_size=16)
+        digest.update(b"\0" + (ticker or "").encode() + b"\0" + text.encode())
+        return digest.hexdigest()
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        if self.cache_max_entries <= 0:
+            return
+        self._cache.pop(key, None)
+        while self._cache and len(self._cache) >= self.cache_max_entries:
+            self._cache.popitem(last=False)
+        self._cache[key] = result
+
+    async def _map(
+        self, provider, texts: List[str], ticker: Optional[str], stats: Dict[str, int]
+    ) -> List[Dict[str, Any]]:
+        keys = [self._key(text, ticker) for text in texts]
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                results[key] = cached
+            else:
+                pending[key] = text  # samma text två gånger summeras bara en gång
+        stats["cached_calls"] += len(keys) - len(pending)
+        stats["provider_calls"] += len(pending)
+        LONG_SUMMARY_CHUNKS.labels(source="cache").inc(len(keys) - len(pending))
+        LONG_SUMMARY_CHUNKS.labels(source="provider").inc(len(pending))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(key: str, text: str) -> None:
+            payload = {"text": text}
+            if ticker:
+                payload["ticker"] = ticker
+            async with semaphore:
+                raw = await provider.summarize(payload)
+            result = raw if isinstance(raw, dict) else {"summary": str(raw)}
+            results[key] = result
+            self._remember(key, result)
+
+        # TaskGroup avbryter syskonen när en chunk misslyckas; anroparen ser första felet.
+        try:
+            async with asyncio.TaskGroup() as group:
+                for key, text in pending.items():
+                    group.create_task(one(key, text))
+        except ExceptionGroup as errors:
+            raise errors.exceptions[0] from None
+        return [results[key] for key in keys]
+
+    async def summarize(
+        self, provider, text: str, ticker: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return the final provider result and its stats.
+
+        Stats are ``chunks``, ``provider_calls``, ``cached_calls`` and
+        ``truncated`` (the last level had to be cut to fit one chunk).
+        """
+
+        stats: Dict[str, Any] = {
+            "chunks": 0,
+            "provider_calls": 0,
+            "cached_calls": 0,
+            "truncated": False,
+        }
+        chunks = chunk_text(text, self.chunk_chars, self.overlap_chars)
+        stats["chunks"] = len(chunks)
+        length = len(text)
+        while len(chunks) > 1:
+            results = await self._map(provider, chunks, ticker, stats)
+            combined = "\n\n".join(str(r.get("summary", "")).strip() for r in results)
+            if len(combined) > length * _MIN_SHRINK:
+                # Providern kortar knappt texten; fler nivåer kostar anrop utan att bli klara.
+                chunks = [combined]
+                break
+            length = len(combined)
+            # Reduce-nivåerna överlappar inte; sammanfattningarna är redan fristående.
+            chunks = chunk_text(combined, self.chunk_chars)
+        final_text = " ".join(chunks)
+        if len(final_text) > self.chunk_chars:
+            stats["truncated"] = True
+            final_text = final_text[: self.chunk_chars]
+        (result,) = await self._map(provider, [final_text], ticker, stats)
+        return result, stats
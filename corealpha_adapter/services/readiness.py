@@ -0,0 +1,218 @@
+"""Readiness checks for ``/readyz``.
+
+Checks are registered on a :class:`Readiness` instance and run concurrently,
+each under its own timeout. Results are cached for ``cache_seconds`` so a
+burst of probes from several load balancers runs the checks once.
+
+Provider reachability is never probed per request: :class:`ProviderProbe`
+pings the provider in the background and its check only reads the last
+result (and fails when that result is stale).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import structlog
+
+log = structlog.get_logger()
+
+CheckOutcome = Union[bool, Tuple[bool, Optional[str]]]
+CheckFunc = Callable[[], Awaitable[CheckOutcome]]
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    ms: float
+    detail: Optional[str] = None
+    critical: bool = True
+
+
+@dataclass
+class ReadinessCheck:
+    name: str
+    func: CheckFunc
+    timeout: float = 1.0
+    critical: bool = True
+
+
+class Readiness:
+    """Registry of readiness checks; only critical checks decide readiness."""
+
+    def __init__(self, cache_seconds: float = 1.0) -> None:
+        self.cache_seconds = cache_seconds
+        self._checks: List[ReadinessCheck] = []
+        self._cached: Optional[Tuple[float, bool, Dict[str, CheckResult]]] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def register(
+        self, name: str, func: CheckFunc, timeout: float = 1.0, critical: bool = True
+    ) -> None:
+        self._checks = [c for c in self._checks if c.name != name]
+        self._checks.append(ReadinessCheck(name, func, timeout, critical))
+        self._cached = None
+
+    def names(self) -> List[str]:
+        return [check.name for check in self._checks]
+
+    async def run(self) -> Tuple[bool, Dict[str, CheckResult]]:
+        cached = self._cached
+        if cached is not None and time.monotonic() - cached[0] < self.cache_seconds:
+            return cached[1], cached[2]
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            cached = self._cached
+            if cached is not None and time.monotonic() - cached[0] < self.cache_seconds:
+                return cached[1], cached[2]
+            results = await asyncio.gather(*(self._run_one(c) for c in self._checks))
+            checks = {check.name: result for check, result in zip(self._checks, results)}
+            ok = all(r.ok for r in checks.values() if r.critical)
+            self._cached = (time.monotonic(), ok, checks)
+            return ok, checks
+
+    async def _run_one(self, check: ReadinessCheck) -> CheckResult:
+        started = time.perf_counter()
+        detail: Optional[str] = None
+        try:
+            async with asyncio.timeout(check.timeout):
+                outcome = await check.func()
+            if isinstance(outcome, tuple):
+                ok, detail = bool(outcome[0]), outcome[1]
+            else:
+                ok = bool(outcome)
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timeout after {check.timeout:g}s"
+        except Exception as exc:  # noqa: BLE001 - a failing check means not ready
+            ok, detail = False, f"{type(exc).__name__}: {exc}"
+        ms = round((time.perf_counter() - started) * 1000, 2)
+        return CheckResult(ok=ok, ms=ms, detail=detail, critical=check.critical)
+
+
+class ProviderProbe:
+    """Background reachability probe for the active provider."""
+
+    def __init__(
+        self,
+        provider_factory: Callable[[], object],
+        interval: float = 15.0,
+        timeout: float = 3.0,
+    ) -> None:
+        self.provider_factory = provider_factory
+        self.interval = interval
+        self.timeout = timeout
+        self.ok = False
+        self.detail: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe_once(self) -> bool:
+        provider = self.provider_factory()
+        ping = getattr(provider, "ping", None)
+        try:
+            if ping is None:
+                ok, detail = True, None
+            else:
+                # asyncio.timeout, inte wait_for: wait_for i 3.11 kan svälja en
+                # cancel som kommer samtidigt som svaret, och då hänger stop().
+                async with asyncio.timeout(self.timeout):
+                    ok = bool(await ping())
+                detail = None if ok else "upstream answered with a server error"
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timeout after {self.timeout:g}s"
+        except Exception as exc:  # noqa: BLE001 - unreachable, misconfigured, …
+            ok, detail = False, f"{type(exc).__name__}: {exc}"
+        if ok != self.ok or self.checked_at is None:
+            log.info("provider_probe", ok=ok, detail=detail)
+        self.ok, self.detail, self.checked_at = ok, detail, time.monotonic()
+        return ok
+
+    async def check(self) -> CheckOutcome:
+        age = time.monotonic() - (self.checked_at or 0.0)
+        if self.checked_at is None or (age > self.interval and not self.running):
+            # Ingen bakgrundsprobe (före start eller utan lifespan): proba direkt.
+            await self.probe_once()
+            age = 0.0
+        if age > 3 * self.interval:
+            return False, f"last probe {age:.0f}s ago"
+        return self.ok, self.detail
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._loop(), name="corealpha-provider-probe"
+            )
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _loop(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+
+def build_readiness(
+    provider_factory: Callable[[], object],
+    rate_limit_backend=None,
+    loop_monitor=None,
+    warmup: Optional[Callable[[], object]] = None,
+    probe_interval: float = 15.0,
+    cache_seconds: float = 1.0,
+    require_warmup: bool = True,
+) -> Tuple[Readiness, ProviderProbe]:
+    """Readiness with the adapter's standard checks, plus the probe to start in lifespan."""
+
+    readiness = Readiness(cache_seconds=cache_seconds)
+    probe = ProviderProbe(provider_factory, interval=probe_interval)
+    readiness.register("provider", probe.check, timeout=probe.timeout + 0.5)
+
+    async def circuit() -> CheckOutcome:
+        if getattr(provider_factory(), "circuit_open", False):
+            return False, "circuit breaker open"
+        return True
+
+    readiness.register("circuit", circuit)
+
+    if rate_limit_backend is not None:
+
+        async def cache_backend() -> CheckOutcome:
+            return await rate_limit_backend.ping(), rate_limit_backend.name
+
+        readiness.register("cache_backend", cache_backend)
+
+    if warmup is not None:
+
+        async def warmed() -> CheckOutcome:
+            scheduler = warmup()
+            if scheduler is None or not getattr(scheduler, "run_on_startup", False):
+                return True
+            if scheduler.state.runs == 0:
+                return False, "warm-up not finished"
+            return True
+
+        readiness.register("warmup", warmed, critical=require_warmup)
+
+    if loop_monitor is not None:
+
+        async def event_loop() -> CheckOutcome:
+            return not loop_monitor.overloaded, f"lag {loop_monitor.lag * 1000:.1f}ms"
+
+        readiness.register("event_loop", event_loop)
+
+    return readiness, probe
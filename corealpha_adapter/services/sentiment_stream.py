@@ -0,0 +1,194 @@
+"""Streaming bulk sentiment for ``/sentiment/stream``.
+
+The request body is NDJSON: one JSON string or ``{"id": …, "text": …}``
+object per line. Lines are scored in chunks of ``chunk_size`` through the
+active provider and the per-text results are streamed back as NDJSON, one
+line per input line, followed by a ``{"done": true, …}`` summary line.
+
+Everything is pull-based: the next chunk of input is read only after the
+previous results have been handed to the server. A slow reader therefore
+throttles the upload through TCP backpressure, and memory stays at one chunk
+plus one line whatever the size of the input.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from ..providers import ProviderError
+from ..schemas import MAX_TEXT_LEN, SentimentStreamItem, TextStr
+
+try:  # pragma: no cover - orjson is optional
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None
+
+# Ett JSON-tecken kan vara upp till 6 byte (\uXXXX), plus plats för id och nycklar.
+MAX_LINE_BYTES = MAX_TEXT_LEN * 6 + 1024
+
+_TEXT = TypeAdapter(TextStr)
+_ITEM = TypeAdapter(SentimentStreamItem)
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Yield ``(line_number, line)`` for non-blank lines; ``None`` for oversized lines.
+
+    At most ``max_line_bytes`` are buffered: the rest of an oversized line is
+    discarded up to the next newline.
+    """
+
+    buffer = bytearray()
+    lineno = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    oversized = len(buffer) > max_line_bytes
+                    if oversized:
+                        buffer.clear()
+                break
+            lineno += 1
+            if oversized:
+                oversized = False
+                yield lineno, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield lineno, None
+                elif buffer.strip():
+                    yield lineno, bytes(buffer)
+            buffer.clear()
+            start = end + 1
+    if oversized:
+        yield lineno + 1, None
+    elif buffer.strip():
+        yield lineno + 1, bytes(buffer)
+
+
+def per_text_scores(result: Any, count: int) -> Optional[List[float]]:
+    """Per-text scores from a provider result, or ``None`` if it only has an aggregate."""
+
+    vectors = result.get("vectors") if isinstance(result, dict) else result
+    if isinstance(vectors, list) and len(vectors) == count:
+        if all(isinstance(v, dict) for v in vectors):
+            return [
+                round(max(-0.9, min(0.9, v.get("pos", 0.0) - v.get("neg", 0.0))), 3)
+                for v in vectors
+            ]
+    if isinstance(result, dict):
+        scores = result.get("scores")
+        if isinstance(scores, list) and len(scores) == count:
+            return [round(float(s), 3) for s in scores]
+        if count == 1 and "score" in result:
+            return [round(float(result["score"]), 3)]
+    return None
+
+
+async def score_texts(
+    provider,
+    texts: List[str],
+    ticker: Optional[str] = None,
+    concurrency: int = 4,
+) -> List[float]:
+    payload: dict = {"texts": texts}
+    if ticker:
+        payload["ticker"] = ticker
+    result = await provider.sentiment(payload)
+    scores = per_text_scores(result, len(texts))
+    if scores is not None:
+        return scores
+    if len(texts) == 1:
+        raise ProviderError("Provider returned no sentiment score")
+    # Providern ger bara ett snitt per batch: poängsätt texterna i chunken var för sig,
+    # högst ``concurrency`` anrop åt gången.
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def single(text: str) -> float:
+        async with semaphore:
+            (score,) = await score_texts(provider, [text], ticker)
+        return score
+
+    return list(await asyncio.gather(*(single(t) for t in texts)))
+
+
+def _error_message(exc: ValidationError) -> str:
+    error = exc.errors(include_url=False)[0]
+    loc = ".".join(str(part) for part in error["loc"])
+    return f"{loc}: {error['msg']}" if loc else error["msg"]
+
+
+async def score_stream(
+    lines: AsyncIterator[Tuple[int, Optional[bytes]]],
+    provider,
+    ticker: Optional[str] = None,
+    chunk_size: int = 64,
+    concurrency: int = 4,
+) -> AsyncIterator[bytes]:
+    """Score NDJSON ``lines`` chunk by chunk and yield NDJSON result lines.
+
+    ``concurrency`` bounds the single-text provider calls made for a chunk
+    when the provider only returns an aggregate score.
+    """
+
+    chunk_size = max(1, chunk_size)
+    # (rad, id, text, fel); felaktiga rader behåller sin plats i utdata.
+    pending: List[Tuple[int, Any, Optional[str], Optional[str]]] = []
+    scored = failed = 0
+
+    async def flush() -> bytes:
+        nonlocal scored, failed
+        texts = [text for _, _, text, _ in pending if text is not None]
+        scores = iter(await score_texts(provider, texts, ticker, concurrency) if texts else ())
+        out = []
+        for lineno, item_id, text, error in pending:
+            row: dict = {"line": lineno}
+            if item_id is not None:
+                row["id"] = item_id
+            if text is None:
+                row["error"] = error
+            else:
+                row["score"] = next(scores)
+            out.append(_dumps(row))
+        scored += len(texts)
+        failed += len(pending) - len(texts)
+        pending.clear()
+        return b"".join(out)
+
+    try:
+        async for lineno, raw in lines:
+            if raw is None:
+                pending.append((lineno, None, None, "line too long"))
+            else:
+                try:
+                    if raw.lstrip()[:1] == b'"':
+                        pending.append((lineno, None, _TEXT.validate_json(raw), None))
+                    else:
+                        item = _ITEM.validate_json(raw)
+                        pending.append((lineno, item.id, item.text, None))
+                except ValidationError as exc:
+                    pending.append((lineno, None, None, _error_message(exc)))
+            if len(pending) >= chunk_size:
+                yield await flush()
+        if pending:
+            yield await flush()
+    except ProviderError as exc:
+        # Statuskoden är redan skickad: avbryt strömmen med en fatal rad.
+        yield _dumps({"error": str(exc), "fatal": True, "scored": scored})
+        return
+    yield _dumps({"done": True, "scored": scored, "errors": failed})
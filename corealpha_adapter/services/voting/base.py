@@ -1,7 +1,33 @@
+import functools
+import time
 from typing import Protocol
 
+from ...observability.metrics import VOTE_ENGINE_SECONDS, VOTE_PROPOSALS
+from ...observability.tracing import record
 from ...schemas import VoteRequest, VoteResponse
 
 
 class VotingEngine(Protocol):
     def vote(self, req: VoteRequest) -> VoteResponse: ...
+
+
+def instrumented(method: str):
+    """Time ``vote()`` into ``corealpha_vote_engine_duration_seconds{method}``."""
+
+    histogram = VOTE_ENGINE_SECONDS.labels(method=method)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, req: VoteRequest) -> VoteResponse:
+            VOTE_PROPOSALS.observe(len(req.proposals))
+            started = time.perf_counter()
+            try:
+                return func(self, req)
+            finally:
+                ended = time.perf_counter()
+                histogram.observe(ended - started)
+                record("vote", started, ended, method=method)
+
+        return wrapper
+
+    return decorator
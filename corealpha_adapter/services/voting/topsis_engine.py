@@ -1,7 +1,9 @@
 from ...schemas import VoteExplain, VoteRequest, VoteResponse
+from .base import instrumented
 
 
 class TOPSISEngine:
+    @instrumented("TOPSIS")
     def vote(self, req: VoteRequest) -> VoteResponse:
         weights = {proposal.agent: proposal.weight for proposal in req.proposals}
         explain = VoteExplain(
@@ -2,6 +2,7 @@ import math
 from typing import List
 
 from ...schemas import VoteExplain, VoteRequest, VoteResponse
+from .base import instrumented
 
 
 def vote_to_signal(v: str) -> float:
@@ -26,6 +27,7 @@ def wsum_probability(weights: List[float], signals: List[float]) -> float:
 
 
 class WSUMEngine:
+    @instrumented("WSUM")
     def vote(self, req: VoteRequest) -> VoteResponse:
         weights = [proposal.weight for proposal in req.proposals]
         signals = [vote_to_signal(proposal.vote) for proposal in req.proposals]
@@ -0,0 +1,222 @@
+"""Background warm-up of provider caches for a configured watchlist.
+
+At the configured times (UTC, ``HH:MM``) the scheduler runs the same
+summarize → sentiment → agents → vote chain as an interactive client, so the
+provider cache and the fundamentals snapshot are warm when traffic arrives.
+The chain builds its payloads through the request schemas, which keeps the
+provider cache keys identical to those of interactive requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+import structlog
+
+from ..observability.metrics import (
+    WARMUP_DURATION,
+    WARMUP_LAST_SUCCESS,
+    WARMUP_PROGRESS,
+    WARMUP_RUNS,
+    WARMUP_TICKERS,
+)
+from ..schemas import SentimentRequest, SummarizeRequest, VoteProposal, VoteRequest
+from .agents.registry import get_agent_registry
+from .llm_router import get_provider
+
+log = structlog.get_logger()
+
+
+def _parse_times(value: str) -> List[Tuple[int, int]]:
+    times: List[Tuple[int, int]] = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        hour, _, minute = item.partition(":")
+        times.append((int(hour) % 24, int(minute or 0) % 60))
+    return sorted(set(times))
+
+
+@dataclass
+class WarmupState:
+    runs: int = 0
+    last_started: Optional[float] = None
+    last_finished: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_errors: int = 0
+    running: bool = False
+
+
+class WarmupScheduler:
+    """Runs the warm-up chain at fixed times with bounded concurrency."""
+
+    def __init__(
+        self,
+        watchlist: Sequence[str],
+        times: Sequence[Tuple[int, int]] = (),
+        concurrency: int = 2,
+        run_on_startup: bool = True,
+    ) -> None:
+        self.watchlist = [t.strip().upper() for t in watchlist if t.strip()]
+        self.times = list(times)
+        self.concurrency = max(1, concurrency)
+        self.run_on_startup = run_on_startup
+        self.state = WarmupState()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._loop(), name="corealpha-warmup"
+            )
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the next scheduled run, or ``None`` if no times are configured."""
+
+        if not self.times:
+            return None
+        now = now or datetime.now(timezone.utc)
+        candidates = []
+        for hour, minute in self.times:
+            at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if at <= now:
+                at += timedelta(days=1)
+            candidates.append((at - now).total_seconds())
+        return min(candidates)
+
+    async def _loop(self) -> None:
+        if self.run_on_startup:
+            await self.run_once()
+        while True:
+            delay = self.seconds_until_next()
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+            await self.run_once()
+
+    async def run_once(self) -> WarmupState:
+        """Warm all tickers once. Errors are counted, never raised."""
+
+        state = self.state
+        state.running = True
+        state.last_started = time.time()
+        started = time.perf_counter()
+        done = 0
+        errors = 0
+        total = len(self.watchlist) or 1
+        WARMUP_PROGRESS.set(0.0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(ticker: str) -> None:
+            nonlocal done, errors
+            async with semaphore:
+                try:
+                    await self._warm_ticker(ticker)
+                    WARMUP_TICKERS.labels(outcome="ok").inc()
+                except Exception as exc:  # noqa: BLE001 - warm-up must never crash the app
+                    errors += 1
+                    WARMUP_TICKERS.labels(outcome="error").inc()
+                    log.warning("warmup_failed", ticker=ticker, error=str(exc))
+                finally:
+                    done += 1
+                    WARMUP_PROGRESS.set(done / total)
+
+        try:
+            await asyncio.gather(*(_one(t) for t in self.watchlist))
+        finally:
+            duration = time.perf_counter() - started
+            state.running = False
+            state.runs += 1
+            state.last_finished = time.time()
+            state.last_duration = duration
+            state.last_errors = errors
+            WARMUP_DURATION.observe(duration)
+            WARMUP_RUNS.labels(outcome="error" if errors else "ok").inc()
+            if not errors:
+                WARMUP_LAST_SUCCESS.set(state.last_finished)
+            log.info("warmup", tickers=len(self.watchlist), errors=errors, s=round(duration, 3))
+        return state
+
+    async def _warm_ticker(self, ticker: str) -> None:
+        provider = get_provider()
+        summary_req = SummarizeRequest(ticker=ticker)
+        summary = await provider.summarize(summary_req.model_dump(exclude_none=True))
+        text = str(summary.get("summary", "")) if isinstance(summary, dict) else str(summary)
+        # Släpp loopen mellan stegen så att interaktiva requests går före.
+        await asyncio.sleep(0)
+
+        score = 0.0
+        if text:
+            sentiment_req = SentimentRequest(ticker=ticker, texts=[text])
+            result = await provider.sentiment(sentiment_req.model_dump(exclude_none=True))
+            if isinstance(result, dict):
+                score = round(float(result.get("score", 0.0)), 3)
+            await asyncio.sleep(0)
+
+        # Agenterna är CPU-bundna (fundamentals, indikatorer): kör dem utanför loopen.
+        proposals = await asyncio.to_thread(_propose_all, ticker, score)
+
+        if proposals:
+            await provider.vote(VoteRequest(proposals=proposals).model_dump(exclude={"ticker"}))
+
+
+def _propose_all(ticker: str, score: float) -> List[VoteProposal]:
+    registry = get_agent_registry()
+    proposals: List[VoteProposal] = []
+    for name in registry.names():
+        agent = registry.get(name)
+        if agent is None:
+            continue
+        resp = registry.propose(agent, ticker=ticker, sentiment=score, price=None)
+        proposals.append(
+            VoteProposal(
+                agent=resp.agent,
+                vote=resp.vote,
+                weight=resp.weight,
+                confidence=resp.confidence,
+            )
+        )
+    return proposals
+
+
+_scheduler: Optional[WarmupScheduler] = None
+
+
+def get_warmup_scheduler() -> Optional[WarmupScheduler]:
+    """Return the scheduler configured via ``WARMUP_*`` env vars, or ``None`` if disabled."""
+
+    global _scheduler
+    if _scheduler is None:
+        watchlist = [t for t in os.getenv("WARMUP_WATCHLIST", "").split(",") if t.strip()]
+        if not watchlist:
+            return None
+        _scheduler = WarmupScheduler(
+            watchlist,
+            times=_parse_times(os.getenv("WARMUP_TIMES", "")),
+            concurrency=int(os.getenv("WARMUP_CONCURRENCY", "2")),
+            run_on_startup=os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true",
+        )
+    return _scheduler
+
+
+def reset_warmup_scheduler() -> None:
+    """Drop the cached scheduler (useful in tests)."""
+
+    global _scheduler
+    _scheduler = None
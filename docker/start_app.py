@@ -1,13 +1,196 @@
+"""Container entrypoint: run the adapter under uvicorn.
+
+With ``WEB_CONCURRENCY`` > 1 (or ``auto``) uvicorn's supervisor forks that
+many workers sharing one listening socket and restarts any worker that
+exits, which is also how ``MAX_REQUESTS`` recycles workers. ``auto`` sizes
+the pool from the container's CPU quota (cgroup v2 ``cpu.max`` or v1 CFS
+quota) instead of the host's core count.
+
+``MAX_REQUESTS`` only applies with more than one worker (a single uvicorn
+process has no supervisor to restart it), and each worker adds its own random
+``MAX_REQUESTS_JITTER`` so the pool does not recycle all at once. With several
+workers and no ``RATE_LIMIT_STORAGE``, the buckets default to a SQLite file on
+``/dev/shm`` so the configured limit holds for the pool rather than per worker.
+A ``FINGPT_RECORD_PATH`` cassette gets a ``{pid}`` part, so every worker
+records its own file instead of interleaving gzip members in one.
+"""
+
+import importlib.util
+import math
 import os
+import random
 import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[float]:
+    """CPU quota in cores, or ``None`` when the container is not limited."""
+
+    cpu_max = _read(os.path.join(root, "cpu.max"))  # cgroup v2: "<quota|max> <period>"
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))  # cgroup v1
+    period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus(root: str = CGROUP_ROOT) -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS/Windows
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(root)
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+
+def worker_count(env: str, value: Optional[str] = None, root: str = CGROUP_ROOT) -> int:
+    """``WEB_CONCURRENCY``: a number, or ``auto`` (default in prod) for one per CPU."""
+
+    value = (value or ("auto" if env == "prod" else "1")).strip().lower()
+    if value != "auto":
+        return max(1, int(value))
+    per_core = float(os.getenv("WORKERS_PER_CORE", "1"))
+    workers = max(1, int(available_cpus(root) * per_core))
+    max_workers = int(os.getenv("MAX_WORKERS", "0"))
+    return min(workers, max_workers) if max_workers > 0 else workers
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options(env: str) -> Dict[str, Any]:
+    reload_opt = os.getenv("UVICORN_RELOAD", "false").lower() == "true"
+    workers = 1 if reload_opt else worker_count(env, os.getenv("WEB_CONCURRENCY"))
+    max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+    if max_requests and workers == 1:
+        # Utan supervisor startas processen aldrig om; servern skulle bara stänga av sig.
+        print("MAX_REQUESTS ignoreras med en enda worker", file=sys.stderr)
+        max_requests = 0
+    jitter = os.getenv("MAX_REQUESTS_JITTER")
+    return {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8000")),
+        "reload": reload_opt,
+        "workers": workers,
+        # uvloop/httptools följer med uvicorn[standard]; annars ren Python.
+        "loop": os.getenv("UVICORN_LOOP") or ("uvloop" if _installed("uvloop") else "asyncio"),
+        "http": os.getenv("UVICORN_HTTP") or ("httptools" if _installed("httptools") else "h11"),
+        "backlog": int(os.getenv("UVICORN_BACKLOG", "2048")),
+        # Längre än lastbalanserarens idle timeout, annars 502 på återanvända anslutningar.
+        "timeout_keep_alive": int(os.getenv("UVICORN_KEEPALIVE", "75")),
+        "limit_concurrency": int(os.getenv("UVICORN_LIMIT_CONCURRENCY", "0")) or None,
+        "limit_max_requests": max_requests or None,
+        # Default 10 % av MAX_REQUESTS; dras per worker (se JitteredConfig).
+        "max_requests_jitter": int(jitter) if jitter else max_requests // 10,
+        "timeout_graceful_shutdown": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "log_level": "info",
+        "access_log": False,
+        "log_config": None,
+    }
+
+
+class JitteredConfig(uvicorn.Config):
+    """``uvicorn.Config`` that draws ``limit_max_requests`` per worker process.
+
+    ``load()`` runs inside each (re)started worker, so every worker gets
+    ``MAX_REQUESTS`` plus its own random share of the jitter.
+    """
+
+    def __init__(self, app, max_requests_jitter: int = 0, **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.base_max_requests = self.limit_max_requests
+        self.max_requests_jitter = max_requests_jitter
+
+    def load(self) -> None:
+        super().load()
+        if self.base_max_requests and self.max_requests_jitter > 0:
+            self.limit_max_requests = self.base_max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+
+
+def _configured(name: str) -> Optional[str]:
+    value = os.getenv(name)
+    if value is None and os.path.exists(".env"):
+        # Settings läser även .env; en storage som bara står där räknas också.
+        try:
+            from dotenv import dotenv_values
+        except ModuleNotFoundError:  # pragma: no cover - följer med pydantic-settings
+            return None
+        value = dotenv_values(".env").get(name)
+    return value
+
+
+def default_rate_limit_storage(workers: int) -> Optional[str]:
+    """Shared SQLite storage for a multi-worker pool without ``RATE_LIMIT_STORAGE``."""
+
+    storage = _configured("RATE_LIMIT_STORAGE")
+    if workers <= 1:
+        return None
+    if not storage:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        return f"sqlite:///{base}/corealpha-rl.db"
+    if storage.lower().startswith("memory"):
+        print(
+            f"RATE_LIMIT_STORAGE={storage} med {workers} workers: "
+            f"varje worker har egna buckets, effektiv gräns blir {workers}x",
+            file=sys.stderr,
+        )
+    return None
+
+
+def per_worker_record_path(workers: int) -> Optional[str]:
+    """``FINGPT_RECORD_PATH`` with a ``{pid}`` part, so each worker writes its own cassette."""
+
+    path = os.getenv("FINGPT_RECORD_PATH", "")
+    if workers <= 1 or not path or "{pid}" in path:
+        return None
+    directory, name = os.path.split(path)
+    stem, dot, rest = name.partition(".")
+    return os.path.join(directory, f"{stem}.{{pid}}{dot}{rest}")
+
+
+def serve(app: str, options: Dict[str, Any]) -> None:
+    jitter = options.pop("max_requests_jitter", 0)
+    if not (options["limit_max_requests"] and options["workers"] > 1 and jitter > 0):
+        uvicorn.run(app, **options)
+        return
+    # Som uvicorn.run för workers > 1, men med JitteredConfig.
+    from uvicorn.supervisors import Multiprocess
+
+    config = JitteredConfig(app, max_requests_jitter=jitter, **options)
+    server = uvicorn.Server(config=config)
+    sock = config.bind_socket()
+    try:
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    except KeyboardInterrupt:
+        pass
 
 
 def main():
     override = os.getenv("APP_MODULE")
     env = os.getenv("ENV", "dev").lower()
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
-    reload_opt = os.getenv("UVICORN_RELOAD", "false").lower() == "true"
 
     if env == "prod" and not override:
         print("ENV=prod kräver APP_MODULE='pkg.module:app'", file=sys.stderr)
@@ -18,17 +201,24 @@ def main():
     else:
         module, var = "corealpha_adapter.app", "app"
 
-    import uvicorn
-
-    uvicorn.run(
-        f"{module}:{var}",
-        host=host,
-        port=port,
-        reload=reload_opt,
-        log_level="info",
-        access_log=False,
-        log_config=None,
+    options = uvicorn_options(env)
+    storage = default_rate_limit_storage(options["workers"])
+    if storage:
+        # Ärvs av alla workers; annars får varje process egna buckets.
+        os.environ["RATE_LIMIT_STORAGE"] = storage
+        print(f"RATE_LIMIT_STORAGE={storage} (delad mellan workers)", file=sys.stderr)
+    record_path = per_worker_record_path(options["workers"])
+    if record_path:
+        # Flera processer som lägger till i samma .gz varvar gzip-medlemmar och förstör filen.
+        os.environ["FINGPT_RECORD_PATH"] = record_path
+        print(f"FINGPT_RECORD_PATH={record_path} (en kassett per worker)", file=sys.stderr)
+    print(
+        "starting {app} workers={workers} loop={loop} http={http} backlog={backlog}".format(
+            app=f"{module}:{var}", **options
+        ),
+        file=sys.stderr,
     )
+    serve(f"{module}:{var}", options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+
+
+def test_apps_from_settings_are_independent():
+    guarded = TestClient(create_app(Settings(API_KEYS="k1", MAX_BODY_BYTES=1024)))
+    open_app = TestClient(create_app(Settings()))
+
+    assert guarded.post("/summarize", json={"text": "Hello"}).status_code == 401
+    assert open_app.post("/summarize", json={"text": "Hello"}).status_code == 200
+
+    big = {"text": "x" * 2048}
+    assert guarded.post("/summarize", json=big, headers={"x-api-key": "k1"}).status_code == 413
+    assert open_app.post("/summarize", json=big).status_code == 200
+
+
+def test_factory_applies_security_headers_and_default_limit():
+    with TestClient(create_app(Settings(ENV="dev", RATE_LIMIT="2/minute"))) as client:
+        first = client.get("/health")
+        assert "content-security-policy" in first.headers
+        assert first.headers["x-frame-options"].lower() == "deny"
+        codes = [client.get("/health").status_code for _ in range(2)]
+        assert codes == [200, 429]
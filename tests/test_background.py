@@ -0,0 +1,27 @@
+from corealpha_adapter.core.background import BackgroundWriter
+
+
+def test_failing_batch_is_dropped_and_the_writer_keeps_running():
+    written, drops = [], []
+
+    def write(batch):
+        if "bad" in batch:
+            raise OSError("disk full")
+        written.extend(batch)
+
+    writer = BackgroundWriter(write, name="test-writer", batch_size=1, on_drop=drops.append)
+    writer.start()
+    for item in ("a", "bad", "b"):
+        writer.submit(item)
+    assert writer.flush()
+    assert writer.close()
+    assert written == ["a", "b"]
+    assert writer.dropped == 1 and drops == [1]
+    assert not writer.running
+
+
+def test_full_queue_drops_without_blocking():
+    writer = BackgroundWriter(lambda batch: None, name="test-writer", maxsize=1)
+    assert writer.submit(1)
+    assert not writer.submit(2)
+    assert writer.dropped == 1 and writer.qsize() == 1
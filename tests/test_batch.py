@@ -0,0 +1,70 @@
+import json
+
+from corealpha_adapter.__main__ import main
+from corealpha_adapter.batch import run_batch
+
+PROPOSAL = {"agent": "A", "vote": "BUY", "weight": 0.5, "confidence": 0.5}
+REQUESTS = [
+    {"id": "s1", "op": "summarize", "ticker": "NVDA", "text": "strong growth"},
+    {"id": "s2", "op": "sentiment", "ticker": "NVDA", "texts": ["strong", "weak"]},
+    {"id": "p1", "op": "propose", "ticker": "NVDA", "agent": "Macro"},
+    {"id": "p2", "op": "propose", "ticker": "NVDA", "agent": "Nope"},
+    {"id": "v1", "op": "vote", "proposals": [PROPOSAL]},
+    {"id": "a1", "op": "analyze", "ticker": "NVDA", "agents": ["Sentiment", "Technical"]},
+    {"id": "x1", "op": "explode"},
+]
+
+
+def _write(path, rows, extra=""):
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n" + extra)
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_results_in_input_order(tmp_path, capsys):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write(src, REQUESTS, extra="\nnot json\n")
+    assert main(["batch", str(src), "-o", str(out), "--concurrency", "3"]) == 1
+
+    rows = _read(out)
+    assert [r.get("id") for r in rows] == [r["id"] for r in REQUESTS] + [None]
+    assert [r["ok"] for r in rows] == [True, True, True, False, True, True, False, False]
+    assert rows[1]["result"]["score"] == 0.0
+    assert rows[2]["result"]["agent"] == "Macro"
+    assert "ej registrerad" in rows[3]["error"]
+    assert rows[4]["result"]["decision"] == "BUY"
+    analyze = rows[5]["result"]
+    assert [p["agent"] for p in analyze["proposals"]] == ["Sentiment", "Technical"]
+    assert analyze["vote"]["decision"] in ("BUY", "HOLD", "SELL")
+    assert "unknown op 'explode'" in rows[6]["error"]
+    assert rows[7]["line"] == 9 and rows[7]["error"].startswith("JSONDecodeError")
+
+    summary = capsys.readouterr().err
+    assert "batch: 8 requests" in summary and "ok=5 errors=3" in summary
+
+
+def test_resume_continues_after_last_checkpoint(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    rows = [{"id": i, "op": "vote", "proposals": [PROPOSAL]} for i in range(10)]
+    _write(src, rows[:6])
+    run_batch(str(src), str(out), checkpoint_every=1)
+    ckpt = json.loads((tmp_path / "out.jsonl.ckpt").read_text())
+    assert ckpt["lines"] == 6
+
+    # Ett avbrott efter checkpointen lämnar en halvskriven rad som ska skrivas om.
+    with open(out, "ab") as fh:
+        fh.write(b'{"line": 7, "id"')
+    _write(src, rows)
+    stats = run_batch(str(src), str(out), resume=True)
+    assert stats.resumed_from == 6 and stats.processed == 4
+    assert [r["id"] for r in _read(out)] == list(range(10))
+
+
+def test_cpu_stages_run_in_process_pool(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write(src, [REQUESTS[2], REQUESTS[4], REQUESTS[5]])
+    stats = run_batch(str(src), str(out), workers=1)
+    assert stats.ok == 3
+    assert _read(out)[1]["result"]["decision"] == "BUY"
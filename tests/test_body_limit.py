@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from corealpha_adapter.middleware import BodySizeLimitMiddleware, parse_route_limits
+
+calls = []
+
+
+async def _echo(request):
+    body = await request.body()
+    calls.append(len(body))
+    return PlainTextResponse(str(len(body)))
+
+
+def _client(max_bytes=16, routes=None):
+    calls.clear()
+    app = Starlette(
+        routes=[
+            Route("/echo", _echo, methods=["POST"]),
+            Route("/batch/run", _echo, methods=["POST"]),
+            Route("/stream", _echo, methods=["POST"]),
+        ]
+    )
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=max_bytes, route_limits=routes)
+    return TestClient(app)
+
+
+def _chunks(total, size=4):
+    sent = 0
+    while sent < total:
+        yield b"x" * min(size, total - sent)
+        sent += size
+
+
+def test_content_length_over_limit_rejected_before_app_runs():
+    client = _client()
+    resp = client.post("/echo", content=b"x" * 17)
+    assert resp.status_code == 413
+    assert resp.text == "Request entity too large"
+    assert calls == []
+
+
+def test_body_within_limit_passes_through():
+    client = _client()
+    resp = client.post("/echo", content=b"x" * 16)
+    assert resp.status_code == 200
+    assert resp.text == "16"
+
+
+def test_chunked_body_counted_across_chunks():
+    client = _client()
+    assert client.post("/echo", content=_chunks(12)).text == "12"
+    resp = client.post("/echo", content=_chunks(40))
+    assert resp.status_code == 413
+
+
+def test_route_limits_override_default():
+    routes = parse_route_limits("/batch=64, /stream=0")
+    assert routes == {"/batch": 64, "/stream": 0}
+    client = _client(routes=routes)
+    assert client.post("/batch/run", content=b"x" * 64).status_code == 200
+    assert client.post("/batch/run", content=b"x" * 65).status_code == 413
+    assert client.post("/stream", content=_chunks(1000)).text == "1000"
+    assert client.post("/echo", content=b"x" * 17).status_code == 413
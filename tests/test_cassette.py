@@ -0,0 +1,223 @@
+import asyncio
+import gzip
+import os
+import threading
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from benchmarks.loadgen import cassette_requests, parse_mix, run_load
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.providers import ProviderConfigurationError, ProviderError
+from corealpha_adapter.providers.cassette import (
+    CassetteWriter,
+    canonical_key,
+    iter_cassette,
+)
+from corealpha_adapter.providers.fingpt import FinGPTProvider
+from corealpha_adapter.providers.replay import ReplayProvider
+from corealpha_adapter.services import get_provider, reset_provider
+
+SENTIMENT = {"score": 0.42, "rationale": "LLM", "sources": [{"title": "Doc", "url": "http://x"}]}
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key("/vote", {"a": 1, "b": [1, 2]}) == canonical_key(
+        "/vote", {"b": [1, 2], "a": 1}
+    )
+    assert canonical_key("/vote", {"a": 1}) != canonical_key("/sentiment", {"a": 1})
+
+
+@pytest.fixture
+def cassette(tmp_path, monkeypatch):
+    path = tmp_path / "fingpt.jsonl.gz"
+    monkeypatch.setenv("FINGPT_BASE_URL", "https://api.fingpt.test")
+    monkeypatch.setenv("FINGPT_API_KEY", "secret")
+    monkeypatch.setenv("HTTP_BACKOFF_SECONDS", "0")
+    monkeypatch.setenv("HTTP_MAX_RETRIES", "1")
+    monkeypatch.setenv("FINGPT_RECORD_PATH", str(path))
+    return path
+
+
+@pytest.mark.asyncio
+async def test_fingpt_records_and_replay_serves_exchanges(cassette, monkeypatch):
+    provider = FinGPTProvider()
+    request = httpx.Request("POST", "https://api.fingpt.test/sentiment")
+    with respx.mock(assert_all_called=True) as respx_mock:
+        respx_mock.post("https://api.fingpt.test/sentiment").side_effect = [
+            httpx.ReadTimeout("slow", request=request),
+            httpx.Response(200, json=SENTIMENT),
+        ]
+        respx_mock.post("https://api.fingpt.test/vote").mock(return_value=httpx.Response(503))
+        await provider.sentiment({"ticker": "NVDA", "texts": ["good"]})
+        await provider.sentiment({"texts": ["good"], "ticker": "NVDA"})  # cachen, spelas ej in
+        with pytest.raises(ProviderError):
+            await provider.vote({"proposals": []})
+    provider._recorder.close()
+
+    entries = list(iter_cassette(cassette))
+    assert [(e["path"], e["attempts"], e["status"]) for e in entries] == [
+        ("/sentiment", 2, 200),
+        ("/vote", 2, 503),
+    ]
+    assert entries[0]["response"] == SENTIMENT
+    assert entries[0]["key"] == canonical_key("/sentiment", {"texts": ["good"], "ticker": "NVDA"})
+    assert entries[1]["error"] == "FinGPT request failed with status 503"
+
+    delays = []
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr("corealpha_adapter.providers.replay.asyncio.sleep", fake_sleep)
+    replay = ReplayProvider(str(cassette), latency_scale=0.5)
+    assert await replay.sentiment({"texts": ["good"], "ticker": "NVDA"}) == SENTIMENT
+    assert delays == [pytest.approx(entries[0]["elapsed"] * 0.5)]
+    with pytest.raises(ProviderError, match="status 503"):
+        await replay.vote({"proposals": []})
+    with pytest.raises(ProviderError, match="no cassette entry"):
+        await replay.summarize({"text": "unseen"})
+
+
+@pytest.mark.asyncio
+async def test_replay_cycles_repeated_keys_and_falls_back_to_stub(tmp_path):
+    path = tmp_path / "c.jsonl"
+    lines = [
+        '{"key": "%s", "path": "/summarize", "elapsed": 0, "response": {"n": %d}}'
+        % (canonical_key("/summarize", {"text": "a"}), n)
+        for n in (1, 2)
+    ]
+    path.write_text("\n".join(lines) + '\n{"key": "torn')
+    replay = ReplayProvider(str(path), latency_scale=0, on_miss="stub")
+    assert [(await replay.summarize("a"))["n"] for _ in range(3)] == [1, 2, 1]
+    assert (await replay.summarize({"text": "other"}))["summary"] == "other"
+
+    with pytest.raises(ProviderConfigurationError):
+        await ReplayProvider("").summarize("a")
+    with pytest.raises(ProviderConfigurationError):
+        await ReplayProvider(str(tmp_path / "missing.jsonl")).summarize("a")
+
+
+@pytest.mark.asyncio
+async def test_truncated_or_corrupt_gzip_cassette_replays_intact_prefix(tmp_path):
+    path = tmp_path / "cut.jsonl.gz"
+    writer = CassetteWriter(path)
+    for n in range(20):
+        writer.write(
+            "/summarize", {"text": str(n)}, elapsed=0, attempts=1, status=200, response={"n": n}
+        )
+        assert writer.flush()
+    writer.close()
+    data = path.read_bytes()
+
+    # Processen dödades: ingen gzip-trailer och en halv sista block.
+    path.write_bytes(data[:-12])
+    entries = list(iter_cassette(path))
+    assert 0 < len(entries) <= 20
+    assert [e["response"]["n"] for e in entries] == list(range(len(entries)))
+    replay = ReplayProvider(str(path), latency_scale=0)
+    assert await replay.summarize({"text": "0"}) == {"n": 0}
+
+    # Skräp efter en hel gzip-medlem (BadGzipFile).
+    path.write_bytes(data + b"not gzip at all")
+    assert len(list(iter_cassette(path))) == 20
+
+
+def test_pid_placeholder_gives_each_process_its_own_cassette(tmp_path):
+    writer = CassetteWriter(tmp_path / "fingpt.{pid}.jsonl.gz")
+    writer.write("/vote", {}, elapsed=0, attempts=1, status=200, response={})
+    writer.close()
+    assert [p.name for p in tmp_path.iterdir()] == [f"fingpt.{os.getpid()}.jsonl.gz"]
+
+
+def test_app_shutdown_closes_the_recording(cassette, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "fingpt")
+    reset_provider()
+    try:
+        with TestClient(create_app(Settings(ACCESS_LOG_SAMPLE_RATE=0))):
+            recorder = get_provider()._recorder
+            recorder.write(
+                "/vote", {"proposals": []}, elapsed=0.1, attempts=1, status=200, response={}
+            )
+        # En komplett gzip-fil (med trailer) går att packa upp utan fel.
+        lines = gzip.decompress(cassette.read_bytes()).decode().splitlines()
+        assert len(lines) == 1
+        assert not recorder.running
+    finally:
+        reset_provider()
+
+
+def test_replay_cassette_is_loaded_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "c.jsonl"
+    key = canonical_key("/summarize", {"text": "a"})
+    path.write_text('{"key": "%s", "elapsed": 0, "response": {"summary": "hej"}}\n' % key)
+    loaded_in = []
+    real_iter = iter_cassette
+
+    def recording_iter(p):
+        loaded_in.append(threading.current_thread() is threading.main_thread())
+        return real_iter(p)
+
+    monkeypatch.setattr("corealpha_adapter.providers.replay.iter_cassette", recording_iter)
+    monkeypatch.setenv("LLM_PROVIDER", "replay")
+    monkeypatch.setenv("REPLAY_CASSETTE", str(path))
+    monkeypatch.setenv("REPLAY_LATENCY_SCALE", "0")
+    reset_provider()
+    try:
+        with TestClient(create_app(Settings())) as client:
+            assert get_provider()._index is not None  # lifespan har redan läst kassetten
+            resp = client.post("/summarize", json={"text": "a"})
+            assert resp.status_code == 200 and resp.json()["summary"] == "hej"
+    finally:
+        reset_provider()
+    assert loaded_in == [False]  # en gång, i en arbetstråd
+
+    # Utan lifespan: probe och request samtidigt läser ändå bara en gång, i en tråd.
+    fresh = ReplayProvider(str(path), latency_scale=0)
+    loaded_in.clear()
+
+    async def probe_and_request():
+        return await asyncio.gather(fresh.ping(), fresh.summarize({"text": "a"}))
+
+    assert asyncio.run(probe_and_request()) == [True, {"summary": "hej"}]
+    assert loaded_in == [False]
+
+
+def test_llm_provider_replay_is_selectable(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "replay")
+    reset_provider()
+    try:
+        assert isinstance(get_provider(), ReplayProvider)
+    finally:
+        reset_provider()
+
+
+@pytest.mark.asyncio
+async def test_loadgen_replays_recorded_requests(tmp_path):
+    path = tmp_path / "c.jsonl"
+    path.write_text(
+        '{"key": "k1", "path": "/summarize", "t": 0.0, "request": {"text": "strong"}}\n'
+        '{"key": "k2", "path": "/health", "t": 0.01, "request": {}}\n'
+        '{"key": "k3", "path": "/sentiment", "t": 0.02, "request": {"texts": ["weak"]}}\n'
+    )
+    recorded = cassette_requests(str(path))
+    assert [(name, t) for name, _, t in recorded] == [("summarize", 0.0), ("sentiment", 0.02)]
+
+    app = create_app(Settings(RATE_LIMIT="1000000/minute", ACCESS_LOG_SAMPLE_RATE=0))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        result = await run_load(
+            client,
+            parse_mix("vote=1"),
+            rate=1.0,
+            duration=0.1,
+            arrivals="recorded",
+            recorded=recorded,
+        )
+    report = result.report()["endpoints"]
+    assert set(report) == {"summarize", "sentiment"}
+    assert report["summarize"]["statuses"] == {"200": report["summarize"]["requests"]}
+    assert report["summarize"]["requests"] >= 2
@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.services.decisions import DecisionStore
+
+PROPOSALS = [
+    {"agent": "A", "vote": "BUY", "weight": 0.6, "confidence": 0.8},
+    {"agent": "B", "vote": "SELL", "weight": 0.4, "confidence": 0.5},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DecisionStore(str(tmp_path / "decisions.db"), retention_days=1, flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def _record(store, ticker, ts, decision="BUY"):
+    store.record(decision, {"BUY": 0.7}, {"weights": {"A": 1.0}}, PROPOSALS, ticker, ts=ts)
+
+
+def test_query_by_ticker_and_time_range_pages_newest_first(store):
+    for i in range(5):
+        _record(store, "NVDA", 1000.0 + i)
+    _record(store, "AAPL", 1002.0)
+    _record(store, "NVDA", 1002.0)  # samma ts: id skiljer sidorna åt
+    assert store.flush()
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = store.query("NVDA", start=1001.0, end=1004.0, limit=2, cursor=cursor)
+        seen.extend((item["ts"], item["id"]) for item in items)
+        if cursor is None:
+            break
+    assert [ts for ts, _ in seen] == [1003.0, 1002.0, 1002.0, 1001.0]
+    assert seen == sorted(seen, reverse=True)
+
+    (item,), _ = store.query("AAPL")
+    assert item["proposals"] == PROPOSALS and item["explain"] == {"weights": {"A": 1.0}}
+
+
+def test_compaction_removes_rows_outside_retention(store):
+    now = time.time()
+    _record(store, "NVDA", now - 2 * 86400)
+    _record(store, "NVDA", now)
+    assert store.flush()
+    assert store.compact(now=now) == 1
+    items, _ = store.query("NVDA")
+    assert [item["ts"] for item in items] == [now]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.db"), maxsize=1)
+    store.start = lambda: None  # ingen skrivare: kön töms aldrig
+    _record(store, "NVDA", 1.0)
+    _record(store, "NVDA", 2.0)
+    assert store.dropped == 1
+
+
+def test_query_does_not_wait_for_the_writer(store):
+    _record(store, "NVDA", 1.0)
+    assert store.flush()
+    result = []
+    with store._db_lock:  # en pågående skrivbatch
+        reader = threading.Thread(target=lambda: result.append(store.query("NVDA")))
+        reader.start()
+        reader.join(2.0)
+        assert not reader.is_alive()
+    ((items, _),) = result
+    assert [item["ts"] for item in items] == [1.0]
+
+
+def test_close_closes_the_write_and_read_connections(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.db"), flush_interval=0.01)
+    _record(store, "NVDA", 1.0)
+    assert store.flush()
+    store.query("NVDA")
+    writer, reader = store._conn, store._local.conn
+    store.close()
+    for conn in (writer, reader):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert len(store.query("NVDA")[0]) == 1  # en ny läsanslutning efter close
+    store.close()
+
+
+def test_vote_is_recorded_and_queryable(tmp_path):
+    settings = Settings(
+        RATE_LIMIT="1000/minute",
+        DECISIONS_DB_PATH=str(tmp_path / "decisions.db"),
+        DECISIONS_FLUSH_MS=10,
+    )
+    with TestClient(create_app(settings)) as client:
+        vote = client.post("/vote", json={"proposals": PROPOSALS, "ticker": "NVDA"}).json()
+        client.post("/vote", json={"proposals": PROPOSALS})
+        assert client.app.state.decisions.flush()
+
+        page = client.get("/decisions", params={"ticker": "NVDA"}).json()
+        assert page["next_cursor"] is None
+        (item,) = page["items"]
+        assert item["decision"] == vote["decision"] and item["proposals"] == PROPOSALS
+        assert item["calibrated_probs"] == vote["calibrated_probs"]
+
+        assert len(client.get("/decisions").json()["items"]) == 2
+        future = client.get("/decisions", params={"start": "2999-01-01T00:00:00"})
+        assert future.json()["items"] == []
+        assert client.get("/decisions", params={"cursor": "nope"}).status_code == 400
+
+
+def test_repeated_votes_served_from_the_response_cache_are_recorded(tmp_path):
+    settings = Settings(
+        RATE_LIMIT="1000/minute",
+        DECISIONS_DB_PATH=str(tmp_path / "decisions.db"),
+        DECISIONS_FLUSH_MS=10,
+    )
+    body = {"proposals": PROPOSALS, "ticker": "NVDA"}
+    with TestClient(create_app(settings)) as client:
+        first = client.post("/vote", json=body)
+        again = client.post("/vote", json=body)
+        assert again.headers["etag"] == first.headers["etag"]
+        assert (
+            client.post(
+                "/vote", json=body, headers={"if-none-match": first.headers["etag"]}
+            ).status_code
+            == 304
+        )
+        replay = {"idempotency-key": "k1"}
+        client.post("/vote", json=body, headers=replay)
+        client.post("/vote", json=body, headers=replay)  # repris, inte en ny röstning
+        assert client.app.state.decisions.flush()
+
+        items = client.get("/decisions", params={"ticker": "NVDA"}).json()["items"]
+    assert len(items) == 4
+    assert {item["decision"] for item in items} == {first.json()["decision"]}
+    assert all(item["proposals"] == PROPOSALS for item in items)
+
+
+def test_decisions_endpoint_is_hidden_when_disabled():
+    client = TestClient(create_app(Settings()))
+    assert client.get("/decisions").status_code == 404
+    assert client.post("/vote", json={"proposals": PROPOSALS, "ticker": "NVDA"}).status_code == 200
@@ -0,0 +1,166 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.services import fundamentals
+from corealpha_adapter.services.agents.fundamental_agent import FundamentalAgent
+from corealpha_adapter.services.fundamentals import (
+    FundamentalsError,
+    FundamentalsStore,
+    compile_snapshot,
+)
+
+
+def _write_csv(path, rows):
+    lines = ["ticker,pe,gross_margin,sector"]
+    lines += [",".join(str(v) for v in row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.fixture
+def store_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("FUNDAMENTALS_CACHE_DIR", str(tmp_path / "cache"))
+    fundamentals.reset_fundamentals_store()
+    yield tmp_path
+    fundamentals.reset_fundamentals_store()
+
+
+def test_lookup_after_compile(store_env):
+    source = store_env / "snap.csv"
+    rows = [(f"T{i}", 10 + i, 0.5, "tech") for i in range(2000)]
+    rows.append(("nvda", 31.5, 0.74, "semis"))
+    _write_csv(source, rows)
+
+    store = FundamentalsStore(str(source), poll_seconds=0)
+    assert store.snapshot is None  # laddas aldrig lat i en request
+    assert store.refresh() is True
+    snap = store.snapshot
+    assert len(snap) == 2001
+    assert snap.get("NVDA")["pe"] == pytest.approx(31.5)
+    assert snap.value(" nvda ", "gross_margin") == pytest.approx(0.74)
+    assert snap.get("T1999")["pe"] == pytest.approx(2009)
+    assert snap.get("MISSING") is None
+    # icke-numeriska kolumner blir NaN i stället för att fälla inläsningen
+    assert snap.value("NVDA", "sector") != snap.value("NVDA", "sector")
+
+
+def test_reload_swaps_snapshot_when_source_changes(store_env):
+    source = store_env / "snap.csv"
+    _write_csv(source, [("AAPL", 20, 0.40)])
+    store = FundamentalsStore(str(source), poll_seconds=0)
+    store.refresh()
+    assert store.get("AAPL")["pe"] == pytest.approx(20)
+    generation = store.generation
+
+    _write_csv(source, [("AAPL", 25, 0.45), ("MSFT", 30, 0.69)])
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert store.refresh() is True
+    assert store.generation == generation + 1
+    assert store.get("AAPL")["pe"] == pytest.approx(25)
+    assert store.get("MSFT")["gross_margin"] == pytest.approx(0.69)
+    assert store.refresh() is False
+
+
+def test_compiled_file_is_reused_across_stores(store_env):
+    source = store_env / "snap.csv"
+    _write_csv(source, [("AAPL", 20, 0.40)])
+    first = FundamentalsStore(str(source), poll_seconds=0)
+    first.refresh()
+    mtime = os.stat(first.compiled_path).st_mtime_ns
+
+    second = FundamentalsStore(str(source), poll_seconds=0)
+    assert second.compiled_path == first.compiled_path
+    second.refresh()
+    assert second.get("AAPL")["pe"] == pytest.approx(20)
+    assert os.stat(second.compiled_path).st_mtime_ns == mtime
+
+
+def test_missing_required_column(store_env):
+    source = store_env / "bad.csv"
+    source.write_text("ticker,pe\nAAPL,20\n", encoding="utf-8")
+    with pytest.raises(FundamentalsError):
+        compile_snapshot(str(source), str(store_env / "bad.bin"))
+
+
+def test_agent_reads_snapshot(store_env, monkeypatch):
+    source = store_env / "snap.csv"
+    _write_csv(source, [("NVDA", 22.0, 0.74)])
+    monkeypatch.setenv("FUNDAMENTALS_PATH", str(source))
+    monkeypatch.setenv("FUNDAMENTALS_RELOAD_SECONDS", "0")
+    fundamentals.get_fundamentals_store().refresh()
+
+    proposal = FundamentalAgent().propose("NVDA")
+    assert proposal.vote == "BUY"
+    assert proposal.features == ["PE fwd 22.0x", "GM 74%"]
+    assert "snapshot" in proposal.rationale
+
+    fallback = FundamentalAgent().propose("UNKNOWN")
+    assert "stub" in fallback.rationale
+
+
+def test_malformed_snapshot_falls_back_to_stub(store_env, monkeypatch):
+    source = store_env / "broken.csv"
+    source.write_text("ticker,pe\nNVDA,22\n", encoding="utf-8")  # gross_margin saknas
+    monkeypatch.setenv("FUNDAMENTALS_PATH", str(source))
+    monkeypatch.setenv("FUNDAMENTALS_RELOAD_SECONDS", "0")
+
+    with TestClient(create_app(Settings())) as client:
+        resp = client.post("/agent/propose", json={"ticker": "NVDA", "agent": "Fundamental"})
+    assert resp.status_code == 200 and "stub" in resp.json()["rationale"]
+    store = fundamentals.get_fundamentals_store()
+    assert store.refresh() is False  # samma trasiga fil kompileras inte om
+
+    _write_csv(source, [("NVDA", 22.0, 0.74)])
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert store.refresh() is True
+    assert "snapshot" in FundamentalAgent().propose("NVDA").rationale
+
+
+def test_unparseable_csv_is_a_fundamentals_error_and_not_retried(store_env, monkeypatch):
+    source = store_env / "huge.csv"
+    # Ett fält över csv-modulens gräns (131072 tecken) ger _csv.Error.
+    source.write_text(f"ticker,pe,gross_margin\nNVDA,{'9' * 200_000},0.7\n", encoding="utf-8")
+    with pytest.raises(FundamentalsError, match="could not be parsed"):
+        compile_snapshot(str(source), str(store_env / "huge.bin"))
+
+    monkeypatch.setenv("FUNDAMENTALS_PATH", str(source))
+    monkeypatch.setenv("FUNDAMENTALS_RELOAD_SECONDS", "0")
+    compiles = []
+    real_compile = fundamentals.compile_snapshot
+    monkeypatch.setattr(
+        fundamentals, "compile_snapshot", lambda *a: compiles.append(a) or real_compile(*a)
+    )
+    with TestClient(create_app(Settings())) as client:
+        for _ in range(3):
+            resp = client.post("/agent/propose", json={"ticker": "NVDA", "agent": "Fundamental"})
+            assert resp.status_code == 200 and "stub" in resp.json()["rationale"]
+    assert len(compiles) == 1  # bara lifespan-laddningen
+
+
+def test_snapshot_reload_changes_the_propose_etag(store_env, monkeypatch):
+    source = store_env / "snap.csv"
+    _write_csv(source, [("NVDA", 22.0, 0.74)])
+    monkeypatch.setenv("FUNDAMENTALS_PATH", str(source))
+    monkeypatch.setenv("FUNDAMENTALS_RELOAD_SECONDS", "0")
+    body = {"ticker": "NVDA", "agent": "Fundamental"}
+
+    with TestClient(create_app(Settings())) as client:
+        first = client.post("/agent/propose", json=body)
+        etag = first.headers["etag"]
+        assert client.post("/agent/propose", json=body).headers["etag"] == etag
+
+        _write_csv(source, [("NVDA", 80.0, 0.20)])
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert fundamentals.get_fundamentals_store().refresh()  # som poll-tråden gör
+
+        # Varken 304 eller cachad kropp från den gamla snapshoten.
+        fresh = client.post("/agent/propose", json=body, headers={"if-none-match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert fresh.json()["features"] == ["PE fwd 80.0x", "GM 20%"]
+    assert fresh.json() != first.json()
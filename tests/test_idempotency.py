@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.idempotency import Execution, IdempotencyStore, StoredResponse
+from corealpha_adapter.providers import ProviderError
+from corealpha_adapter.providers.stub import StubProvider
+
+BODY = {"ticker": "NVDA", "text": "strong growth"}
+
+
+class _GatedProvider(StubProvider):
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.fail = False
+
+    async def summarize(self, payload):
+        self.calls += 1
+        await self.gate.wait()
+        if self.fail:
+            raise ProviderError("upstream down")
+        return await super().summarize(payload)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = _GatedProvider()
+    monkeypatch.setattr("corealpha_adapter.routers.summarize.get_provider", lambda: provider)
+    return provider
+
+
+def _client(**overrides):
+    app = create_app(Settings(RATE_LIMIT="1000/minute", **overrides))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def _post(client, key="k-1", body=BODY, **headers):
+    return client.post("/summarize", json=body, headers={"idempotency-key": key, **headers})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retry_attaches_and_later_retry_is_replayed(provider):
+    async with _client() as client:
+        first = asyncio.ensure_future(_post(client))
+        second = asyncio.ensure_future(_post(client))
+        await asyncio.sleep(0.05)
+        assert provider.calls == 1  # retryn väntar på den pågående exekveringen
+        provider.gate.set()
+        first, second = await asyncio.gather(first, second)
+        third = await _post(client)
+
+    assert [r.status_code for r in (first, second, third)] == [200, 200, 200]
+    assert first.content == second.content == third.content
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == third.headers["idempotent-replayed"] == "true"
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_other_body_is_rejected_and_keys_are_scoped(provider):
+    provider.gate.set()
+    async with _client() as client:
+        assert (await _post(client)).status_code == 200
+        conflict = await _post(client, body={**BODY, "text": "weak demand"})
+        assert conflict.status_code == 422
+        assert "different request body" in conflict.json()["detail"]
+        assert (await _post(client, key="k-2")).status_code == 200
+        assert (await client.post("/summarize", json=BODY)).status_code == 200
+        assert (await _post(client, key="x" * 256)).status_code == 400
+    assert provider.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_in_flight_but_not_stored(provider):
+    provider.fail = True
+    async with _client() as client:
+        first = asyncio.ensure_future(_post(client))
+        second = asyncio.ensure_future(_post(client))
+        await asyncio.sleep(0.05)
+        provider.gate.set()
+        assert [r.status_code for r in await asyncio.gather(first, second)] == [502, 502]
+        assert provider.calls == 1
+
+        provider.fail = False
+        retry = await _post(client)
+    assert retry.status_code == 200 and "idempotent-replayed" not in retry.headers
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_execution_finishes_after_client_disconnect(provider):
+    async with _client() as client:
+        abandoned = asyncio.ensure_future(_post(client))
+        await asyncio.sleep(0.05)
+        abandoned.cancel()
+        provider.gate.set()
+        await asyncio.sleep(0.05)
+        retry = await _post(client)
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "true"
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_store_ignores_the_header(provider):
+    provider.gate.set()
+    async with _client(IDEMPOTENCY_MAX_ENTRIES=0) as client:
+        await _post(client)
+        await _post(client)
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_store_expires_and_is_bounded():
+    store = IdempotencyStore(ttl=10, max_entries=2)
+    task = asyncio.ensure_future(asyncio.sleep(0))
+    executions = [Execution("f", task) for _ in range(3)]
+    for key, execution in zip("abc", executions):
+        store.begin(key, execution)
+    assert store.get("a") is None and len(store) == 2
+
+    store.finish("b", executions[1], StoredResponse(200, b"{}", []))
+    assert store.get("b").response.body == b"{}"
+    assert store.get("b", now=executions[1].expires_at) is None
+    store.finish("c", executions[2], None)  # fel sparas inte
+    assert store.get("c") is None
+    await task
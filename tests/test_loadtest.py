@@ -0,0 +1,119 @@
+import time
+
+import httpx
+import pytest
+
+from benchmarks.loadgen import parse_mix, percentile, run_load, upstream_delta
+from benchmarks.mock_fingpt import Faults, Latency, MockProfile, create_mock_app
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.providers import ProviderCircuitOpenError, ProviderError
+from corealpha_adapter.providers.fingpt import FinGPTProvider
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_latency_and_route_specs():
+    assert Latency.parse("uniform:0.01:0.2") == Latency("uniform", (0.01, 0.2))
+    for bad in ("normal:1", "fixed", "uniform:1", "exp:-1", "fixed:x"):
+        with pytest.raises(ValueError):
+            Latency.parse(bad)
+    profile = MockProfile()
+    profile.override("/vote:error_rate=0.5,drip_chunks=3,latency=fixed:0.1")
+    assert profile.for_path("/vote") == Faults(
+        latency=Latency("fixed", (0.1,)), error_rate=0.5, drip_chunks=3
+    )
+    assert profile.for_path("/sentiment") == Faults()
+    with pytest.raises(ValueError):
+        profile.override("/nope:error_rate=1")
+    with pytest.raises(ValueError):
+        profile.override("/vote:colour=red")
+
+
+@pytest.mark.asyncio
+async def test_mock_serves_stub_payloads_and_injects_faults():
+    profile = MockProfile()
+    profile.override("/vote:error_rate=1")
+    profile.override("/summarize:drip_rate=1,drip_chunks=4,drip_interval=0.02")
+    app = create_mock_app(profile, seed=1)
+    async with _client(app) as client:
+        sentiment = await client.post("/sentiment", json={"texts": ["strong growth"]})
+        assert sentiment.status_code == 200 and sentiment.json()["score"] == 0.9
+
+        assert (await client.post("/vote", json={"proposals": []})).status_code == 503
+
+        started = time.perf_counter()
+        dripped = await client.post("/summarize", json={"text": "hello"})
+        assert time.perf_counter() - started >= 0.05
+        assert dripped.json()["summary"] == "hello"
+
+        stats = (await client.get("/_mock/stats")).json()
+    assert stats == {"/sentiment ok": 1, "/summarize drip": 1, "/vote error": 1}
+
+
+class _MockedFinGPT(FinGPTProvider):
+    def __init__(self, app):
+        super().__init__()
+        self._app = app
+
+    async def _execute_request(self, path, payload):
+        async with _client(self._app) as client:
+            return await client.post(path, json=payload, timeout=self._timeout)
+
+
+@pytest.mark.asyncio
+async def test_provider_retries_and_opens_circuit_against_mock(monkeypatch):
+    monkeypatch.setenv("FINGPT_BASE_URL", "http://mock")
+    monkeypatch.setenv("FINGPT_API_KEY", "x")
+    monkeypatch.setenv("HTTP_MAX_RETRIES", "2")
+    monkeypatch.setenv("HTTP_BACKOFF_SECONDS", "0")
+    provider = _MockedFinGPT(create_mock_app(MockProfile(Faults(error_rate=1))))
+
+    with pytest.raises(ProviderError, match="503"):
+        await provider.sentiment({"texts": ["a"]})
+    assert provider.circuit_open
+    with pytest.raises(ProviderCircuitOpenError):
+        await provider.sentiment({"texts": ["b"]})
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_open_model_stats():
+    app = create_app(Settings(RATE_LIMIT="1000000/minute", ACCESS_LOG_SAMPLE_RATE=0))
+    async with _client(app) as client:
+        result = await run_load(
+            client, parse_mix("summarize=1,vote=1"), rate=100, duration=0.3, seed=3
+        )
+    report = result.report()
+    rows = report["endpoints"]
+    assert report["scheduled"] == sum(row["requests"] for row in rows.values()) > 10
+    assert report["dropped"] == 0
+    for row in rows.values():
+        assert set(row["statuses"]) == {"200"}
+        assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["p999_ms"]
+
+
+def test_percentile_mix_and_upstream_delta():
+    values = [i / 1000 for i in range(1, 1001)]
+    assert [percentile(values, q) for q in (50, 99, 99.9, 100)] == [0.5, 0.99, 0.999, 1.0]
+    with pytest.raises(ValueError):
+        parse_mix("summarize=1,ping=1")
+
+    before = "corealpha_circuit_opened_total 1.0\n"
+    after = (
+        "# TYPE corealpha_upstream_retries_total counter\n"
+        'corealpha_upstream_retries_total{path="/vote"} 4.0\n'
+        "# TYPE corealpha_upstream_request_duration_seconds histogram\n"
+        'corealpha_upstream_request_duration_seconds_count{path="/vote",status="503"} 6.0\n'
+        "# TYPE corealpha_circuit_opened_total counter\n"
+        "corealpha_circuit_opened_total 3.0\n"
+        "# TYPE corealpha_circuit_open gauge\n"
+        "corealpha_circuit_open 1.0\n"
+    )
+    assert upstream_delta(before, after) == {
+        "attempts": {"/vote": {"503": 6}},
+        "retries": {"/vote": 4},
+        "circuit_opened": 2,
+        "circuit_open_at_end": True,
+    }
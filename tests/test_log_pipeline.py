@@ -0,0 +1,54 @@
+import io
+import json
+
+import structlog
+
+from corealpha_adapter.observability.log_pipeline import (
+    AccessLogSampler,
+    LogPipeline,
+    QueueLogger,
+    _add_raw_timestamp,
+    _to_queue_logger,
+)
+
+
+def _logger(pipeline):
+    return structlog.wrap_logger(
+        QueueLogger(pipeline),
+        processors=[structlog.processors.add_log_level, _add_raw_timestamp, _to_queue_logger],
+    )
+
+
+def test_records_are_rendered_by_writer_thread():
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream=stream)
+    pipeline.start()
+    try:
+        _logger(pipeline).info("access", status=200, rid="r1")
+        assert pipeline.flush()
+    finally:
+        pipeline.close()
+    record = json.loads(stream.getvalue())
+    assert record["event"] == "access"
+    assert record["level"] == "info"
+    assert record["rid"] == "r1"
+    assert record["timestamp"].endswith("Z")
+    assert "_ts" not in record
+
+
+def test_overflow_drops_and_counts():
+    pipeline = LogPipeline(stream=io.StringIO(), maxsize=2)
+    log = _logger(pipeline)
+    for i in range(5):
+        log.info("event", i=i)
+    assert pipeline.dropped == 3
+    assert pipeline.qsize() == 2
+
+
+def test_sampler_always_keeps_errors_and_slow_requests():
+    sampler = AccessLogSampler(sample_rate=0.0, slow_ms=500, always_status=400)
+    assert sampler.should_log(500, 1)
+    assert sampler.should_log(404, 1)
+    assert sampler.should_log(200, 750)
+    assert not sampler.should_log(200, 10)
+    assert AccessLogSampler(sample_rate=1.0).should_log(200, 10)
@@ -0,0 +1,154 @@
+import asyncio
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.providers import ProviderError
+from corealpha_adapter.providers.stub import StubProvider
+from corealpha_adapter.schemas import MAX_TEXT_LEN
+from corealpha_adapter.services import long_summary
+from corealpha_adapter.services.long_summary import (
+    LongSummarizer,
+    chunk_text,
+    split_sentences,
+)
+
+WORDS = "revenue margin guidance growth demand supply quarter segment data center".split()
+
+
+def _document(sentences=300, seed=7):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))).capitalize() + "."
+        for _ in range(sentences)
+    ]
+
+
+class _CountingProvider(StubProvider):
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def summarize(self, payload):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        return await super().summarize(payload)
+
+
+def test_chunks_are_sentence_aligned_bounded_and_overlapping():
+    sentences = _document()
+    chunks = chunk_text(" ".join(sentences), size=1000, overlap=400)
+    assert len(chunks) > 1 and all(len(c) <= 1000 and c.endswith(".") for c in chunks)
+    overlapping = 0
+    for previous, current in zip(chunks, chunks[1:]):
+        shared = [s for s in split_sentences(current) if s in split_sentences(previous)]
+        if shared:  # överlappet är hela meningar från slutet av föregående chunk
+            assert previous.endswith(" ".join(shared)) and current.startswith(shared[0])
+            overlapping += 1
+    assert overlapping >= len(chunks) // 2
+    covered = {s for chunk in chunks for s in split_sentences(chunk)}
+    assert covered == set(sentences)
+
+
+def test_edit_only_changes_nearby_chunks():
+    sentences = _document()
+    before = chunk_text(" ".join(sentences), size=1000, overlap=200)
+    sentences[150] = "Guidance was withdrawn entirely."
+    after = chunk_text(" ".join(sentences), size=1000, overlap=200)
+    changed = [chunk for chunk in before if chunk not in after]
+    assert 1 <= len(changed) <= 3 < len(before)
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_is_bounded_and_caches_unchanged_chunks():
+    provider = _CountingProvider()
+    summarizer = LongSummarizer(chunk_chars=1000, overlap_chars=200, concurrency=3)
+    sentences = _document()
+    result, stats = await summarizer.summarize(provider, " ".join(sentences), ticker="NVDA")
+    assert result["summary"] and stats["chunks"] > 3
+    assert provider.peak <= 3 and stats["provider_calls"] == provider.calls
+
+    _, again = await summarizer.summarize(provider, " ".join(sentences), ticker="NVDA")
+    assert again["provider_calls"] == 0 and again["cached_calls"] == stats["provider_calls"]
+
+    sentences[150] = "Guidance was withdrawn entirely."
+    _, edited = await summarizer.summarize(provider, " ".join(sentences), ticker="NVDA")
+    assert 0 < edited["provider_calls"] < stats["provider_calls"]
+
+
+@pytest.mark.asyncio
+async def test_failing_chunk_cancels_its_siblings():
+    started, cancelled = [], []
+
+    class Failing(StubProvider):
+        async def summarize(self, payload):
+            started.append(payload["text"])
+            if len(started) == 1:
+                raise ProviderError("FinGPT request failed")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(payload["text"])
+                raise
+
+    summarizer = LongSummarizer(chunk_chars=1000, overlap_chars=0, concurrency=4)
+    with pytest.raises(ProviderError, match="request failed"):
+        await asyncio.wait_for(summarizer.summarize(Failing(), " ".join(_document())), 2.0)
+    assert len(started) > 1 and sorted(cancelled) == sorted(started[1:])
+    assert len(summarizer._cache) == 0
+
+
+class _EchoProvider(StubProvider):
+    """Summarizes nothing: every "summary" is as long as its input."""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def summarize(self, payload):
+        self.inputs.append(payload["text"])
+        return {"summary": payload["text"], "ticker": None, "sources": []}
+
+
+@pytest.mark.asyncio
+async def test_reduce_runs_until_one_chunk_and_flags_truncation_otherwise(monkeypatch):
+    text = " ".join(_document(sentences=600))
+    levels = []
+
+    def counting_chunk_text(text, size, overlap=0):
+        chunks = chunk_text(text, size, overlap)
+        levels.append(len(chunks))
+        return chunks
+
+    monkeypatch.setattr(long_summary, "chunk_text", counting_chunk_text)
+    # Stubben kortar varje chunk till ~200 tecken: långsam krympning, många nivåer.
+    summarizer = LongSummarizer(chunk_chars=1000, overlap_chars=0, cache_max_entries=0)
+    _, stats = await summarizer.summarize(StubProvider(), text)
+    assert stats["truncated"] is False
+    assert len(levels) > 5 and levels[-1] == 1  # fler än fyra reduce-nivåer
+    assert stats["provider_calls"] < 2 * stats["chunks"]
+
+    echo = _EchoProvider()
+    _, stats = await LongSummarizer(chunk_chars=1000, overlap_chars=0).summarize(echo, text)
+    assert stats["truncated"] is True
+    assert stats["provider_calls"] == stats["chunks"] + 1  # ingen nivå som inte krymper
+    assert len(echo.inputs[-1]) == 1000
+
+
+def test_long_endpoint_summarizes_beyond_max_text_len():
+    text = " ".join(_document(sentences=600))
+    assert len(text) > MAX_TEXT_LEN
+    client = TestClient(create_app(Settings(RATE_LIMIT="1000/minute")))
+    resp = client.post("/summarize/long", json={"ticker": "NVDA", "text": text})
+    body = resp.json()
+    assert resp.status_code == 200 and body["summary"]
+    assert body["chunks"] > 1 and body["cached_calls"] == 0 and body["truncated"] is False
+
+    assert client.post("/summarize", json={"text": text}).status_code == 422
+    assert client.post("/summarize/long", json={"ticker": "NVDA"}).status_code == 422
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from corealpha_adapter.middleware import AdmissionControlMiddleware
+from corealpha_adapter.observability.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_measured_and_reported():
+    slow_before = REGISTRY.get_sample_value("corealpha_event_loop_slow_callbacks_total") or 0.0
+    monitor = LoopLagMonitor(interval=0.01, slow_callback=0.05, max_lag=0.03, sustain=1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        assert not monitor.overloaded
+        time.sleep(0.15)  # blockerar loopen
+        await asyncio.sleep(0.002)
+        assert monitor.lag >= 0.1
+        assert monitor.overloaded
+        assert monitor.slow_callbacks >= 1
+        await asyncio.sleep(0.05)
+        assert not monitor.overloaded
+    finally:
+        await monitor.stop()
+    assert not monitor.running
+    slow_after = REGISTRY.get_sample_value("corealpha_event_loop_slow_callbacks_total")
+    assert slow_after >= slow_before + 1
+    assert REGISTRY.get_sample_value("corealpha_event_loop_lag_seconds_count") > 0
+
+
+def test_overloaded_requires_sustained_lag():
+    monitor = LoopLagMonitor(max_lag=0.05, sustain=3)
+    for lag in (0.2, 0.2):
+        monitor.observe(lag)
+    assert not monitor.overloaded
+    monitor.observe(0.2)
+    assert monitor.overloaded
+    monitor.observe(0.01)
+    assert not monitor.overloaded
+    assert not LoopLagMonitor(max_lag=0.0, sustain=1).overloaded
+
+
+class _Monitor:
+    overloaded = True
+
+
+def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def test_admission_sheds_with_retry_after_but_exempts_probes():
+    app = Starlette(
+        routes=[Route(path, _ok) for path in ("/vote", "/health", "/metrics", "/healthz/deep")]
+    )
+    monitor = _Monitor()
+    app.add_middleware(AdmissionControlMiddleware, monitor=monitor, retry_after=2)
+    client = TestClient(app)
+
+    shed = client.get("/vote")
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "2"
+    for path in ("/health", "/metrics", "/healthz/deep"):
+        assert client.get(path).status_code == 200
+
+    monitor.overloaded = False
+    assert client.get("/vote").status_code == 200
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from corealpha_adapter.observability.metrics import provider_path, status_label
+from corealpha_adapter.providers import ProviderError
+from corealpha_adapter.providers.fingpt import FinGPTProvider
+from corealpha_adapter.schemas import VoteProposal, VoteRequest
+from corealpha_adapter.services.agents.registry import get_agent_registry
+from corealpha_adapter.services.voting import TOPSISEngine, WSUMEngine
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setenv("FINGPT_BASE_URL", "https://api.fingpt.test")
+    monkeypatch.setenv("FINGPT_API_KEY", "secret")
+    monkeypatch.setenv("HTTP_MAX_RETRIES", "1")
+    monkeypatch.setenv("HTTP_BACKOFF_SECONDS", "0.0")
+    monkeypatch.setenv("HTTP_CACHE_MAX_ENTRIES", "2")
+
+    async def fast_sleep(_):
+        return None
+
+    monkeypatch.setattr("corealpha_adapter.providers.fingpt.asyncio.sleep", fast_sleep)
+    return FinGPTProvider()
+
+
+def test_label_helpers_bound_cardinality():
+    assert provider_path("/summarize") == "/summarize"
+    assert provider_path("/anything/else") == "other"
+    assert status_label(200) == "200"
+    assert status_label(999) == "invalid"
+    assert status_label("timeout") == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_upstream_latency_and_cache_events(provider):
+    ok = _sample(
+        "corealpha_upstream_request_duration_seconds_count",
+        path="/summarize",
+        status="200",
+    )
+    hits = _sample("corealpha_provider_cache_events_total", event="hit")
+    misses = _sample("corealpha_provider_cache_events_total", event="miss")
+    evictions = _sample("corealpha_provider_cache_events_total", event="eviction")
+
+    with respx.mock() as respx_mock:
+        respx_mock.post("https://api.fingpt.test/summarize").mock(
+            return_value=httpx.Response(200, json={"summary": "x"})
+        )
+        await provider.summarize({"text": "a"})
+        await provider.summarize({"text": "a"})
+        await provider.summarize({"text": "b"})
+        await provider.summarize({"text": "c"})
+
+    assert len(provider._cache) == 2
+    assert (
+        _sample(
+            "corealpha_upstream_request_duration_seconds_count",
+            path="/summarize",
+            status="200",
+        )
+        == ok + 3
+    )
+    assert _sample("corealpha_provider_cache_events_total", event="hit") == hits + 1
+    assert _sample("corealpha_provider_cache_events_total", event="miss") == misses + 3
+    assert _sample("corealpha_provider_cache_events_total", event="eviction") == evictions + 1
+    assert _sample("corealpha_provider_cache_lock_wait_seconds_count") > 0
+
+
+@pytest.mark.asyncio
+async def test_retries_and_circuit_metrics(provider, monkeypatch):
+    monkeypatch.setattr(provider, "_circuit_threshold", 2)
+    retries = _sample("corealpha_upstream_retries_total", path="/vote")
+    timeouts = _sample(
+        "corealpha_upstream_request_duration_seconds_count",
+        path="/vote",
+        status="timeout",
+    )
+    opened = _sample("corealpha_circuit_opened_total")
+    request = httpx.Request("POST", "https://api.fingpt.test/vote")
+
+    with respx.mock() as respx_mock:
+        respx_mock.post("https://api.fingpt.test/vote").mock(
+            side_effect=httpx.ReadTimeout("slow", request=request)
+        )
+        with pytest.raises(ProviderError):
+            await provider.vote({"proposals": []})
+
+    assert _sample("corealpha_upstream_retries_total", path="/vote") == retries + 1
+    assert (
+        _sample(
+            "corealpha_upstream_request_duration_seconds_count",
+            path="/vote",
+            status="timeout",
+        )
+        == timeouts + 2
+    )
+    assert _sample("corealpha_circuit_opened_total") == opened + 1
+    assert _sample("corealpha_circuit_open") == 1.0
+
+    await provider._record_success()
+    assert _sample("corealpha_circuit_open") == 0.0
+
+
+def test_agent_and_vote_engine_metrics():
+    registry = get_agent_registry()
+    agent = registry.get("Sentiment")
+    before = _sample("corealpha_agent_propose_duration_seconds_count", agent="Sentiment")
+    resp = registry.propose(agent, ticker="NVDA", sentiment=0.3)
+    assert resp.agent
+    assert (
+        _sample("corealpha_agent_propose_duration_seconds_count", agent="Sentiment") == before + 1
+    )
+
+    req = VoteRequest(
+        proposals=[VoteProposal(agent="a", vote="BUY", weight=1.0, confidence=0.9)] * 3
+    )
+    for engine, method in ((WSUMEngine(), "WSUM"), (TOPSISEngine(), "TOPSIS")):
+        count = _sample("corealpha_vote_engine_duration_seconds_count", method=method)
+        engine.vote(req)
+        assert _sample("corealpha_vote_engine_duration_seconds_count", method=method) == count + 1
+
+
+def test_hot_path_metrics_are_exposed():
+    from corealpha_adapter.app import app
+
+    text = TestClient(app).get("/metrics").text
+    for name in (
+        "corealpha_upstream_request_duration_seconds",
+        "corealpha_provider_cache_events_total",
+        "corealpha_circuit_open",
+        "corealpha_agent_propose_duration_seconds",
+        "corealpha_vote_engine_duration_seconds",
+    ):
+        assert name in text
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from corealpha_adapter.middleware import RequestIDMiddleware, SecurityHeadersMiddleware
+
+
+def _stream(request):
+    async def gen():
+        for i in range(3):
+            yield f"chunk{i}\n".encode()
+
+    return StreamingResponse(gen(), media_type="text/plain")
+
+
+def _plain(request):
+    return PlainTextResponse("ok", headers={"x-frame-options": "sameorigin"})
+
+
+def _app():
+    app = Starlette(routes=[Route("/stream", _stream), Route("/plain", _plain)])
+    forced = [(b"x-frame-options", b"deny")]
+    defaults = [(b"content-security-policy", b"default-src 'self'")]
+    app.add_middleware(SecurityHeadersMiddleware, forced=forced, defaults=defaults)
+    app.add_middleware(RequestIDMiddleware)
+    return app
+
+
+def test_forced_headers_replace_route_headers():
+    client = TestClient(_app())
+    resp = client.get("/plain")
+    assert resp.headers.get_list("x-frame-options") == ["deny"]
+    assert resp.headers["content-security-policy"] == "default-src 'self'"
+
+
+def test_streaming_response_passes_through():
+    client = TestClient(_app())
+    resp = client.get("/stream", headers={"x-request-id": "rid-1"})
+    assert resp.text == "chunk0\nchunk1\nchunk2\n"
+    assert resp.headers["x-request-id"] == "rid-1"
+    assert resp.headers["x-frame-options"] == "deny"
+
+
+def test_request_id_generated_when_missing():
+    client = TestClient(_app())
+    assert len(client.get("/plain").headers["x-request-id"]) == 36
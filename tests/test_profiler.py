@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.observability.profiler import (
+    ProfilerBusyError,
+    ProfilerTagMiddleware,
+    SamplingProfiler,
+    profile,
+)
+
+
+def _spin_for_profiler(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _other_spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_samples_other_threads_and_renders_both_formats():
+    profiler = SamplingProfiler(interval=0.002)
+    worker = threading.Thread(target=_spin_for_profiler, args=(0.2,), name="spinner")
+    worker.start()
+    profiler.start()
+    worker.join()
+    profiler.stop()
+
+    assert profiler.sample_count > 0
+    spinner_lines = [
+        line for line in profiler.collapsed().splitlines() if line.startswith("spinner;")
+    ]
+    assert any("_spin_for_profiler" in line for line in spinner_lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in spinner_lines)
+
+    doc = profiler.speedscope()
+    frames = doc["shared"]["frames"]
+    spinner = next(p for p in doc["profiles"] if p["name"] == "spinner")
+    assert len(spinner["samples"]) == len(spinner["weights"])
+    leafs = {frames[sample[-1]]["name"] for sample in spinner["samples"]}
+    assert any(name.startswith("_spin_for_profiler") for name in leafs)
+
+
+@pytest.mark.asyncio
+async def test_path_filter_keeps_only_matching_requests():
+    target = FastAPI()
+
+    @target.get("/vote")
+    async def busy():
+        _spin_for_profiler(0.15)
+        return {"ok": True}
+
+    @target.get("/other")
+    async def other():
+        _other_spin(0.15)
+        return {"ok": True}
+
+    target.add_middleware(ProfilerTagMiddleware)
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def traffic():
+            await asyncio.sleep(0.02)
+            await client.get("/other")
+            await client.get("/vote")
+
+        result, _ = await asyncio.gather(
+            profile(0.4, interval=0.002, path_prefix="/vote"), traffic()
+        )
+
+    text = result.collapsed()
+    assert "_spin_for_profiler" in text
+    assert "_other_spin" not in text
+
+
+@pytest.mark.asyncio
+async def test_only_one_profile_at_a_time():
+    running = asyncio.ensure_future(profile(0.1))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ProfilerBusyError):
+        await profile(0.01)
+    await running
+
+
+def test_admin_endpoint_requires_admin_key():
+    assert (
+        TestClient(create_app(Settings(ADMIN_API_KEY=""))).get("/admin/profile").status_code == 404
+    )
+
+    client = TestClient(create_app(Settings(ADMIN_API_KEY="s3cret", PROFILER_ENABLED=True)))
+    assert client.get("/admin/profile", headers={"x-admin-key": "nope"}).status_code == 403
+
+    resp = client.get(
+        "/admin/profile",
+        params={"seconds": 0.05, "format": "speedscope"},
+        headers={"x-admin-key": "s3cret"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["$schema"].startswith("https://www.speedscope.app/")
+    assert int(resp.headers["x-profile-samples"]) > 0
+
+    client = TestClient(create_app(Settings(ENV="prod", ADMIN_API_KEY="s3cret")))
+    resp = client.get("https://testserver/admin/profile", headers={"x-admin-key": "s3cret"})
+    assert resp.status_code == 404
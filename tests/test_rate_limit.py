@@ -0,0 +1,160 @@
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.ratelimit import MemoryBackend, SQLiteBackend, build_backend, parse_rate
+from corealpha_adapter.ratelimit.backends import encode_command, read_reply
+
+
+def test_parse_rate():
+    rate = parse_rate("60/minute")
+    assert (rate.amount, rate.period) == (60, 60.0)
+    assert parse_rate("1000 per hour").refill_per_second == pytest.approx(1000 / 3600)
+    assert parse_rate("10/5 seconds").period == 5.0
+    with pytest.raises(ValueError):
+        parse_rate("lots")
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_denies_after_capacity():
+    backend = MemoryBackend()
+    results = [await backend.acquire("k", 3, 0.001) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] > 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_bucket_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "rl.db")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    assert (await worker_a.acquire("k", 2, 0.001))[0]
+    assert (await worker_b.acquire("k", 2, 0.001))[0]
+    allowed, retry_after = await worker_a.acquire("k", 2, 0.001)
+    assert not allowed and retry_after > 0
+    assert (await worker_b.acquire("other", 2, 0.001))[0]
+    assert await worker_a.ping()
+
+
+def test_build_backend_from_url(tmp_path):
+    assert build_backend("memory://").name == "memory"
+    sqlite = build_backend(f"sqlite://{tmp_path}/rl.db")
+    assert sqlite.name == "sqlite" and sqlite.path == f"{tmp_path}/rl.db"
+    redis = build_backend("redis://:pw@cache:6380/2")
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache", 6380, 2, "pw")
+
+
+def test_resp_roundtrip():
+    assert encode_command(("EVALSHA", "abc", 1, "key", 0.5)) == (
+        b"*5\r\n$7\r\nEVALSHA\r\n$3\r\nabc\r\n$1\r\n1\r\n$3\r\nkey\r\n$3\r\n0.5\r\n"
+    )
+
+    async def parse(raw):
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_reply(reader)
+
+    assert asyncio.run(parse(b"*2\r\n:1\r\n$4\r\n2.75\r\n")) == [1, "2.75"]
+    assert asyncio.run(parse(b"+PONG\r\n")) == "PONG"
+
+
+@contextmanager
+def _app(rate):
+    yield TestClient(create_app(Settings(RATE_LIMIT=rate)))
+
+
+def test_default_limit_applies_per_key():
+    with _app("2/minute") as client:
+        codes = [client.get("/health", headers={"x-api-key": "a"}).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        limited = client.get("/health", headers={"x-api-key": "a"})
+        assert int(limited.headers["retry-after"]) >= 1
+        assert client.get("/health", headers={"x-api-key": "b"}).status_code == 200
+
+
+def test_default_limit_is_scoped_per_endpoint():
+    with _app("2/minute") as client:
+        headers = {"x-api-key": "probe"}
+        codes = [client.get("/health", headers=headers).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        # /health har förbrukat sin kvot; andra routes och 404:or har egna hinkar.
+        assert client.get("/healthz", headers=headers).status_code == 200
+        assert client.get("/metrics", headers=headers).status_code == 200
+        assert client.get("/missing", headers=headers).status_code == 404
+
+
+def test_route_limit_replaces_default_limit():
+    with _app("1/minute") as client:
+        body = {"ticker": "NVDA", "agent": "Macro"}
+        headers = {"x-api-key": "route"}
+        codes = [
+            client.post("/agent/propose", json=body, headers=headers).status_code for _ in range(31)
+        ]
+        assert codes[:30] == [200] * 30
+        assert codes[30] == 429
+
+
+@pytest.mark.asyncio
+async def test_sqlite_busy_lock_fails_fast_off_the_loop(tmp_path):
+    import sqlite3
+    import time
+
+    path = str(tmp_path / "rl.db")
+    backend = SQLiteBackend(path, busy_timeout=0.05)
+    assert (await backend.acquire("k", 2, 1.0))[0]
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")  # en annan worker håller skrivlåset
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    started = time.perf_counter()
+    with pytest.raises(sqlite3.OperationalError):
+        await backend.acquire("k", 2, 1.0)
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    holder.execute("ROLLBACK")
+    assert elapsed < 0.5 and ticks >= 3  # loopen fortsatte under väntan
+
+
+@pytest.mark.asyncio
+async def test_redis_commands_run_concurrently_over_a_pool():
+    active = peak = 0
+
+    async def handle(reader, writer):
+        nonlocal active, peak
+        try:
+            while True:
+                await read_reply(reader)
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.05)
+                active -= 1
+                writer.write(b"+PONG\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = build_backend(f"redis://127.0.0.1:{port}/0")
+    backend.timeout = 1.0
+    try:
+        assert all(await asyncio.gather(*(backend.ping() for _ in range(8))))
+        assert peak > 1 and len(backend._idle) == peak
+        await backend.ping()  # återanvänder en ledig anslutning
+        assert len(backend._idle) == peak
+    finally:
+        await backend.close()
+        server.close()
+        await server.wait_closed()
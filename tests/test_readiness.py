@@ -0,0 +1,200 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.providers import ProviderConfigurationError
+from corealpha_adapter.providers.fingpt import FinGPTProvider
+from corealpha_adapter.services.readiness import (
+    ProviderProbe,
+    Readiness,
+    ReadinessCheck,
+    build_readiness,
+)
+
+
+@pytest.mark.asyncio
+async def test_checks_run_concurrently_with_timeouts():
+    readiness = Readiness(cache_seconds=0)
+
+    async def slow_ok():
+        await asyncio.sleep(0.1)
+        return True
+
+    async def hangs():
+        await asyncio.sleep(10)
+        return True
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    readiness.register("a", slow_ok)
+    readiness.register("b", slow_ok)
+    readiness.register("hangs", hangs, timeout=0.05, critical=False)
+    readiness.register("broken", broken, critical=False)
+
+    started = time.perf_counter()
+    ok, results = await readiness.run()
+    assert time.perf_counter() - started < 0.18
+    assert ok  # bara icke-kritiska checks fallerade
+    assert results["hangs"].detail == "timeout after 0.05s"
+    assert results["broken"].detail == "RuntimeError: boom"
+
+    readiness.register("broken", broken)
+    ok, _ = await readiness.run()
+    assert not ok
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_between_probes():
+    calls = 0
+
+    async def counted():
+        nonlocal calls
+        calls += 1
+        return True
+
+    readiness = Readiness(cache_seconds=60)
+    readiness.register("counted", counted)
+    await asyncio.gather(*(readiness.run() for _ in range(5)))
+    assert calls == 1
+
+
+class _Provider:
+    def __init__(self):
+        self.pings = 0
+        self.circuit_open = False
+        self.fail = False
+
+    async def ping(self):
+        self.pings += 1
+        if self.fail:
+            raise ProviderConfigurationError("FINGPT_API_KEY is not configured")
+        return True
+
+
+@pytest.mark.asyncio
+async def test_provider_probe_runs_in_background_not_per_request():
+    provider = _Provider()
+    probe = ProviderProbe(lambda: provider, interval=0.05)
+    probe.start()
+    try:
+        await asyncio.sleep(0.01)
+        for _ in range(10):
+            assert await probe.check() == (True, None)
+        assert provider.pings == 1
+
+        provider.fail = True
+        await asyncio.sleep(0.06)
+        ok, detail = await probe.check()
+        assert not ok
+        assert detail == "ProviderConfigurationError: FINGPT_API_KEY is not configured"
+    finally:
+        await probe.stop()
+
+
+@pytest.mark.asyncio
+async def test_provider_probe_stop_is_not_lost_when_ping_answers_in_the_same_tick():
+    answer = asyncio.get_running_loop().create_future()
+
+    class Provider:
+        async def ping(self):
+            return await answer
+
+    probe = ProviderProbe(lambda: Provider(), interval=3600)
+    probe.start()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    # Svaret och stop() i samma varv: cancel får inte försvinna (då sover proben en timme).
+    answer.set_result(True)
+    stopping = asyncio.ensure_future(probe.stop())
+    done, _ = await asyncio.wait({stopping}, timeout=1)
+    if not done:
+        stopping.cancel()  # städa upp den hängande proben
+    assert done
+
+
+@pytest.mark.asyncio
+async def test_standard_checks_cover_circuit_warmup_and_backend():
+    provider = _Provider()
+
+    class Backend:
+        name = "sqlite"
+
+        async def ping(self):
+            return True
+
+    class Scheduler:
+        run_on_startup = True
+
+        class state:
+            runs = 0
+
+    class Monitor:
+        overloaded = False
+        lag = 0.002
+
+    readiness, _ = build_readiness(
+        lambda: provider,
+        rate_limit_backend=Backend(),
+        loop_monitor=Monitor(),
+        warmup=lambda: Scheduler,
+        cache_seconds=0,
+    )
+    assert readiness.names() == ["provider", "circuit", "cache_backend", "warmup", "event_loop"]
+    ok, results = await readiness.run()
+    assert not ok
+    assert results["warmup"].detail == "warm-up not finished"
+    assert results["cache_backend"].ok
+
+    Scheduler.state.runs = 1
+    provider.circuit_open = True
+    ok, results = await readiness.run()
+    assert not ok
+    assert results["circuit"].detail == "circuit breaker open"
+
+    provider.circuit_open = False
+    assert (await readiness.run())[0]
+
+
+@pytest.mark.asyncio
+async def test_fingpt_ping_and_circuit_state(monkeypatch):
+    monkeypatch.setenv("FINGPT_BASE_URL", "https://api.fingpt.test")
+    monkeypatch.setenv("FINGPT_API_KEY", "secret")
+    provider = FinGPTProvider()
+    with respx.mock() as respx_mock:
+        route = respx_mock.get("https://api.fingpt.test/health")
+        route.return_value = httpx.Response(200)
+        assert await provider.ping()
+        route.return_value = httpx.Response(503)
+        assert not await provider.ping()
+
+    assert not provider.circuit_open
+    provider._circuit_threshold = 1
+    await provider._record_failure(time.monotonic())
+    assert provider.circuit_open
+
+
+def test_readyz_reports_checks_and_503_when_not_ready():
+    app = create_app()
+    client = TestClient(app)
+    body = client.get("/readyz").json()
+    assert body["ok"] is True
+    assert {"provider", "circuit", "cache_backend", "event_loop"} <= set(body["checks"])
+
+    async def down():
+        return False, "down"
+
+    app.state.readiness._checks = [ReadinessCheck("provider", down)]
+    app.state.readiness._cached = None
+    resp = client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["provider"] == {
+        "ok": False,
+        "ms": pytest.approx(0, abs=50),
+        "detail": "down",
+    }
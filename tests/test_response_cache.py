@@ -0,0 +1,111 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.response_cache import CachedResponse, ResponseCache, etag_matches
+from corealpha_adapter.services.agents.registry import AgentRegistry
+
+PROPOSE = {"ticker": "NVDA", "agent": "Fundamental", "sentiment": 0.2}
+VOTE = {
+    "proposals": [
+        {"agent": "A", "vote": "BUY", "weight": 0.6, "confidence": 0.8},
+        {"agent": "B", "vote": "SELL", "weight": 0.4, "confidence": 0.5},
+    ]
+}
+
+
+@pytest.fixture
+def propose_calls(monkeypatch):
+    calls = []
+    original = AgentRegistry.propose
+
+    def counting(self, agent, **kwargs):
+        calls.append(kwargs["ticker"])
+        return original(self, agent, **kwargs)
+
+    monkeypatch.setattr(AgentRegistry, "propose", counting)
+    return calls
+
+
+def _client(**overrides):
+    settings = Settings(RATE_LIMIT="1000/minute", **overrides)
+    return TestClient(create_app(settings))
+
+
+def test_propose_sets_etag_and_repeats_skip_the_handler(propose_calls):
+    client = _client()
+    first = client.post("/agent/propose", json=PROPOSE)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('"')
+    assert first.headers["cache-control"] == "private, max-age=60"
+
+    # Samma request med annan nyckelordning och whitespace ger samma ETag.
+    reordered = b'{ "sentiment": 0.2, "agent": "Fundamental",  "ticker": "NVDA" }'
+    again = client.post(
+        "/agent/propose", content=reordered, headers={"content-type": "application/json"}
+    )
+    assert again.headers["etag"] == etag and again.content == first.content
+
+    not_modified = client.post("/agent/propose", json=PROPOSE, headers={"if-none-match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert propose_calls == ["NVDA"]
+
+    other = client.post("/agent/propose", json={**PROPOSE, "price": 10.0})
+    assert other.headers["etag"] != etag
+    assert propose_calls == ["NVDA", "NVDA"]
+
+
+def test_vote_if_none_match_on_first_request_still_answers_304():
+    client = _client()
+    etag = client.post("/vote", json=VOTE).headers["etag"]
+    fresh = _client()  # tom cache: handlern körs, men svaret blir ändå 304
+    resp = fresh.post("/vote", json=VOTE, headers={"if-none-match": f'W/{etag}, "other"'})
+    assert resp.status_code == 304 and resp.headers["etag"] == etag
+
+
+def test_cache_is_per_api_key_and_never_bypasses_auth(propose_calls):
+    client = _client(API_KEYS="k1,k2")
+    etag = client.post("/agent/propose", json=PROPOSE, headers={"x-api-key": "k1"}).headers["etag"]
+    denied = client.post(
+        "/agent/propose", json=PROPOSE, headers={"x-api-key": "bad", "if-none-match": etag}
+    )
+    assert denied.status_code == 401
+    assert client.post("/agent/propose", json=PROPOSE).status_code == 401
+    client.post("/agent/propose", json=PROPOSE, headers={"x-api-key": "k2"})
+    client.post("/agent/propose", json=PROPOSE, headers={"x-api-key": "k1"})
+    assert propose_calls == ["NVDA", "NVDA"]
+
+
+def test_cache_hits_count_against_route_limit():
+    client = _client()
+    codes = [client.post("/vote", json=VOTE).status_code for _ in range(31)]
+    assert codes[:30] == [200] * 30 and codes[30] == 429
+
+
+def test_invalid_bodies_and_disabled_cache_behave_as_before(propose_calls):
+    client = _client()
+    bad = client.post("/agent/propose", json={"ticker": "NVDA"})
+    assert bad.status_code == 422 and "etag" not in bad.headers
+
+    off = _client(RESPONSE_CACHE_MAX_ENTRIES=0)
+    for _ in range(2):
+        resp = off.post("/agent/propose", json=PROPOSE)
+        assert resp.status_code == 200 and "etag" not in resp.headers
+    assert len(propose_calls) == 2
+
+
+def test_response_cache_is_bounded_lru_with_ttl():
+    cache = ResponseCache(max_entries=2, salt="v1")
+    assert cache.etag("/vote", b"{}") != ResponseCache(salt="v2").etag("/vote", b"{}")
+    entry = CachedResponse(b"{}", "application/json", expires_at=100.0)
+    cache.put("a", "/vote", entry)
+    cache.put("b", "/vote", entry)
+    assert cache.get("a", "/vote", now=1.0) is entry  # a blir senast använd
+    cache.put("c", "/vote", entry)
+    assert cache.get("b", "/vote", now=1.0) is None and len(cache) == 2
+    assert cache.get("a", "/vote", now=100.0) is None and len(cache) == 1
+
+    assert etag_matches('"x", W/"y"', '"y"') and etag_matches("*", '"y"')
+    assert not etag_matches(None, '"y"') and not etag_matches('"x"', '"y"')
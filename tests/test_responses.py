@@ -0,0 +1,108 @@
+import json
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from corealpha_adapter.app import app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.dependencies import api_key_guard
+from corealpha_adapter.responses import FastJSONResponse, FastModelRoute
+from corealpha_adapter.schemas import VoteRequest
+
+
+def _standard_bytes(resp):
+    # Samma kodning som FastAPI:s JSONResponse använder.
+    return json.dumps(
+        resp.json(), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def test_contract_flow_bytes_match_standard_encoder():
+    client = TestClient(app)
+    responses = [client.get("/health")]
+    responses.append(
+        client.post("/summarize", json={"ticker": "NVDA", "text": "strong growth – rekord"})
+    )
+    responses.append(client.post("/sentiment", json={"ticker": "NVDA", "texts": ["strong"]}))
+    score = responses[-1].json()["score"]
+    proposals = []
+    for agent in ["Sentiment", "Fundamental", "Technical"]:
+        resp = client.post(
+            "/agent/propose", json={"ticker": "NVDA", "agent": agent, "sentiment": score}
+        )
+        responses.append(resp)
+        proposals.append({k: resp.json()[k] for k in ["agent", "vote", "weight", "confidence"]})
+    responses.append(client.post("/vote", json={"proposals": proposals}))
+
+    for resp in responses:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert resp.content == _standard_bytes(resp)
+
+
+class Bounded(BaseModel):
+    value: float = Field(le=1.0)
+
+
+def _bounded_app():
+    router = APIRouter(route_class=FastModelRoute)
+
+    @router.get("/exact", response_model=Bounded)
+    def exact():
+        # Ogiltigt enligt modellen: bevisar att svaret inte valideras om.
+        return Bounded.model_construct(value=5.0)
+
+    @router.get("/dict", response_model=Bounded)
+    async def as_dict():
+        return {"value": 0.5}
+
+    fast_app = FastAPI(default_response_class=FastJSONResponse)
+    fast_app.include_router(router)
+    return fast_app
+
+
+def test_exact_model_skips_revalidation():
+    client = TestClient(_bounded_app())
+    assert client.get("/exact").json() == {"value": 5.0}
+    assert client.get("/dict").json() == {"value": 0.5}
+
+
+def _echo_app(**settings):
+    router = APIRouter(route_class=FastModelRoute, dependencies=[Depends(api_key_guard)])
+    seen = []
+
+    @router.post("/echo", response_model=VoteRequest)
+    async def echo(request: Request, req: VoteRequest):
+        seen.append(type(request._json))
+        return req
+
+    fast_app = FastAPI(default_response_class=FastJSONResponse)
+    fast_app.state.settings = Settings(**settings)
+    fast_app.state.api_keys = {"k"}
+    fast_app.include_router(router)
+    return TestClient(fast_app), seen
+
+
+def test_json_body_is_validated_from_raw_bytes():
+    body = {"proposals": [{"agent": " A ", "vote": "BUY", "weight": 0.5, "confidence": 0.5}]}
+    headers = {"x-api-key": "k"}
+    fast, seen = _echo_app()
+    slow, seen_slow = _echo_app(JSON_BODY_FAST_PATH=False)
+    assert fast.post("/echo", json=body, headers=headers).json()["proposals"][0]["agent"] == "A"
+    assert seen == [VoteRequest]
+    assert (
+        slow.post("/echo", json=body, headers=headers).json()
+        == fast.post("/echo", json=body, headers=headers).json()
+    )
+    assert seen_slow == [dict]
+
+    # Ogiltiga bodies går FastAPI:s vanliga väg: samma 422 och samma ordning mot auth.
+    assert fast.post("/echo", content=b'{"proposals": []}').status_code == 401
+    for bad in (b'{"proposals": []}', b'{"proposals": [', b"[]"):
+        expected = slow.post("/echo", content=bad, headers=headers)
+        got = fast.post("/echo", content=bad, headers=headers)
+        assert got.status_code == expected.status_code == 422
+        assert got.json() == expected.json()
+        unauthenticated = slow.post("/echo", content=bad).status_code
+        assert fast.post("/echo", content=bad).status_code == unauthenticated
@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.app import create_app
+from corealpha_adapter.core.config import Settings
+from corealpha_adapter.providers import ProviderCircuitOpenError
+from corealpha_adapter.providers.stub import StubProvider
+from corealpha_adapter.services.sentiment_stream import iter_lines, score_stream
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def _rows(body: bytes):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def test_stream_endpoint_scores_each_line_in_order():
+    client = TestClient(create_app(Settings(MAX_BODY_BYTES=512, SENTIMENT_STREAM_CHUNK=2)))
+    lines = [
+        json.dumps("strong growth"),
+        json.dumps({"id": "h-2", "text": "weak outlook, downgrade"}),
+        "",
+        "{not json",
+        json.dumps({"id": 4, "text": "   "}),
+    ] + [json.dumps(f"record beat #{i}") for i in range(40)]
+    resp = client.post(
+        "/sentiment/stream",
+        params={"ticker": "NVDA"},
+        content="\n".join(lines).encode(),  # större än MAX_BODY_BYTES
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = _rows(resp.content)
+    assert rows[0] == {"line": 1, "score": 0.9}
+    assert rows[1] == {"line": 2, "id": "h-2", "score": -0.9}
+    assert rows[2]["line"] == 4 and "error" in rows[2]
+    assert rows[3]["line"] == 5 and "at least 1 character" in rows[3]["error"]
+    assert [r["line"] for r in rows[4:-1]] == list(range(6, 46))
+    assert rows[-1] == {"done": True, "scored": 42, "errors": 2}
+
+
+class _CountingProvider(StubProvider):
+    def __init__(self, aggregate_only=False):
+        self.calls = []
+        self.aggregate_only = aggregate_only
+
+    async def sentiment(self, payload):
+        self.calls.append(len(payload["texts"]))
+        result = await super().sentiment(payload)
+        if self.aggregate_only:
+            result.pop("vectors")
+        return result
+
+
+@pytest.mark.asyncio
+async def test_input_is_read_only_as_fast_as_results_are_consumed():
+    read = 0
+
+    async def lines():
+        nonlocal read
+        for i in range(1, 1001):
+            read += 1
+            yield i, json.dumps(f"growth {i}").encode()
+
+    provider = _CountingProvider()
+    stream = score_stream(lines(), provider, chunk_size=10)
+    first = await stream.__anext__()
+    assert len(first.splitlines()) == 10
+    assert read == 10  # inget läses i förväg
+    await stream.aclose()
+    assert provider.calls == [10]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_only_provider_is_scored_per_text():
+    provider = _CountingProvider(aggregate_only=True)
+    lines = _chunks(b'"strong"\n"weak"\n')
+    out = b"".join(await _collect(score_stream(iter_lines(lines), provider, chunk_size=8)))
+    assert [r.get("score") for r in _rows(out)[:2]] == [0.9, -0.9]
+    assert sorted(provider.calls) == [1, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_per_text_fallback_is_bounded_by_concurrency():
+    class Slow(_CountingProvider):
+        active = peak = 0
+
+        async def sentiment(self, payload):
+            Slow.active += 1
+            Slow.peak = max(Slow.peak, Slow.active)
+            await asyncio.sleep(0.001)
+            Slow.active -= 1
+            return await super().sentiment(payload)
+
+    provider = Slow(aggregate_only=True)
+    lines = _chunks(b"".join(b'"growth %d"\n' % i for i in range(32)))
+    stream = score_stream(iter_lines(lines), provider, chunk_size=32, concurrency=3)
+    rows = _rows(b"".join(await _collect(stream)))
+    assert rows[-1] == {"done": True, "scored": 32, "errors": 0}
+    assert Slow.peak == 3
+    assert sorted(provider.calls) == [1] * 32 + [32]
+
+
+@pytest.mark.asyncio
+async def test_provider_failure_ends_stream_with_fatal_line():
+    class Failing:
+        async def sentiment(self, payload):
+            raise ProviderCircuitOpenError("FinGPT circuit breaker is open")
+
+    out = b"".join(await _collect(score_stream(iter_lines(_chunks(b'"a"\n')), Failing())))
+    assert _rows(out) == [{"error": "FinGPT circuit breaker is open", "fatal": True, "scored": 0}]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_splits_across_chunks_and_drops_oversized_lines():
+    chunks = _chunks(b'"a', b'b"\n' + b"x" * 30, b"y" * 30 + b"\n", b'"c"')
+    assert await _collect(iter_lines(chunks, max_line_bytes=50)) == [
+        (1, b'"ab"'),
+        (2, None),
+        (3, b'"c"'),
+    ]
+
+
+def test_stream_route_stays_unlimited_when_routes_setting_adds_limits():
+    settings = Settings(MAX_BODY_BYTES=512, MAX_BODY_BYTES_ROUTES="/summarize/long=1024")
+    client = TestClient(create_app(settings))
+    body = "\n".join(json.dumps(f"growth {i}") for i in range(100)).encode()
+    resp = client.post(
+        "/sentiment/stream", content=body, headers={"content-type": "application/x-ndjson"}
+    )
+    assert resp.status_code == 200
+    assert _rows(resp.content)[-1] == {"done": True, "scored": 100, "errors": 0}
@@ -0,0 +1,105 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+_PATH = pathlib.Path(__file__).resolve().parents[1] / "docker" / "start_app.py"
+_spec = importlib.util.spec_from_file_location("start_app", _PATH)
+start_app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(start_app)
+
+
+def _cgroup(tmp_path, files):
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return str(tmp_path)
+
+
+def test_cgroup_v2_and_v1_quota(tmp_path):
+    assert (
+        start_app.cgroup_cpu_limit(_cgroup(tmp_path / "v2", {"cpu.max": "150000 100000\n"})) == 1.5
+    )
+    assert start_app.cgroup_cpu_limit(_cgroup(tmp_path / "un", {"cpu.max": "max 100000"})) is None
+    v1 = _cgroup(
+        tmp_path / "v1", {"cpu/cpu.cfs_quota_us": "200000", "cpu/cpu.cfs_period_us": "100000"}
+    )
+    assert start_app.cgroup_cpu_limit(v1) == 2.0
+    unlimited = _cgroup(
+        tmp_path / "v1u", {"cpu/cpu.cfs_quota_us": "-1", "cpu/cpu.cfs_period_us": "100000"}
+    )
+    assert start_app.cgroup_cpu_limit(unlimited) is None
+    assert start_app.cgroup_cpu_limit(str(tmp_path / "missing")) is None
+
+
+def test_worker_count_follows_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        start_app.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False
+    )
+    root = _cgroup(tmp_path, {"cpu.max": "250000 100000"})
+    assert start_app.worker_count("prod", None, root) == 3
+    assert start_app.worker_count("dev", None, root) == 1
+    assert start_app.worker_count("dev", "auto", root) == 3
+    assert start_app.worker_count("prod", "4", root) == 4
+    monkeypatch.setenv("MAX_WORKERS", "2")
+    assert start_app.worker_count("prod", "auto", root) == 2
+
+
+@pytest.mark.parametrize("reload_opt, workers", [("false", 3), ("true", 1)])
+def test_uvicorn_options(monkeypatch, reload_opt, workers):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("UVICORN_RELOAD", reload_opt)
+    monkeypatch.setenv("MAX_REQUESTS", "5000")
+    monkeypatch.setattr(start_app, "_installed", lambda module: module == "httptools")
+    options = start_app.uvicorn_options("prod")
+    assert options["workers"] == workers
+    assert (options["loop"], options["http"]) == ("asyncio", "httptools")
+    # En ensam process har ingen supervisor som startar om den.
+    assert options["limit_max_requests"] == (5000 if workers > 1 else None)
+    assert options["max_requests_jitter"] == (500 if workers > 1 else 0)
+    assert options["timeout_graceful_shutdown"] == 30
+
+
+def test_max_requests_jitter_is_drawn_per_worker(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.setenv("MAX_REQUESTS", "1000")
+    monkeypatch.setenv("MAX_REQUESTS_JITTER", "50")
+    options = start_app.uvicorn_options("prod")
+    assert options["max_requests_jitter"] == 50
+
+    config = start_app.JitteredConfig(
+        "corealpha_adapter.app:app", max_requests_jitter=50, limit_max_requests=1000
+    )
+    drawn = set()
+    for _ in range(20):
+        config.load()
+        config.loaded = False
+        drawn.add(config.limit_max_requests)
+    assert all(1000 <= value <= 1050 for value in drawn)
+    assert len(drawn) > 1
+
+
+def test_multiple_workers_default_to_shared_rate_limit_storage(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("RATE_LIMIT_STORAGE", raising=False)
+    assert start_app.default_rate_limit_storage(1) is None
+    storage = start_app.default_rate_limit_storage(4)
+    assert storage.startswith("sqlite:///") and storage.endswith("/corealpha-rl.db")
+
+    (tmp_path / ".env").write_text("RATE_LIMIT_STORAGE=redis://cache:6379/0\n")
+    assert start_app.default_rate_limit_storage(4) is None
+
+    monkeypatch.setenv("RATE_LIMIT_STORAGE", "memory://")
+    assert start_app.default_rate_limit_storage(4) is None
+    assert "4x" in capsys.readouterr().err
+
+
+def test_multiple_workers_record_one_cassette_each(monkeypatch):
+    monkeypatch.setenv("FINGPT_RECORD_PATH", "/data/fingpt.jsonl.gz")
+    assert start_app.per_worker_record_path(1) is None
+    assert start_app.per_worker_record_path(4) == "/data/fingpt.{pid}.jsonl.gz"
+    monkeypatch.setenv("FINGPT_RECORD_PATH", "/data/{pid}-fingpt.jsonl")
+    assert start_app.per_worker_record_path(4) is None  # redan per process
+    monkeypatch.delenv("FINGPT_RECORD_PATH")
+    assert start_app.per_worker_record_path(4) is None
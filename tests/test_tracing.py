@@ -0,0 +1,96 @@
+import json
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from corealpha_adapter.middleware import RequestIDMiddleware
+from corealpha_adapter.observability import tracing
+from corealpha_adapter.observability.tracing import (
+    JSONLinesExporter,
+    LogExporter,
+    Tracer,
+    build_exporter,
+    span,
+)
+from corealpha_adapter.ratelimit import Limiter, MemoryBackend
+from corealpha_adapter.responses import FastJSONResponse, FastModelRoute
+
+
+class Echo(BaseModel):
+    text: str
+
+
+def _app(tracer):
+    limiter = Limiter(key_func=lambda request: "k", backend=MemoryBackend())
+    router = APIRouter(route_class=FastModelRoute)
+
+    @router.post("/echo", response_model=Echo)
+    @limiter.limit("100/minute")
+    def echo(req: Echo, request: Request):
+        # Synk endpoint körs i trådpoolen; spannet måste ändå hamna i tracen.
+        with span("work", size=len(req.text)):
+            return Echo(text=req.text.upper())
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    app.add_middleware(RequestIDMiddleware, tracer=tracer)
+    return app
+
+
+def test_sampled_request_gets_server_timing_and_jsonl_record(tmp_path):
+    path = tmp_path / "traces" / "t.jsonl"
+    exporter = JSONLinesExporter(str(path))
+    client = TestClient(_app(Tracer(sample_rate=1.0, exporter=exporter)))
+    try:
+        resp = client.post("/echo", json={"text": "hi"}, headers={"x-request-id": "rid-7"})
+        assert exporter.flush()
+    finally:
+        exporter.close()
+
+    assert resp.json() == {"text": "HI"}
+    timing = resp.headers["server-timing"]
+    names = [part.split(";")[0] for part in timing.split(", ")]
+    for name in ("validate", "ratelimit", "work", "endpoint", "serialize"):
+        assert name in names
+    assert names[-1] == "total"
+
+    record = json.loads(path.read_text().strip())
+    assert record["event"] == "trace"
+    assert record["rid"] == "rid-7"
+    assert record["status"] == 200
+    work = next(s for s in record["spans"] if s["name"] == "work")
+    assert work["size"] == 2
+    assert work["ms"] >= 0
+
+
+def test_unsampled_requests_skip_tracing():
+    client = TestClient(_app(Tracer(sample_rate=0.0)))
+    resp = client.post("/echo", json={"text": "hi"})
+    assert resp.status_code == 200
+    assert "server-timing" not in resp.headers
+    assert span("anything") is tracing._NOOP
+    assert tracing.current_trace() is None
+
+
+def test_server_timing_header_can_be_disabled():
+    client = TestClient(_app(Tracer(sample_rate=1.0, server_timing=False)))
+    assert "server-timing" not in client.post("/echo", json={"text": "hi"}).headers
+
+
+def test_server_timing_aggregates_repeated_spans():
+    trace = tracing.Trace("rid")
+    trace.add("upstream", 0.0, 0.010)
+    trace.add("upstream", 0.0, 0.020)
+    header = trace.server_timing(now=trace.started + 0.05)
+    assert header == 'upstream;dur=30.000;desc="2x", total;dur=50.000'
+
+
+def test_build_exporter(tmp_path):
+    assert build_exporter("") is None
+    assert build_exporter("none") is None
+    assert isinstance(build_exporter("log"), LogExporter)
+    exporter = build_exporter(f"jsonl://{tmp_path}/t.jsonl")
+    assert isinstance(exporter, JSONLinesExporter)
+    assert exporter.path == f"{tmp_path}/t.jsonl"
+    exporter.close()
@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from corealpha_adapter.services import reset_provider, warmup
+from corealpha_adapter.services.agents.registry import get_agent_registry
+from corealpha_adapter.services.warmup import WarmupScheduler
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    warmup.reset_warmup_scheduler()
+    reset_provider()
+    yield
+    warmup.reset_warmup_scheduler()
+    reset_provider()
+
+
+def test_next_run_is_computed_in_utc():
+    scheduler = WarmupScheduler(["NVDA"], times=[(9, 0), (13, 30)])
+    now = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc)
+    assert scheduler.seconds_until_next(now) == pytest.approx(3.5 * 3600)
+    late = datetime(2026, 1, 5, 14, 0, tzinfo=timezone.utc)
+    assert scheduler.seconds_until_next(late) == pytest.approx(19 * 3600)
+    assert WarmupScheduler(["NVDA"]).seconds_until_next(now) is None
+
+
+@pytest.mark.asyncio
+async def test_run_once_walks_full_chain(monkeypatch):
+    calls = []
+
+    class RecordingProvider:
+        async def summarize(self, payload):
+            calls.append(("summarize", payload))
+            return {"summary": "strong growth"}
+
+        async def sentiment(self, payload):
+            calls.append(("sentiment", payload))
+            return {"score": 0.5}
+
+        async def vote(self, payload):
+            calls.append(("vote", payload))
+            return {}
+
+    monkeypatch.setattr(warmup, "get_provider", lambda: RecordingProvider())
+    scheduler = WarmupScheduler(["nvda", "aapl"], concurrency=1)
+    state = await scheduler.run_once()
+
+    assert state.runs == 1 and state.last_errors == 0 and not state.running
+    assert [c[0] for c in calls] == ["summarize", "sentiment", "vote"] * 2
+    assert calls[0][1] == {"ticker": "NVDA"}
+    assert calls[1][1] == {"ticker": "NVDA", "texts": ["strong growth"]}
+    assert len(calls[2][1]["proposals"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_agents_run_off_the_event_loop(monkeypatch):
+    class Provider:
+        async def summarize(self, payload):
+            return {"summary": ""}
+
+        async def vote(self, payload):
+            return {}
+
+    registry = get_agent_registry()
+    propose = registry.propose
+    threads = []
+
+    def recording_propose(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return propose(*args, **kwargs)
+
+    monkeypatch.setattr(warmup, "get_provider", lambda: Provider())
+    monkeypatch.setattr(registry, "propose", recording_propose)
+    state = await WarmupScheduler(["NVDA"]).run_once()
+    assert state.last_errors == 0
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_run_once_counts_errors_without_raising(monkeypatch):
+    class FailingProvider:
+        async def summarize(self, payload):
+            raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(warmup, "get_provider", lambda: FailingProvider())
+    state = await WarmupScheduler(["NVDA"]).run_once()
+    assert state.last_errors == 1
+
+
+def test_lifespan_runs_startup_warmup(monkeypatch):
+    monkeypatch.setenv("WARMUP_WATCHLIST", "NVDA")
+    from corealpha_adapter.app import app
+
+    with TestClient(app) as client:
+        scheduler = app.state.warmup
+        assert scheduler is not None
+        deadline = time.monotonic() + 5
+        while scheduler.state.runs < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert scheduler.state.runs == 1
+        assert scheduler.state.last_errors == 0
+        metrics = client.get("/metrics").text
+        assert "corealpha_warmup_progress_ratio 1.0" in metrics